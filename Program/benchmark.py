@@ -0,0 +1,256 @@
+import os
+import sys
+import json
+import time
+import random
+import platform
+import contextlib
+
+import chess
+import numpy as np
+import pandas as pd
+
+from chessManager.chess import Chess
+from deepLearningAI.deepNeuralNetwork.neuralNetwork import NeuralNetwork
+from deepLearningAI.training.dataGenerating import ChessStateEncoder, DataGenerator
+from deepLearningAI.training.enginePool import EnginePool
+from deepLearningAI.training.training import Trainer
+
+class Benchmark():
+
+    # Version of the JSON results written by save(); compare() only compares results of the same version
+    FORMAT_VERSION = 1
+
+    # A case is slower than its baseline when its best time per call grew by more than this fraction
+    # (the best round is compared rather than the median, as it is the least disturbed by the other processes of the machine)
+    DEFAULT_TOLERANCE = 0.20
+
+    DEFAULT_MODEL_FILE_NAME = "ModelDataFile-'1_Simulations_Of_White_RandomBot_VS_Black_RandomBot'__HiddenLayersActivationFunction-'ReLU'__Epoches-'150'__MiniBatchGD-'64'.npz"
+    DEFAULT_DATA_FILE_NAME = "10_Simulations_Of_White_RandomBot_VS_Black_RandomBot"
+
+    def __init__(self, seed=0, repeats=7, minimumRoundTime=0.05, modelFileName=DEFAULT_MODEL_FILE_NAME, dataFileName=DEFAULT_DATA_FILE_NAME):
+
+        # Every case starts from the same seeds, and works on the same seeded positions and data, so that runs are comparable
+        self.seed = seed
+
+        # Each case is timed in repeats rounds of as many calls as fill minimumRoundTime seconds; the median and the best round give the time per call
+        self.repeats = repeats
+        self.minimumRoundTime = minimumRoundTime
+
+        self.modelFileName = modelFileName
+        self.dataFileName = dataFileName
+
+        self.results = {}
+
+    def __str__(self):
+        return "Benchmark(seed={}, repeats={})".format(self.seed, self.repeats)
+
+    def seedEverything(self):
+        random.seed(self.seed)
+        np.random.seed(self.seed)
+
+    def randomPositions(self, numberOfPositions=64, maximumNumberOfPlies=60):
+        # Positions of seeded random games, from the opening to the middle game
+        generator = random.Random(self.seed)
+        positions = []
+        while len(positions) < numberOfPositions:
+            board = chess.Board()
+            for ply in range(0, generator.randrange(1, maximumNumberOfPlies)):
+                moves = list(board.legal_moves)
+                if not moves:
+                    break
+                board.push(generator.choice(moves))
+            if not board.is_game_over():
+                positions.append(board)
+
+        return positions
+
+    def measure(self, name, function, numberOfItems=1):
+        # Median and minimum seconds per call of function(), and items processed per second (e.g. positions, examples)
+        self.seedEverything()
+
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            function()
+
+            # Calibrate the number of calls per round
+            numberOfLoops = 1
+            while True:
+                startTime = time.perf_counter()
+                for loop in range(0, numberOfLoops):
+                    function()
+                elapsedTime = time.perf_counter() - startTime
+                if elapsedTime >= self.minimumRoundTime or numberOfLoops >= 1 << 20:
+                    break
+                numberOfLoops *= 2 if elapsedTime <= 0 else max(2, min(10, int(self.minimumRoundTime / elapsedTime) + 1))
+
+            roundTimes = []
+            for i in range(0, self.repeats):
+                startTime = time.perf_counter()
+                for loop in range(0, numberOfLoops):
+                    function()
+                roundTimes.append((time.perf_counter() - startTime) / numberOfLoops)
+
+        median = float(np.median(roundTimes))
+        self.results[name] = {"median": median, "minimum": float(np.min(roundTimes)), "loops": numberOfLoops, "repeats": self.repeats,
+                              "items": numberOfItems, "itemsPerSecond": numberOfItems / median if median > 0 else None}
+
+        print("     {:<48} {:>12.1f} µs/call {:>14.0f} items/s".format(name, median * 1e6, self.results[name]["itemsPerSecond"] or 0))
+
+    # ===========================================================================================================================
+    # CASES
+    def benchmarkEncoder(self, positions):
+        encoders = [ChessStateEncoder(board=board, isPrintedOutput=False) for board in positions]
+
+        def encodeOneByOne():
+            for encoder in encoders:
+                encoder.initializeEncodedFenArray()
+
+        out = np.empty((len(positions), ChessStateEncoder.NUMBER_OF_FEATURES), dtype=np.float32)
+        self.measure("encoder.initializeEncodedFenArray", encodeOneByOne, numberOfItems=len(positions))
+        self.measure("encoder.encodeBoards", lambda: ChessStateEncoder.encodeBoards(positions, out=out), numberOfItems=len(positions))
+
+    def benchmarkPredict(self, batchSizes=(1, 32, 256, 4096)):
+        dnn = NeuralNetwork.load(modelFileName=self.modelFileName)
+        model = dnn.freeze()
+
+        for batchSize in batchSizes:
+            X = np.random.RandomState(self.seed).rand(batchSize, ChessStateEncoder.NUMBER_OF_FEATURES).astype(np.float32)
+            XTransposed = np.ascontiguousarray(X.transpose())
+            self.measure("neuralNetwork.predict[{}]".format(batchSize), lambda: dnn.predict(X=XTransposed), numberOfItems=batchSize)
+            self.measure("inferenceModel.predict[{}]".format(batchSize), lambda: model.predict(X=X), numberOfItems=batchSize)
+
+    def benchmarkMoveSelection(self, positions):
+        # Move selection of the bot against the stub engine, so that the time is the bot's own and not Stockfish's
+        from chessBots.deepLearningBot import DeepLearningBot
+
+        with EnginePool(enginePath=[sys.executable, "./deepLearningAI/training/stubEngine.py"]) as enginePool:
+            with contextlib.redirect_stdout(open(os.devnull, "w")):
+                bot = DeepLearningBot(chess=Chess(), modelFileName=self.modelFileName, enginePool=enginePool, engineTimeBudget=0.01)
+
+            def selectMoves():
+                # The same positions are replayed on every repetition: without clearing the bot's table, every repetition after the first
+                # would only time lookups of the candidates' engine scores
+                bot.transpositionTable.clear()
+                for board in positions:
+                    bot.chess.board = board
+                    bot.playerIndex = 1 if board.turn == chess.WHITE else -1
+                    bot.evaluatePossibleMoves()
+
+            self.measure("deepLearningBot.evaluatePossibleMoves", selectMoves, numberOfItems=len(positions))
+
+    def benchmarkMoveGeneration(self, positions):
+        game = Chess()
+
+        def generateMoves():
+            for board in positions:
+                game.board = board
+                game.getPossibleMoves()
+
+        firstMoves = [next(iter(board.legal_moves)).uci() for board in positions]
+        boards = [board.copy() for board in positions]
+
+        def makeAndUnmakeMoves():
+            for board, move in zip(boards, firstMoves):
+                game.board = board
+                game.makeAMove(moveToString=move)
+                game.unmakeAMove()
+
+        self.measure("chess.getPossibleMoves", generateMoves, numberOfItems=len(positions))
+        self.measure("chess.makeAMove+unmakeAMove", makeAndUnmakeMoves, numberOfItems=len(positions))
+
+    def benchmarkScaling(self, numberOfRows=4096):
+        data = np.random.RandomState(self.seed).randn(numberOfRows, ChessStateEncoder.NUMBER_OF_FEATURES + 1)
+        dataFrame = pd.DataFrame(data)
+
+        self.measure("dataGenerator.minMaxScaling[{}]".format(numberOfRows), lambda: DataGenerator.minMaxScaling(data=dataFrame), numberOfItems=numberOfRows)
+        self.measure("dataGenerator.minMaxScalingArray[{}]".format(numberOfRows), lambda: DataGenerator.minMaxScalingArray(data=data), numberOfItems=numberOfRows)
+
+    def benchmarkTraining(self, batchSize=64):
+        # One mini-batch epoch of the Trainer on a tracked data file, from the same initial network every time
+        self.seedEverything()
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            trainer = Trainer(dataFileName=self.dataFileName, numberOfEpoches=0, batchSize=batchSize)
+
+        self.measure("trainer.trainOneEpoch[{}]".format(batchSize), lambda: trainer.trainOneEpoch(batchSize=batchSize), numberOfItems=trainer.numberOfTrainingExamples())
+
+    def run(self):
+        print("\n========================================================================================================================")
+        print("BENCHMARK: (seed {}, {} rounds of at least {} s per case)".format(self.seed, self.repeats, self.minimumRoundTime))
+
+        positions = self.randomPositions()
+
+        self.benchmarkEncoder(positions)
+        self.benchmarkPredict()
+        self.benchmarkMoveSelection(positions)
+        self.benchmarkMoveGeneration(positions)
+        self.benchmarkScaling()
+        self.benchmarkTraining()
+
+        return self.report()
+
+    def report(self):
+        return {"formatVersion": Benchmark.FORMAT_VERSION, "seed": self.seed,
+                "environment": {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(), "numberOfCpus": os.cpu_count()},
+                "results": self.results}
+
+    @staticmethod
+    def save(report, fileName):
+        with open(fileName, "w") as file:
+            json.dump(report, file, indent=2)
+
+    @staticmethod
+    def load(fileName):
+        with open(fileName) as file:
+            return json.load(file)
+
+    @staticmethod
+    def compare(report, baseline, tolerance=DEFAULT_TOLERANCE):
+        # Ratio of the best time per call of every case to the baseline's; returns the names of the cases slower by more than tolerance
+        if report["formatVersion"] != baseline["formatVersion"]:
+            raise ValueError("Cannot compare benchmark results of format {} with a baseline of format {}".format(report["formatVersion"], baseline["formatVersion"]))
+
+        print("\n========================================================================================================================")
+        print("COMPARISON WITH THE BASELINE: (regression above +{:.0f}%)".format(tolerance * 100))
+
+        regressions = []
+        for name, result in report["results"].items():
+            if name not in baseline["results"]:
+                print("     {:<48} new".format(name))
+                continue
+
+            ratio = result["minimum"] / baseline["results"][name]["minimum"]
+            isRegression = ratio > 1. + tolerance
+            if isRegression:
+                regressions.append(name)
+
+            print("     {:<48} {:>8.2f}x {}".format(name, ratio, "REGRESSION" if isRegression else ("faster" if ratio < 1. - tolerance else "")))
+
+        for name in baseline["results"]:
+            if name not in report["results"]:
+                print("     {:<48} missing".format(name))
+
+        print("\n -> {} regression(s)".format(len(regressions)))
+
+        return regressions
+
+    @staticmethod
+    def main(arguments):
+        # benchmark.py <results.json> [baseline.json]: run every case, write the results, and compare them with the baseline if one is given
+        # (the exit status is 1 when a case regressed)
+        report = Benchmark().run()
+        Benchmark.save(report, arguments[0])
+        print("\nResults written to {}".format(arguments[0]))
+
+        if len(arguments) >= 2:
+            regressions = Benchmark.compare(report, Benchmark.load(arguments[1]))
+            return 1 if regressions else 0
+
+        return 0
+
+if __name__ == '__main__':
+    # E.g. "python benchmark.py benchmark.json", then after a change "python benchmark.py after.json benchmark.json"
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python benchmark.py <results.json> [baseline.json]")
+        sys.exit(2)
+
+    sys.exit(Benchmark.main(sys.argv[1:]))
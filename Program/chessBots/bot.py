@@ -1,28 +1,84 @@
+import sys
+import random
+import threading
+
 class Bot():
 
     def __init__(self, chess=None):
         self.chess = chess
         
-        # Delay time to make the bot's more "smoothly"
+        # Time budget of the bots which search (SearchBot, MCTSBot); the others ignore it
         self.thinkingTime = 1.
+        
+        # Set to stop a search early, e.g. when the game is reset while the bot is thinking (see BotWorker)
+        self.cancelEvent = threading.Event()
+        
+        # Polyglot book consulted before any evaluation in the opening (see OpeningBook); None plays without book
+        self.openingBook = None
 
     def __str__(self):
         raise NotImplementedError("This method should be overridden.")
         
-    def perform(self):
+    def chooseMove(self, board):
+        # Move (uci) to play in board. board is the bot's own copy of the game's board, and chooseMove may run outside the main thread
+        # (see BotWorker), so it must neither read nor change self.chess
         raise NotImplementedError("This method should be overridden.")
     
+    def bookMove(self, board):
+        # Book move in board, or None out of the book
+        if self.openingBook is None:
+            return None
+        
+        move = self.openingBook.chooseMove(board)
+        if move is not None:
+            print("\nBook move: {}".format(move))
+            
+        return move
+    
+    def isCancelled(self):
+        return self.cancelEvent.is_set()
+        
+    def playMove(self, move):
+        # Play the chosen move on the game's board, or a random move if it cannot be played
+        try:
+            print("==============================================================")
+            print("{} make a move: {}".format(self, move))
+            self.chess.makeAMove(moveToString=move)
+            
+        except:
+            randomMove = random.choice(self.chess.getPossibleMoves())
+            self.chess.makeAMove(moveToString=randomMove)
+            print("Failed to perform move {}: {}; The random move {} will be performed instead ".format(move, sys.exc_info(), randomMove))
+        
+    def perform(self):
+        # Choose and play a move in the calling thread
+        self.playMove(self.chooseMove(self.chess.board.copy()))
+    
     @staticmethod
-    def initializeBot(chess, botName="Random", playerIndex=1):
+    def initializeBot(chess, botName="Random", playerIndex=1, enginePool=None, evaluator=None, evaluationCache=None):
+        from chessBots.randomBot import RandomBot
+        
         if botName == "Random":
-            from chessBots.randomBot import RandomBot
-            
             return RandomBot(chess=chess)
         elif botName.startswith("DeepLearning_") and len(botName) > 13:
             from chessBots.deepLearningBot import DeepLearningBot
             
             deepLearningModelFileName = botName[13:]
-            return DeepLearningBot(chess=chess, playerIndex=playerIndex, modelFileName=deepLearningModelFileName)
+            return DeepLearningBot(chess=chess, playerIndex=playerIndex, modelFileName=deepLearningModelFileName, enginePool=enginePool, evaluator=evaluator, evaluationCache=evaluationCache)
+            
+        elif botName.startswith("Search_") and len(botName) > 7:
+            from chessBots.searchBot import SearchBot
+            
+            # E.g. "Search_ModelDataFile-'...'.npz": alpha-beta search with the network at the leaves
+            searchModelFileName = botName[7:]
+            return SearchBot(chess=chess, playerIndex=playerIndex, modelFileName=searchModelFileName)
+            
+        elif botName.startswith("MCTS_") and len(botName) > 5:
+            from chessBots.mctsBot import MCTSBot
+            
+            # E.g. "MCTS_ModelDataFile-'...'.npz": Monte Carlo tree search with batched network evaluations of the leaves
+            mctsModelFileName = botName[5:]
+            return MCTSBot(chess=chess, playerIndex=playerIndex, modelFileName=mctsModelFileName)
             
         else:
             print("\nBot {} is not defined. The Random bot is initialize instead.".format(botName))
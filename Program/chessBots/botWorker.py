@@ -0,0 +1,100 @@
+import sys
+import time
+import queue
+import threading
+
+class BotWorker():
+
+    def __init__(self, bot):
+
+        # The bot chooses its moves in a background thread, on a copy of the board, so that the window keeps drawing while it thinks;
+        # the chosen move comes back through a queue and is played by the main thread (see Game.update).
+        # A thread rather than a process: the bot keeps its network, caches and engines from move to move, and its heavy work
+        # (NumPy, the engines' I/O) releases the GIL
+        self.bot = bot
+        self.moves = queue.Queue()
+
+        # One long-lived thread runs the requests one after the other, so that the bot is never used by two searches at once.
+        # The main thread never waits for it: a cancelled search is drained by the worker thread itself, before the next request starts
+        self.requests = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="BotWorker", daemon=True)
+        self.thread.start()
+
+        # Each search has its own number and cancel event; the move of a cancelled (or superseded) search is discarded
+        self.searchNumber = 0
+        self.cancelEvent = None
+        self.startTime = None
+
+    def __str__(self):
+        return "BotWorker({}, {})".format(self.bot, "thinking for {:.1f} s".format(self.elapsedTime()) if self.isThinking() else "idle")
+
+    def isThinking(self):
+        return self.startTime is not None
+
+    def elapsedTime(self):
+        return time.perf_counter() - self.startTime if self.startTime is not None else 0.
+
+    def submit(self, function, cancelEvent):
+        # Run function() on the worker thread, after the requests submitted before it; the bot's cancelEvent is cancelEvent meanwhile.
+        # Every request runs, even when cancelled before it started: function is expected to return at once then (see Bot.isCancelled)
+        self.requests.put((function, cancelEvent))
+
+    def run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+
+            (function, cancelEvent) = request
+
+            # Only set here, between two requests: the event of the request still running is never replaced under it
+            self.bot.cancelEvent = cancelEvent
+            try:
+                function()
+            except:
+                print("Bot {} failed: {}".format(self.bot, sys.exc_info()))
+
+    def start(self, board):
+        # Start choosing a move in a copy of board; a search still running is cancelled, and the new one starts once it has stopped
+        self.cancel()
+
+        self.searchNumber += 1
+        self.cancelEvent = threading.Event()
+        self.startTime = time.perf_counter()
+
+        searchNumber = self.searchNumber
+        board = board.copy()
+        self.submit(lambda: self.think(searchNumber, board), self.cancelEvent)
+
+    def think(self, searchNumber, board):
+        move = None
+        try:
+            move = self.bot.chooseMove(board)
+        except:
+            # The main thread plays a random move instead (see Bot.playMove)
+            print("Bot {} failed to choose a move: {}".format(self.bot, sys.exc_info()))
+
+        self.moves.put((searchNumber, move))
+
+    def poll(self):
+        # (True, move) once the current search has chosen its move (None if it failed), (False, None) while it is thinking
+        while True:
+            try:
+                (searchNumber, move) = self.moves.get_nowait()
+            except queue.Empty:
+                return False, None
+
+            if searchNumber == self.searchNumber and self.isThinking():
+                self.startTime = None
+                return True, move
+
+    def cancel(self):
+        # Stop the current search (the bots stop at their next cancellation check) and discard its move
+        if self.cancelEvent is not None:
+            self.cancelEvent.set()
+        self.startTime = None
+
+    def shutdown(self):
+        # Cancel the current search and let the thread end once it has stopped; nothing waits for it (the thread is a daemon)
+        self.cancel()
+        self.requests.put(None)
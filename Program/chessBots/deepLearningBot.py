@@ -1,14 +1,14 @@
-import sys
-
+import numpy as np
 import pandas as pd
 
 from chessBots.bot import Bot
+from chessBots.transpositionTable import TranspositionTable
 from deepLearningAI.deepNeuralNetwork.neuralNetwork import NeuralNetwork
 from deepLearningAI.training.dataGenerating import ChessStateEncoder, DataGenerator
 
 class DeepLearningBot(Bot):
     
-    def __init__(self, chess=None, playerIndex=1, modelFileName="ModelDataFile-'1_Simulations_Of_White_RandomBot_VS_Black_RandomBot'__HiddenLayersActivationFunction-'ReLU'__Epoches-'150'__MiniBatchGD-'64'.pickle"):
+    def __init__(self, chess=None, playerIndex=1, modelFileName="ModelDataFile-'1_Simulations_Of_White_RandomBot_VS_Black_RandomBot'__HiddenLayersActivationFunction-'ReLU'__Epoches-'150'__MiniBatchGD-'64'.npz", enginePool=None, isRootAnalysed=None, engineTimeBudget=0.5, evaluator=None, evaluationCache=None, isDebugged=False, transpositionTable=None, transpositionTableSize=4):
         super().__init__(chess=chess)
         
         self.thinkingTime = 1.
@@ -16,87 +16,149 @@ class DeepLearningBot(Bot):
         self.dnn = NeuralNetwork.load(modelFileName=modelFileName)
         self.dnn.printNeuralNetwork()
         
+        # Move selection only predicts, through a frozen copy of the network
+        self.model = self.dnn.freeze()
+        
         self.playerIndex = playerIndex
         
+        # Engines used to evaluate the candidate moves are borrowed from this pool (the shared default pool if None)
+        self.enginePool = enginePool
+        
+        # Root analysis scores every candidate move with a single multi-PV search sharing engineTimeBudget seconds,
+        # instead of a separate 0.1 second search per candidate move
+        self.engineTimeBudget = engineTimeBudget
+        
+        # Without root analysis, an AsyncEvaluator scores the candidate positions concurrently instead of one after another.
+        # Root analysis is the default, unless an evaluator is given: its engines then score the candidates
+        self.evaluator = evaluator
+        self.isRootAnalysed = isRootAnalysed if isRootAnalysed is not None else evaluator is None
+        
+        # Persistent cache of the per-position engine evaluations
+        self.evaluationCache = evaluationCache
+        
+        # Move selection works on NumPy arrays only; the table of every candidate's evaluations is built and printed only when debugging
+        self.isDebugged = isDebugged
+        
+        # Kept from move to move: the engine score of each candidate position (depth 0), so that positions met again are not sent to the engine again.
+        # The move itself is always chosen anew, from the network's predictions and those scores
+        self.transpositionTable = transpositionTable if transpositionTable is not None else TranspositionTable(sizeInMegabytes=transpositionTableSize)
+        
+        # Reused from move to move, grown when a position has more candidate moves than any before
+        self.candidateMatrix = np.empty((64, ChessStateEncoder.NUMBER_OF_FEATURES + 1))
+        
     def __str__(self):
         return "DeepLearning_with_({})".format(self.dnn.hiddenLayers[0].activationFunctionLayer)
     
-    def perform(self):
-        move = self.evaluatePossibleMoves()
-        try:
-            print("==============================================================")
-            print("Deep Learning Bot make a move: {}".format(move))
-            self.chess.makeAMove(moveToString=move)
+    def chooseMove(self, board):
+        return self.bookMove(board) or self.evaluatePossibleMoves(board=board)
             
-        except:
-            randomMove = random.choice(self.chess.getPossibleMoves())
-            self.chess.makeAMove(moveToString=randomMove)
-            print("Failed to perform move {}: {}; The random move {} will be performed instead ".format(randomMove, sys.exc_info(), randomMove))
-            
-    def evaluatePossibleMoves(self):        
-        stockfishEvaluations = []
-        simulatedTestData = pd.DataFrame(columns=["A8", "B8", "C8", "D8", "E8", "F8", "G8", "H8",
-                                          "A7", "B7", "C7", "D7", "E7", "F7", "G7", "H7",
-                                          "A6", "B6", "C6", "D6", "E6", "F6", "G6", "H6",
-                                          "A5", "B5", "C5", "D5", "E5", "F5", "G5", "H5",
-                                          "A4", "B4", "C4", "D4", "E4", "F4", "G4", "H4",
-                                          "A3", "B3", "C3", "D3", "E3", "F3", "G3", "H3",
-                                          "A2", "B2", "C2", "D2", "E2", "F2", "G2", "H2",
-                                          "A1", "B1", "C1", "D1", "E1", "F1", "G1", "H1",
-                                          "Active Player",
-                                          "White Kingside Castling Right", "White Queenside Castling Right", "Black Kingside Castling Right", "Black Queenside Castling Right",
-                                          "En passant Target",
-                                          "Halfmove Clock",
-                                          "Fullmove Number",
-                                          "Winning_Probability"])
-        
-        possibleMoves = self.chess.getPossibleMoves()
-        result = pd.DataFrame(data=possibleMoves, columns=["Moves"])
+    def evaluateCandidatesWithStockfish(self, possibleMoves, board):
+        # Engine scores of the position reached by each candidate move, from White's point of view, or None once the search is cancelled (see BotWorker)
+        if self.isRootAnalysed:
+            rootChessStateEncoder = ChessStateEncoder(board=board, isPrintedOutput=False, enginePool=self.enginePool, evaluationCache=self.evaluationCache)
+            return rootChessStateEncoder.evaluateMovesWithStockfish(moves=possibleMoves, timeBudget=self.engineTimeBudget, cancelEvent=self.cancelEvent)
         
+        simulatedBoards = []
         for move in possibleMoves:
-            # Simulate a move
-            self.chess.makeAMove(moveToString=move)
+            simulatedBoard = board.copy()
+            simulatedBoard.push_uci(move)
+            simulatedBoards.append(simulatedBoard)
             
-            simulatedChessStateEncoder = ChessStateEncoder(board=self.chess.board, isPrintedOutput=False)
-                
-            simulatedTestData.loc[len(simulatedTestData)] = simulatedChessStateEncoder.createDataRecord()
+        if self.evaluator is not None:
+            return self.evaluator.evaluateBoards(simulatedBoards, cancelEvent=self.cancelEvent)
+        
+        scores = []
+        for simulatedBoard in simulatedBoards:
+            score = ChessStateEncoder(board=simulatedBoard, isPrintedOutput=False, enginePool=self.enginePool, evaluationCache=self.evaluationCache).evaluateWithStockfish(cancelEvent=self.cancelEvent)
+            if score is None:
+                return None
+            scores.append(score)
             
-            simulatedScore = simulatedChessStateEncoder.evaluateWithStockfish() * self.playerIndex
-            stockfishEvaluations.append(simulatedScore)
-                
-            # Undo it, prepare for simulating the next move
-            self.chess.unmakeAMove()
+        return scores
             
-        # Store the evaluations of Stockfish
-        stockfishEvaluations = pd.DataFrame(data=stockfishEvaluations, columns=["Stockfish_Evaluation"])
-        result["Stockfish_Evaluation"] = stockfishEvaluations["Stockfish_Evaluation"]
+    def evaluateCandidates(self, possibleMoves, board):
+        # Engine scores of the candidates; the engine is only asked for the candidate positions which have not been scored on an earlier move
+        candidateKeys = []
+        for move in possibleMoves:
+            board.push_uci(move)
+            candidateKeys.append(TranspositionTable.keyOf(board))
+            board.pop()
+        
+        entries = [self.transpositionTable.probe(key) for key in candidateKeys]
+        if all(entry is not None for entry in entries):
+            return [entry[1] for entry in entries]
+        
+        if self.isCancelled():
+            return None
+        
+        # The multi-PV root analysis shares its time budget between all the candidates, so it is given every move;
+        # the other paths score each position on its own, so only the missing ones are sent to the engine
+        if self.isRootAnalysed:
+            missingIndices = list(range(0, len(possibleMoves)))
+        else:
+            missingIndices = [i for i in range(0, len(possibleMoves)) if entries[i] is None]
+        
+        # The scores of a cancelled search are incomplete: none of them is stored
+        missingScores = self.evaluateCandidatesWithStockfish([possibleMoves[i] for i in missingIndices], board)
+        if missingScores is None:
+            return None
+        
+        scores = [entry[1] if entry is not None else None for entry in entries]
+        for i, score in zip(missingIndices, missingScores):
+            scores[i] = score
+            self.transpositionTable.store(candidateKeys[i], 0, score)
+            
+        return scores
             
+    def evaluatePossibleMoves(self, board=None):
+        # Best move in board (the game's board by default)
+        board = board if board is not None else self.chess.board
+        possibleMoves = [move.uci() for move in board.legal_moves]
+        numberOfMoves = len(possibleMoves)
+        
+        self.transpositionTable.newSearch()
+        
+        # Candidate matrix: the 72 encoded features of each simulated move, followed by its Stockfish evaluation (the 73rd column of the training data)
+        if self.candidateMatrix.shape[0] < numberOfMoves:
+            self.candidateMatrix = np.empty((numberOfMoves, ChessStateEncoder.NUMBER_OF_FEATURES + 1))
+        candidates = self.candidateMatrix[:numberOfMoves]
+        
+        ChessStateEncoder.encodeMoves(board, possibleMoves, out=candidates[:, :ChessStateEncoder.NUMBER_OF_FEATURES])
+        
+        # A cancelled search (e.g. the game was reset while the bot was thinking) chooses no move
+        scores = self.evaluateCandidates(possibleMoves, board)
+        if scores is None:
+            return None
+        candidates[:, -1] = scores
+        
+        stockfishEvaluations = candidates[:, -1] * self.playerIndex
+        
         # Scale the simulations data
-        simulatedTestData, simulatedTestDataMinColumnValues, simulatedTestDataMaxColumnValues = DataGenerator.minMaxScaling(data=simulatedTestData)
+        scaledCandidates, minColumnValues, maxColumnValues = DataGenerator.minMaxScalingArray(data=candidates)
         
         # Predict the state evaluation of each simulation
-        testScores = self.dnn.predict(X=simulatedTestData.iloc[:, :72].to_numpy().transpose())
-        testScores = pd.DataFrame(testScores, columns=["Winning_Probability"])
-        testScores["Winning_Probability"] *= self.playerIndex
+        testScores = self.model.predict(X=scaledCandidates[:, :ChessStateEncoder.NUMBER_OF_FEATURES]) * self.playerIndex
         
         # Scale Stockfish evaluations data
-        scaledStockfishEvaluations, _, _ = DataGenerator.minMaxScaling(data=stockfishEvaluations)
+        scaledStockfishEvaluations, _, _ = DataGenerator.minMaxScalingArray(data=stockfishEvaluations)
         
         # Sum of those scaled Data
-        combinedEvaluations = pd.DataFrame(testScores["Winning_Probability"] + scaledStockfishEvaluations["Stockfish_Evaluation"], columns=["Combined_Evaluation"])
+        combinedEvaluations = testScores + scaledStockfishEvaluations
         
-        # Descale simulations data
-        originalTestScores = DataGenerator.minMaxDescaling(scaledData=testScores, minColumnValues=simulatedTestDataMinColumnValues, maxColumnValues=simulatedTestDataMaxColumnValues)
+        bestMoveIndex = np.argmax(combinedEvaluations)
         
-        result["Stockfish_Evaluation"] = stockfishEvaluations["Stockfish_Evaluation"]
-        result["Winning_Probability"] = originalTestScores["Winning_Probability"]
-        result["Scaled_Stockfish_Evaluation"] = scaledStockfishEvaluations["Stockfish_Evaluation"]
-        result["Scaled_Winning_Probability"] = testScores["Winning_Probability"]
-        result["Scaled_Combined_Evaluation"] = combinedEvaluations["Combined_Evaluation"]
-        
-        print("\n============================================================================")
-        print("Possible moves and the corresponding Deep-Learning's evaluation")
-        print(result)
+        if self.isDebugged:
+            result = pd.DataFrame(data=possibleMoves, columns=["Moves"])
+            result["Stockfish_Evaluation"] = stockfishEvaluations
+            
+            # Descale simulations data
+            result["Winning_Probability"] = DataGenerator.minMaxDescalingArray(scaledData=testScores, minColumnValues=minColumnValues[-1], maxColumnValues=maxColumnValues[-1])
+            result["Scaled_Stockfish_Evaluation"] = scaledStockfishEvaluations
+            result["Scaled_Winning_Probability"] = testScores
+            result["Scaled_Combined_Evaluation"] = combinedEvaluations
+            
+            print("\n============================================================================")
+            print("Possible moves and the corresponding Deep-Learning's evaluation")
+            print(result)
             
-        return result.loc[result["Scaled_Combined_Evaluation"].idxmax(), "Moves"]
-            
\ No newline at end of file
+        return possibleMoves[bestMoveIndex]
@@ -0,0 +1,254 @@
+import math
+import time
+
+import chess
+import numpy as np
+
+from chessBots.bot import Bot
+from chessBots.searchBot import SearchBot
+from deepLearningAI.deepNeuralNetwork.neuralNetwork import NeuralNetwork
+from deepLearningAI.training.dataGenerating import ChessStateEncoder
+
+class MCTSNode():
+
+    # Only the statistics of the edges are kept, in one small array each, indexed like moves; the child nodes are created on their first visit.
+    # Values are from the point of view of the side to move in the node, in [-1, 1]
+    __slots__ = ("moves", "children", "visitCounts", "valueSums", "virtualLosses", "terminalValue")
+
+    def __init__(self, moves, terminalValue=None):
+        numberOfMoves = len(moves)
+
+        self.moves = moves
+        self.children = [None] * numberOfMoves
+        self.visitCounts = np.zeros(numberOfMoves, dtype=np.int32)
+        self.valueSums = np.zeros(numberOfMoves, dtype=np.float32)
+
+        # Visits of the edges by the leaves of the current batch which are not scored yet
+        self.virtualLosses = np.zeros(numberOfMoves, dtype=np.int32)
+
+        # Value of a finished game (mate, stalemate, draw), which is never scored by the network
+        self.terminalValue = terminalValue
+
+    def numberOfVisits(self):
+        return int(self.visitCounts.sum())
+
+    def childOf(self, move):
+        # Child node reached by move, or None when it has not been visited
+        for i, childMove in enumerate(self.moves):
+            if childMove == move:
+                return self.children[i]
+
+        return None
+
+class MCTSBot(Bot):
+
+    # Exploration constant of the PUCT selection
+    EXPLORATION = 1.5
+
+    # A leaf waiting for its score counts as this many lost visits, so that the other selections of the batch go elsewhere
+    VIRTUAL_LOSS = 1
+
+    def __init__(self, chess=None, playerIndex=1, modelFileName="ModelDataFile-'1_Simulations_Of_White_RandomBot_VS_Black_RandomBot'__HiddenLayersActivationFunction-'ReLU'__Epoches-'150'__MiniBatchGD-'64'.npz", thinkingTime=1., batchSize=32, maximumSimulations=None):
+        super().__init__(chess=chess)
+
+        # The search runs until thinkingTime seconds have passed (or maximumSimulations simulations, if given)
+        self.thinkingTime = thinkingTime
+        self.maximumSimulations = maximumSimulations
+
+        # Up to batchSize leaves are selected before they are scored together by one prediction
+        self.batchSize = batchSize
+
+        self.dnn = NeuralNetwork.load(modelFileName=modelFileName)
+        self.dnn.printNeuralNetwork()
+        self.model = self.dnn.freeze()
+
+        (self.featureMinimums, self.featureScales) = SearchBot.featureScalingOf(self.dnn)
+
+        # Features of the leaves of a batch, encoded into preallocated arrays
+        self.pieceMasks = np.empty((batchSize, 12), dtype=np.uint64)
+        self.additionalFeatures = np.empty((batchSize, 8), dtype=np.int64)
+        self.features = np.empty((batchSize, ChessStateEncoder.NUMBER_OF_FEATURES), dtype=np.float32)
+
+        self.playerIndex = playerIndex
+
+        # Tree of the last search, with the starting position and the moves played up to its root, so that the subtree of the position
+        # reached after the opponent's reply is searched further instead of from scratch
+        self.root = None
+        self.rootStartingFen = None
+        self.rootMoveStack = None
+
+        self.resetStatistics()
+
+    def __str__(self):
+        return "MCTS_with_({})".format(self.dnn.hiddenLayers[0].activationFunctionLayer)
+
+    def resetStatistics(self):
+        self.numberOfSimulations = 0
+        self.numberOfNodes = 0
+        self.numberOfEvaluations = 0
+        self.numberOfBatches = 0
+        self.numberOfCollisions = 0
+
+    # ===========================================================================================================================
+    # TREE
+    @staticmethod
+    def terminalValueOf(board, moves):
+        # Value of a finished game for the side to move, or None while the game goes on
+        if not moves:
+            return -1. if board.is_check() else 0.
+        if board.is_insufficient_material() or board.halfmove_clock >= 100 or board.is_repetition(2):
+            return 0.
+
+        return None
+
+    def reuseSubtree(self, board):
+        # Root of the tree for board: the node reached by the moves played since the last search, when they were explored.
+        # The tree is only reused for the game it was grown in: same starting position (boards set up from a FEN have no move stack), same moves so far
+        moveStack = board.move_stack
+        startingFen = board.root().fen()
+        node = None
+        if self.root is not None and startingFen == self.rootStartingFen and len(moveStack) >= len(self.rootMoveStack) and moveStack[:len(self.rootMoveStack)] == self.rootMoveStack:
+            node = self.root
+            for move in moveStack[len(self.rootMoveStack):]:
+                node = node.childOf(move)
+                if node is None:
+                    break
+
+        if node is None or node.terminalValue is not None:
+            moves = list(board.legal_moves)
+            node = MCTSNode(moves, MCTSBot.terminalValueOf(board, moves))
+
+        self.root = node
+        self.rootStartingFen = startingFen
+        self.rootMoveStack = list(moveStack)
+
+        return node
+
+    def selectEdge(self, node):
+        # PUCT with uniform priors: Q + c * sqrt(N) / (1 + n), counting the pending leaves as lost visits
+        visits = node.visitCounts + node.virtualLosses
+        values = node.valueSums - MCTSBot.VIRTUAL_LOSS * node.virtualLosses
+        qualities = np.divide(values, visits, out=np.zeros(len(visits), dtype=np.float32), where=visits > 0)
+        explorations = (MCTSBot.EXPLORATION * math.sqrt(int(visits.sum()) + 1)) / (1. + visits)
+
+        return int(np.argmax(qualities + explorations))
+
+    def backPropagate(self, path, value):
+        # value is from the point of view of the side to move at the end of path; each edge stores it from the point of view of
+        # the side which played it, and the virtual losses of the path are removed
+        for node, index in reversed(path):
+            value = -value
+            node.visitCounts[index] += 1
+            node.valueSums[index] += value
+            node.virtualLosses[index] -= 1
+
+        self.numberOfSimulations += 1
+
+    def gatherLeaves(self, board):
+        # Make up to batchSize selections from the root, each leaving a virtual loss on its path; the finished games are backed up at once.
+        # Returns the path, the new node and the side to move of every leaf to score, whose features are encoded at the same row
+        leaves = []
+        pendingEdges = set()
+
+        for selection in range(0, self.batchSize):
+            node = self.root
+            path = []
+            numberOfPushes = 0
+            while True:
+                index = self.selectEdge(node)
+                path.append((node, index))
+                node.virtualLosses[index] += 1
+                board.push(node.moves[index])
+                numberOfPushes += 1
+
+                child = node.children[index]
+                if child is None or child.terminalValue is not None:
+                    break
+                node = child
+
+            try:
+                if child is not None:
+                    # A finished game: its value is known
+                    self.backPropagate(path, child.terminalValue)
+                elif (id(node), index) in pendingEdges:
+                    # The selection reached a leaf of this batch again: the batch is scored as it is
+                    for pathNode, pathIndex in path:
+                        pathNode.virtualLosses[pathIndex] -= 1
+                    self.numberOfCollisions += 1
+                    break
+                else:
+                    moves = list(board.legal_moves)
+                    child = MCTSNode(moves, MCTSBot.terminalValueOf(board, moves))
+                    self.numberOfNodes += 1
+
+                    if child.terminalValue is not None:
+                        node.children[index] = child
+                        self.backPropagate(path, child.terminalValue)
+                    else:
+                        # The leaf is only attached to the tree once scored, so that no selection goes below it before
+                        pendingEdges.add((id(node), index))
+                        ChessStateEncoder.collectBoardFeatures(board, self.pieceMasks, self.additionalFeatures, len(leaves))
+                        leaves.append((path, child, board.turn))
+            finally:
+                for i in range(0, numberOfPushes):
+                    board.pop()
+
+            if self.numberOfSimulations >= self.simulationLimit:
+                break
+
+        return leaves
+
+    def evaluateLeaves(self, leaves):
+        # Score every leaf of the batch with one prediction, and back the scores up
+        numberOfLeaves = len(leaves)
+        features = ChessStateEncoder.encodeBitboards(self.pieceMasks[:numberOfLeaves], self.additionalFeatures[:numberOfLeaves], self.features[:numberOfLeaves])
+        features -= self.featureMinimums
+        features *= self.featureScales
+
+        # The network predicts White's winning chances in [0, 1]
+        evaluations = 2. * self.model.predict(X=features) - 1.
+
+        for (path, child, turn), evaluation in zip(leaves, evaluations.tolist()):
+            (node, index) = path[-1]
+            node.children[index] = child
+            self.backPropagate(path, evaluation if turn == chess.WHITE else -evaluation)
+
+        self.numberOfEvaluations += numberOfLeaves
+        self.numberOfBatches += 1
+
+    # ===========================================================================================================================
+    # SEARCH
+    def searchBestMove(self, board=None):
+        # Search board (a copy of the game's board by default) until the deadline, or until the search is cancelled
+        startTime = time.perf_counter()
+        deadline = startTime + self.thinkingTime
+        self.resetStatistics()
+        self.simulationLimit = self.maximumSimulations if self.maximumSimulations is not None else float("inf")
+
+        board = board if board is not None else self.chess.board.copy()
+        root = self.reuseSubtree(board)
+        if not root.moves:
+            return None
+
+        reusedVisits = root.numberOfVisits()
+        if len(root.moves) > 1:
+            while time.perf_counter() < deadline and self.numberOfSimulations < self.simulationLimit and not self.isCancelled():
+                leaves = self.gatherLeaves(board)
+                if leaves:
+                    self.evaluateLeaves(leaves)
+
+        # The most visited move is the most reliable
+        bestIndex = int(np.argmax(root.visitCounts))
+        bestMove = root.moves[bestIndex]
+
+        elapsedTime = time.perf_counter() - startTime
+        visits = int(root.visitCounts[bestIndex])
+        print("MCTS: {} simulations ({:.0f}/s), {} new nodes ({:.0f} nodes/s), {} visits reused, {} leaves scored in {} batches ({:.1f}% batch fill, {} collisions), best move {} with {} visits and value {}, {:.2f} s".format(
+            self.numberOfSimulations, self.numberOfSimulations / max(elapsedTime, 1e-9), self.numberOfNodes, self.numberOfNodes / max(elapsedTime, 1e-9),
+            reusedVisits, self.numberOfEvaluations, self.numberOfBatches, 100. * self.numberOfEvaluations / max(1, self.numberOfBatches * self.batchSize), self.numberOfCollisions,
+            bestMove.uci(), visits, round(float(root.valueSums[bestIndex]) / visits, 3) if visits > 0 else None, elapsedTime))
+
+        return bestMove.uci()
+
+    def chooseMove(self, board):
+        return self.bookMove(board) or self.searchBestMove(board=board)
@@ -0,0 +1,139 @@
+import os
+import glob
+import random
+
+import chess
+import chess.pgn
+import chess.polyglot
+import numpy as np
+
+class OpeningBook():
+
+    # Polyglot entry: Zobrist key of the position, move, weight and learn field, big-endian, 16 bytes; the entries are sorted by key,
+    # so that the moves of a position are found by binary search in the memory-mapped file
+    ENTRY = np.dtype([("key", ">u8"), ("move", ">u2"), ("weight", ">u2"), ("learn", ">u4")])
+
+    # Polyglot codes of the promotion pieces
+    PROMOTION_CODES = {None: 0, chess.KNIGHT: 1, chess.BISHOP: 2, chess.ROOK: 3, chess.QUEEN: 4}
+
+    BOOK_DIRECTORY = "./deepLearningAI/books"
+
+    def __init__(self, bookFileName="book.bin", maximumDepth=16, isWeighted=True, minimumWeight=1, seed=None):
+
+        # The book is memory-mapped by python-chess' Polyglot reader, which looks a position up by binary search on its Zobrist key:
+        # only the pages touched by the search are read, whatever the size of the book
+        self.bookFilePath = os.path.join(OpeningBook.BOOK_DIRECTORY, bookFileName)
+        self.reader = chess.polyglot.open_reader(self.bookFilePath)
+
+        # The book is only consulted for the first maximumDepth plies of the game
+        self.maximumDepth = maximumDepth
+
+        # Weighted: a move is chosen with a probability proportional to its weight; otherwise the move of highest weight is played
+        self.isWeighted = isWeighted
+        self.minimumWeight = minimumWeight
+        self.random = random.Random(seed)
+
+        self.numberOfLookups = 0
+        self.numberOfHits = 0
+
+    def __str__(self):
+        return "OpeningBook({}, {} entries, up to ply {})".format(self.bookFilePath, len(self.reader), self.maximumDepth)
+
+    def __len__(self):
+        return len(self.reader)
+
+    def chooseMove(self, board):
+        # Book move (uci) in board, or None when the position is out of the book or deeper than maximumDepth
+        if board.ply() >= self.maximumDepth:
+            return None
+
+        self.numberOfLookups += 1
+        entries = list(self.reader.find_all(board, minimum_weight=self.minimumWeight))
+        if not entries:
+            return None
+
+        self.numberOfHits += 1
+        if self.isWeighted:
+            entry = self.random.choices(entries, weights=[entry.weight for entry in entries])[0]
+        else:
+            entry = max(entries, key=lambda entry: entry.weight)
+
+        return entry.move.uci()
+
+    def close(self):
+        self.reader.close()
+
+    # ===========================================================================================================================
+    # BUILDING
+    @staticmethod
+    def encodeMove(board, move):
+        # Polyglot move: to file, to rank, from file, from rank (3 bits each), then the promotion piece;
+        # castling is encoded as the king taking its own rook (e.g. e1h1 for e1g1)
+        toSquare = move.to_square
+        if board.is_castling(move):
+            toSquare = chess.square(7 if board.is_kingside_castling(move) else 0, chess.square_rank(move.from_square))
+
+        return chess.square_file(toSquare) | (chess.square_rank(toSquare) << 3) | (chess.square_file(move.from_square) << 6) | (chess.square_rank(move.from_square) << 9) | (OpeningBook.PROMOTION_CODES[move.promotion] << 12)
+
+    @staticmethod
+    def build(pgnFilePaths=None, bookFileName="book.bin", maximumDepth=16):
+        # Compile the first maximumDepth plies of every game of the PGN files (by default, the games written by DataGenerator) into a Polyglot book.
+        # The weight of a move is 1 + 2 * the games won by the side which played it + the games drawn, so that every move played is in the book,
+        # and the moves which scored best are chosen most often
+        if pgnFilePaths is None:
+            pgnFilePaths = sorted(glob.glob("./deepLearningAI/data/*.pgn"))
+
+        print("\n=======================================================================================")
+        print("Building the opening book {} from {} PGN file(s), up to ply {}:".format(bookFileName, len(pgnFilePaths), maximumDepth))
+
+        weights = {}
+        numberOfGames = 0
+        for pgnFilePath in pgnFilePaths:
+            with open(pgnFilePath) as pgnFile:
+                while True:
+                    game = chess.pgn.read_game(pgnFile)
+                    if game is None:
+                        break
+
+                    numberOfGames += 1
+                    result = game.headers.get("Result", "*")
+                    board = game.board()
+                    for ply, move in enumerate(game.mainline_moves()):
+                        if ply >= maximumDepth:
+                            break
+
+                        if result == "1/2-1/2":
+                            score = 1
+                        elif result == ("1-0" if board.turn == chess.WHITE else "0-1"):
+                            score = 2
+                        else:
+                            score = 0
+
+                        entryKey = (chess.polyglot.zobrist_hash(board), OpeningBook.encodeMove(board, move))
+                        weights[entryKey] = weights.get(entryKey, 0) + 1 + score
+                        board.push(move)
+
+        entries = np.zeros(len(weights), dtype=OpeningBook.ENTRY)
+        if weights:
+            keysAndMoves = np.array(list(weights.keys()), dtype=np.uint64)
+            entryWeights = np.array(list(weights.values()), dtype=np.float64)
+
+            # Weights are 16-bit: larger ones are scaled down, keeping every move at least at 1
+            if entryWeights.max() > 0xFFFF:
+                entryWeights = np.maximum(1, np.floor(entryWeights * (0xFFFF / entryWeights.max())))
+
+            entries["key"] = keysAndMoves[:, 0]
+            entries["move"] = keysAndMoves[:, 1]
+            entries["weight"] = entryWeights
+
+            # Sorted by key, then by decreasing weight, as Polyglot readers expect
+            entries = entries[np.lexsort((-entryWeights, keysAndMoves[:, 0]))]
+
+        os.makedirs(OpeningBook.BOOK_DIRECTORY, exist_ok=True)
+        bookFilePath = os.path.join(OpeningBook.BOOK_DIRECTORY, bookFileName)
+        entries.tofile(bookFilePath + ".tmp")
+        os.replace(bookFilePath + ".tmp", bookFilePath)
+
+        print("     {} games, {} positions, {} entries ({:.1f} KB) written to {}".format(numberOfGames, len(np.unique(entries["key"])), len(entries), entries.nbytes / 1024, bookFilePath))
+
+        return bookFilePath
@@ -0,0 +1,157 @@
+import sys
+import time
+import threading
+
+import chess
+import numpy as np
+
+from chessBots.searchBot import SearchBot
+from chessBots.transpositionTable import TranspositionTable
+from deepLearningAI.training.dataGenerating import ChessStateEncoder
+
+class Ponderer():
+
+    def __init__(self, botWorker, numberOfReplies=4):
+
+        # While the player thinks, the bot chooses its answer to each of the player's numberOfReplies likeliest replies, on the thread of its BotWorker
+        # (so that pondering and the bot's own searches never use the bot at the same time, and nothing waits for them on the main thread);
+        # when the player plays one of them, the answer is played at once instead of being searched for after the click
+        self.botWorker = botWorker
+        self.bot = botWorker.bot
+        self.numberOfReplies = numberOfReplies
+
+        # Answers found for the current position, by key of the position after the reply: (move, seconds spent choosing it)
+        self.ponderedMoves = {}
+
+        # Position pondered (None when idle), reply being pondered, and the events of the pondering request: cancelled, finished
+        self.board = None
+        self.currentKey = None
+        self.cancelEvent = None
+        self.finishedEvent = None
+
+        # Set once the player has played the reply being pondered: the thread finishes that reply, then stops
+        self.isStoppingAfterCurrent = False
+        self.stopTime = None
+
+        self.resetStatistics()
+
+    def __str__(self):
+        return "Ponderer({}, {} replies)".format(self.bot, self.numberOfReplies)
+
+    def resetStatistics(self):
+        self.numberOfPlayerMoves = 0
+        self.numberOfHits = 0
+        
+        # Net seconds saved: the search time of the hits, less the time the player waited after their move, on hits and misses alike
+        self.savedTime = 0.
+        self.missWaitingTime = 0.
+
+    def isStarted(self):
+        return self.board is not None
+
+    def hitRate(self):
+        return self.numberOfHits / self.numberOfPlayerMoves if self.numberOfPlayerMoves > 0 else 0.
+
+    def waitingTime(self):
+        # Seconds since the player's move, while the reply being pondered is finished
+        return time.perf_counter() - self.stopTime if self.stopTime is not None else 0.
+
+    # ===========================================================================================================================
+    # PONDERING
+    def predictReplies(self, board):
+        # The player's likeliest replies: the moves the bot's network rates best for the player (in move generation order for a bot without network)
+        moves = list(board.legal_moves)
+        model = getattr(self.bot, "model", None)
+        if model is None or len(moves) <= 1:
+            return moves[:self.numberOfReplies]
+
+        featureMinimums, featureScales = SearchBot.featureScalingOf(self.bot.dnn)
+        features = ChessStateEncoder.encodeMoves(board, moves)
+        features -= featureMinimums
+        features *= featureScales
+
+        # The network predicts White's winning chances
+        evaluations = model.predict(X=features)
+        if board.turn == chess.BLACK:
+            evaluations = -evaluations
+
+        return [moves[index] for index in np.argsort(-evaluations, kind="stable")[:self.numberOfReplies]]
+
+    def start(self, board):
+        # Start pondering board, in which the player is to move; the pondering of the previous position, if still running, is cancelled
+        # and ends on the worker thread before this one starts
+        self.cancel()
+
+        self.board = board.copy()
+        self.ponderedMoves = {}
+        self.currentKey = None
+        self.isStoppingAfterCurrent = False
+        self.stopTime = None
+
+        self.cancelEvent = threading.Event()
+        self.finishedEvent = threading.Event()
+
+        (board, cancelEvent, finishedEvent) = (self.board.copy(), self.cancelEvent, self.finishedEvent)
+        self.botWorker.submit(lambda: self.ponder(board, cancelEvent, finishedEvent), cancelEvent)
+
+    def ponder(self, board, cancelEvent, finishedEvent):
+        try:
+            for reply in self.predictReplies(board):
+                if cancelEvent.is_set() or self.isStoppingAfterCurrent:
+                    break
+
+                board.push(reply)
+                self.currentKey = TranspositionTable.keyOf(board)
+                startTime = time.perf_counter()
+                move = self.bot.chooseMove(board.copy())
+
+                # The move of an interrupted search is not kept
+                if not cancelEvent.is_set():
+                    self.ponderedMoves[self.currentKey] = (move, time.perf_counter() - startTime)
+                board.pop()
+        except:
+            print("Bot {} failed to ponder: {}".format(self.bot, sys.exc_info()))
+        finally:
+            self.currentKey = None
+            finishedEvent.set()
+
+    def finish(self, board):
+        # Called on each frame once the player has moved: (False, None) while the reply being pondered is finished,
+        # then (True, the answer to the player's move, or None when it was not pondered)
+        if self.stopTime is None:
+            self.stopTime = time.perf_counter()
+            key = TranspositionTable.keyOf(board)
+            if key == self.currentKey and key not in self.ponderedMoves:
+                self.isStoppingAfterCurrent = True
+            else:
+                self.cancelEvent.set()
+
+        if not self.finishedEvent.is_set():
+            return False, None
+
+        (move, seconds) = self.ponderedMoves.get(TranspositionTable.keyOf(board), (None, 0.))
+        waitingTime = self.waitingTime()
+
+        self.numberOfPlayerMoves += 1
+        if move is not None:
+            self.numberOfHits += 1
+            self.savedTime += seconds - waitingTime
+            print("\nPonder hit: {} answered after {:.2f} s instead of {:.2f} s".format(move, waitingTime, seconds))
+        else:
+            # A miss costs the time the pondering took to stop, before the bot could start searching
+            self.savedTime -= waitingTime
+            self.missWaitingTime += waitingTime
+            print("\nPonder miss: the search starts after {:.2f} s".format(waitingTime))
+        print("Ponder: {} hits out of {} moves ({:.1f}%), {:.2f} s saved in total ({:.2f} s lost waiting on misses)".format(self.numberOfHits, self.numberOfPlayerMoves, 100. * self.hitRate(), self.savedTime, self.missWaitingTime))
+
+        self.board = None
+        self.stopTime = None
+
+        return True, move
+
+    def cancel(self):
+        # Stop pondering and forget the answers, e.g. when the game is reset; the pondering request ends on the worker thread, without being waited for
+        if self.cancelEvent is not None:
+            self.cancelEvent.set()
+        self.board = None
+        self.stopTime = None
@@ -13,10 +13,12 @@ class RandomBot(chessBots.bot.Bot):
     def __str__(self):
         return "RandomBot"
     
-    def perform(self):
-        randomMove = random.choice(self.chess.getPossibleMoves())
+    def chooseMove(self, board):
+        return random.choice(list(board.legal_moves)).uci()
+    
+    def playMove(self, move):
         try:
-            self.chess.makeAMove(moveToString=randomMove)
+            self.chess.makeAMove(moveToString=move)
         except:
-            print("Failed to perform random move {}: {} ".format(randomMove, sys.exc_info()))
+            print("Failed to perform random move {}: {} ".format(move, sys.exc_info()))
             
\ No newline at end of file
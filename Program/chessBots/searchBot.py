@@ -0,0 +1,356 @@
+import time
+
+import chess
+import numpy as np
+
+from chessBots.bot import Bot
+from chessBots.transpositionTable import TranspositionTable
+from deepLearningAI.deepNeuralNetwork.neuralNetwork import NeuralNetwork
+from deepLearningAI.training.dataGenerating import ChessStateEncoder
+
+class SearchTimeout(Exception):
+    # Raised inside the search once the deadline has passed (or the search is cancelled), to unwind it up to the root
+    pass
+
+class SearchBot(Bot):
+
+    # Scores are from the point of view of the side to move: the network's evaluation lies in [-1, 1], a mate in n plies is worth ±(MATE_SCORE - n)
+    MATE_SCORE = 100.
+    DRAW_SCORE = 0.
+
+    # Nominal range of each encoded feature (see ChessStateEncoder.initializeEncodedFenArray), used to scale the leaves
+    # when the model does not carry the scaling statistics of its training data:
+    # 64 signed piece codes, the active player, 4 castling rights, the en passant square, the halfmove clock and the fullmove number
+    NOMINAL_FEATURE_MINIMUMS = np.array([-6.] * 64 + [-1., 0., 0., 0., 0., -1., 0., 1.])
+    NOMINAL_FEATURE_MAXIMUMS = np.array([6.] * 64 + [1., 1., 1., 1., 1., 63., 100., 200.])
+
+    # Most valuable victim / least valuable attacker ordering of the captures
+    PIECE_VALUES = {chess.PAWN: 1, chess.KNIGHT: 3, chess.BISHOP: 3, chess.ROOK: 5, chess.QUEEN: 9, chess.KING: 0}
+
+    # The clock is only read every so many nodes
+    NODES_BETWEEN_DEADLINE_CHECKS = 64
+
+    def __init__(self, chess=None, playerIndex=1, modelFileName="ModelDataFile-'1_Simulations_Of_White_RandomBot_VS_Black_RandomBot'__HiddenLayersActivationFunction-'ReLU'__Epoches-'150'__MiniBatchGD-'64'.npz", thinkingTime=1., maximumDepth=32, maximumQuiescenceDepth=8, transpositionTable=None, transpositionTableSize=16, leafEvaluationsSize=16):
+        super().__init__(chess=chess)
+
+        # The search returns the best move found once thinkingTime seconds have passed (or once maximumDepth is completed)
+        self.thinkingTime = thinkingTime
+        self.maximumDepth = maximumDepth
+        self.maximumQuiescenceDepth = maximumQuiescenceDepth
+
+        self.dnn = NeuralNetwork.load(modelFileName=modelFileName)
+        self.dnn.printNeuralNetwork()
+
+        # Leaves are scored in batches through a frozen copy of the network
+        self.model = self.dnn.freeze()
+
+        (self.featureMinimums, self.featureScales) = SearchBot.featureScalingOf(self.dnn)
+
+        self.playerIndex = playerIndex
+
+        # Network evaluations of the positions already scored, from White's point of view, kept from move to move in a table of their own
+        # (stored at depth 0, so that each new evaluation replaces the one in its slot): its size is bounded by leafEvaluationsSize megabytes
+        self.leafEvaluations = TranspositionTable(sizeInMegabytes=leafEvaluationsSize)
+
+        # Scores, bounds and best moves of the positions already searched, kept from move to move (see TranspositionTable);
+        # the best move of a position is searched first by the next iterations
+        self.transpositionTable = transpositionTable if transpositionTable is not None else TranspositionTable(sizeInMegabytes=transpositionTableSize)
+
+        self.resetStatistics()
+
+    def __str__(self):
+        return "Search_with_({})".format(self.dnn.hiddenLayers[0].activationFunctionLayer)
+
+    @staticmethod
+    def featureScalingOf(dnn):
+        # (minimums, 1 / ranges) of the features, from the scaling statistics of the model's training data when it carries them
+        scaling = (dnn.metadata or {}).get("scaling")
+        if scaling is not None:
+            featureMinimums = np.array(scaling["min"][:ChessStateEncoder.NUMBER_OF_FEATURES])
+            featureMaximums = np.array(scaling["max"][:ChessStateEncoder.NUMBER_OF_FEATURES])
+        else:
+            featureMinimums = SearchBot.NOMINAL_FEATURE_MINIMUMS
+            featureMaximums = SearchBot.NOMINAL_FEATURE_MAXIMUMS
+        featureRanges = featureMaximums - featureMinimums
+
+        return featureMinimums.astype(np.float32), (1. / np.where(featureRanges == 0, 1, featureRanges)).astype(np.float32)
+
+    def resetStatistics(self):
+        self.numberOfNodes = 0
+        self.numberOfEvaluations = 0
+        self.numberOfBatches = 0
+        self.completedDepth = 0
+
+    # ===========================================================================================================================
+    # LEAF EVALUATION
+    def scoreLeaves(self, keys, features):
+        # Score the encoded positions with one prediction, and store their scores from White's point of view; the scores are returned too,
+        # since a position may already have been replaced in the table by another one of the batch
+        features -= self.featureMinimums
+        features *= self.featureScales
+
+        # The network predicts White's winning chances in [0, 1]
+        evaluations = (2. * self.model.predict(X=features) - 1.).tolist()
+
+        for key, evaluation in zip(keys, evaluations):
+            self.leafEvaluations.store(key, 0, evaluation)
+
+        self.numberOfEvaluations += len(keys)
+        self.numberOfBatches += 1
+
+        return evaluations
+
+    def evaluateChildren(self, board, moves):
+        # Scores of the positions reached by moves, from the point of view of the side to move in each of them;
+        # every position which has not been scored yet is scored by a single batched prediction
+        numberOfMoves = len(moves)
+        keys = [None] * numberOfMoves
+        evaluations = [None] * numberOfMoves
+        pieceMasks = np.empty((numberOfMoves, 12), dtype=np.uint64)
+        additionalFeatures = np.empty((numberOfMoves, 8), dtype=np.int64)
+        unscoredIndices = []
+
+        for i in range(0, numberOfMoves):
+            board.push(moves[i])
+            keys[i] = TranspositionTable.keyOf(board)
+            entry = self.leafEvaluations.probe(keys[i])
+            if entry is not None:
+                evaluations[i] = entry[1]
+            else:
+                ChessStateEncoder.collectBoardFeatures(board, pieceMasks, additionalFeatures, len(unscoredIndices))
+                unscoredIndices.append(i)
+            board.pop()
+
+        if unscoredIndices:
+            numberOfPositions = len(unscoredIndices)
+            features = ChessStateEncoder.encodeBitboards(pieceMasks[:numberOfPositions], additionalFeatures[:numberOfPositions], np.empty((numberOfPositions, ChessStateEncoder.NUMBER_OF_FEATURES), dtype=np.float32))
+            for index, evaluation in zip(unscoredIndices, self.scoreLeaves([keys[index] for index in unscoredIndices], features)):
+                evaluations[index] = evaluation
+
+        # After a move of White, Black is to move in the child, and the other way round
+        sign = -1. if board.turn == chess.WHITE else 1.
+
+        return [sign * evaluation for evaluation in evaluations]
+
+    def evaluate(self, board):
+        # Score of the board itself, from the point of view of its side to move
+        key = TranspositionTable.keyOf(board)
+        entry = self.leafEvaluations.probe(key)
+        evaluation = entry[1] if entry is not None else self.scoreLeaves([key], ChessStateEncoder.encodeBoards([board]))[0]
+
+        return evaluation if board.turn == chess.WHITE else -evaluation
+
+    # ===========================================================================================================================
+    # SEARCH
+    def checkDeadline(self):
+        self.numberOfNodes += 1
+        if self.numberOfNodes % SearchBot.NODES_BETWEEN_DEADLINE_CHECKS == 0 and (time.perf_counter() >= self.deadline or self.isCancelled()):
+            raise SearchTimeout()
+
+    def captureScore(self, board, move):
+        victim = board.piece_type_at(move.to_square) or chess.PAWN
+        attacker = board.piece_type_at(move.from_square)
+
+        return 10 * SearchBot.PIECE_VALUES[victim] - SearchBot.PIECE_VALUES[attacker]
+
+    def orderMoves(self, board, moves, hashMove=None):
+        # The best move stored in the transposition table first, then the captures (most valuable victim first), then promotions, then the others
+        def key(move):
+            if move == hashMove:
+                return -1000
+            if board.is_capture(move):
+                return -100 - self.captureScore(board, move)
+            if move.promotion:
+                return -50
+
+            return 0
+
+        return sorted(moves, key=key)
+
+    def quiescence(self, board, alpha, beta, standPat, depth):
+        # Only captures (and promotions) are searched beyond the horizon, so that the leaves are quiet positions;
+        # standPat is the network's score of the board, which the side to move can keep by not capturing
+        self.checkDeadline()
+
+        if standPat >= beta:
+            return standPat
+        alpha = max(alpha, standPat)
+
+        if depth >= self.maximumQuiescenceDepth:
+            return standPat
+
+        moves = [move for move in board.generate_legal_captures()] + [move for move in board.generate_legal_moves() if move.promotion and not board.is_capture(move)]
+        if not moves:
+            return standPat
+
+        moves = self.orderMoves(board, moves)
+        childEvaluations = self.evaluateChildren(board, moves)
+
+        bestScore = standPat
+        for move, childEvaluation in zip(moves, childEvaluations):
+            board.push(move)
+            try:
+                score = -self.quiescence(board, -beta, -alpha, childEvaluation, depth + 1)
+            finally:
+                board.pop()
+
+            if score > bestScore:
+                bestScore = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        return bestScore
+
+    def negamax(self, board, depth, alpha, beta, ply, evaluation=None):
+        # Best score the side to move can reach from board, searching depth plies then the captures; evaluation is the board's
+        # own network score when the parent already computed it
+        self.checkDeadline()
+
+        if ply > 0 and (board.is_insufficient_material() or board.halfmove_clock >= 100 or board.is_repetition(2)):
+            return SearchBot.DRAW_SCORE
+
+        # A position already searched at least as deep gives its score, or narrows the window, without being searched again
+        key = TranspositionTable.keyOf(board)
+        entry = self.transpositionTable.probe(key)
+        hashMove = None
+        if entry is not None:
+            (entryDepth, entryScore, bound, hashMove) = entry
+            if entryDepth >= depth:
+                entryScore = SearchBot.scoreFromTable(entryScore, ply)
+                if bound == TranspositionTable.EXACT:
+                    return entryScore
+                if bound == TranspositionTable.LOWER_BOUND and entryScore >= beta:
+                    return entryScore
+                if bound == TranspositionTable.UPPER_BOUND and entryScore <= alpha:
+                    return entryScore
+
+        moves = list(board.legal_moves)
+        if not moves:
+            return -SearchBot.MATE_SCORE + ply if board.is_check() else SearchBot.DRAW_SCORE
+
+        if depth <= 0:
+            return self.quiescence(board, alpha, beta, evaluation if evaluation is not None else self.evaluate(board), 0)
+
+        moves = self.orderMoves(board, moves, hashMove)
+
+        # One level above the horizon, the positions of every child are scored together
+        childEvaluations = self.evaluateChildren(board, moves) if depth == 1 else [None] * len(moves)
+
+        originalAlpha = alpha
+        bestScore = -float("inf")
+        bestMove = None
+        for move, childEvaluation in zip(moves, childEvaluations):
+            board.push(move)
+            try:
+                score = -self.negamax(board, depth - 1, -beta, -alpha, ply + 1, childEvaluation)
+            finally:
+                board.pop()
+
+            if score > bestScore:
+                bestScore = score
+                bestMove = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if bestScore <= originalAlpha:
+            bound = TranspositionTable.UPPER_BOUND
+        elif bestScore >= beta:
+            bound = TranspositionTable.LOWER_BOUND
+        else:
+            bound = TranspositionTable.EXACT
+        self.transpositionTable.store(key, depth, SearchBot.scoreToTable(bestScore, ply), bound, bestMove)
+
+        return bestScore
+
+    @staticmethod
+    def scoreToTable(score, ply):
+        # Mate scores are stored as distances from the stored position, rather than from the root, so that they stay valid at any ply
+        if score > SearchBot.MATE_SCORE / 2:
+            return score + ply
+        if score < -SearchBot.MATE_SCORE / 2:
+            return score - ply
+
+        return score
+
+    @staticmethod
+    def scoreFromTable(score, ply):
+        if score > SearchBot.MATE_SCORE / 2:
+            return score - ply
+        if score < -SearchBot.MATE_SCORE / 2:
+            return score + ply
+
+        return score
+
+    def searchRoot(self, board, depth, rootMoves):
+        # Full-window search of every root move; returns the moves ordered from the best, with the best score.
+        # The root's best move so far is kept in self.bestMove, so that an interrupted iteration still contributes its findings
+        alpha = -float("inf")
+        scoredMoves = []
+        childEvaluations = self.evaluateChildren(board, rootMoves) if depth == 1 else [None] * len(rootMoves)
+
+        for move, childEvaluation in zip(rootMoves, childEvaluations):
+            board.push(move)
+            try:
+                score = -self.negamax(board, depth - 1, -float("inf"), -alpha, 1, childEvaluation)
+            finally:
+                board.pop()
+
+            scoredMoves.append((score, move))
+            if score > alpha:
+                alpha = score
+                self.bestMove = move
+                self.bestScore = score
+
+        scoredMoves.sort(key=lambda scoredMove: scoredMove[0], reverse=True)
+
+        return [move for score, move in scoredMoves], scoredMoves[0][0]
+
+    def searchBestMove(self, board=None):
+        # Iterative deepening in board (a copy of the game's board by default): depth 1, 2, ... until the deadline,
+        # each iteration starting from the best moves of the previous one
+        startTime = time.perf_counter()
+        self.deadline = startTime + self.thinkingTime
+        self.resetStatistics()
+
+        # Both tables are kept from move to move, in a fixed amount of memory (see TranspositionTable.store for the entries replaced)
+        self.leafEvaluations.newSearch()
+        self.transpositionTable.newSearch()
+        self.transpositionTable.resetStatistics()
+
+        board = board if board is not None else self.chess.board.copy()
+        rootKey = TranspositionTable.keyOf(board)
+        entry = self.transpositionTable.probe(rootKey)
+        rootMoves = self.orderMoves(board, list(board.legal_moves), entry[3] if entry is not None else None)
+        if not rootMoves:
+            return None
+
+        self.bestMove = rootMoves[0]
+        self.bestScore = None
+        if len(rootMoves) == 1:
+            return self.bestMove.uci()
+
+        try:
+            for depth in range(1, self.maximumDepth + 1):
+                rootMoves, bestScore = self.searchRoot(board, depth, rootMoves)
+                self.bestMove = rootMoves[0]
+                self.bestScore = bestScore
+                self.completedDepth = depth
+                self.transpositionTable.store(rootKey, depth, SearchBot.scoreToTable(bestScore, 0), TranspositionTable.EXACT, self.bestMove)
+
+                # A forced mate has been found: searching deeper cannot change the move
+                if abs(bestScore) >= SearchBot.MATE_SCORE - self.maximumDepth:
+                    break
+        except SearchTimeout:
+            pass
+
+        elapsedTime = time.perf_counter() - startTime
+        print("Search: depth {}, score {}, {} nodes ({:.0f} nodes/s), {} positions scored in {} batches, {:.1f}% table hits, {:.2f} s".format(self.completedDepth, self.bestScore, self.numberOfNodes, self.numberOfNodes / max(elapsedTime, 1e-9), self.numberOfEvaluations, self.numberOfBatches, 100. * self.transpositionTable.hitRate(), elapsedTime))
+
+        return self.bestMove.uci()
+
+    def chooseMove(self, board):
+        return self.bookMove(board) or self.searchBestMove(board=board)
@@ -0,0 +1,123 @@
+import chess
+import numpy as np
+
+class TranspositionTable():
+
+    # Bound types of the stored scores
+    EXACT = 0
+    LOWER_BOUND = 1
+    UPPER_BOUND = 2
+
+    # Depth of an empty slot
+    EMPTY = -1
+
+    # Bytes per entry: key (8), score (4), packed move (2), depth (1), bound (1), age (1)
+    ENTRY_SIZE = 17
+
+    def __init__(self, sizeInMegabytes=16):
+
+        # One entry per slot, in preallocated arrays; the number of slots is the largest power of two that fits in sizeInMegabytes,
+        # so that the slot of a key is simply its low bits
+        numberOfEntries = 1
+        while 2 * numberOfEntries * TranspositionTable.ENTRY_SIZE <= sizeInMegabytes * (1 << 20):
+            numberOfEntries *= 2
+        self.numberOfEntries = numberOfEntries
+        self.mask = numberOfEntries - 1
+
+        self.keys = np.zeros(numberOfEntries, dtype=np.uint64)
+        self.scores = np.zeros(numberOfEntries, dtype=np.float32)
+        self.moves = np.zeros(numberOfEntries, dtype=np.uint16)
+        self.depths = np.full(numberOfEntries, TranspositionTable.EMPTY, dtype=np.int8)
+        self.bounds = np.zeros(numberOfEntries, dtype=np.uint8)
+        self.ages = np.zeros(numberOfEntries, dtype=np.uint8)
+
+        # Incremented by each new search (i.e. each move of the game), so that the entries of earlier moves are replaced first
+        self.age = 0
+
+        self.resetStatistics()
+
+    def __str__(self):
+        return "TranspositionTable({} entries, {:.1f} MB)".format(self.numberOfEntries, self.numberOfEntries * TranspositionTable.ENTRY_SIZE / (1 << 20))
+
+    def __len__(self):
+        return int(np.count_nonzero(self.depths != TranspositionTable.EMPTY))
+
+    def resetStatistics(self):
+        self.numberOfProbes = 0
+        self.numberOfHits = 0
+        self.numberOfStores = 0
+        self.numberOfReplacements = 0
+
+    def clear(self):
+        self.depths.fill(TranspositionTable.EMPTY)
+        self.age = 0
+        self.resetStatistics()
+
+    def newSearch(self):
+        self.age = (self.age + 1) % 256
+
+    @staticmethod
+    def keyOf(board):
+        # 64-bit key of a position (pieces, side to move, castling rights and en passant square).
+        # chess.polyglot.zobrist_hash gives the Polyglot Zobrist key, but computes it from scratch in about 20 µs;
+        # hashing the board's transposition key takes about 1 µs and is as good a key for a table that lives in memory
+        return hash(board._transposition_key()) & 0xFFFFFFFFFFFFFFFF
+
+    @staticmethod
+    def packMove(move):
+        # From square (6 bits), to square (6 bits) and promotion piece type (3 bits) in 16 bits; 0 stands for no move
+        if move is None:
+            return 0
+
+        return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+    @staticmethod
+    def unpackMove(packedMove):
+        if packedMove == 0:
+            return None
+
+        return chess.Move(packedMove & 63, (packedMove >> 6) & 63, promotion=(packedMove >> 12) or None)
+
+    def probe(self, key):
+        # (depth, score, bound, move) stored for the key, or None
+        self.numberOfProbes += 1
+
+        index = key & self.mask
+        if int(self.depths[index]) == TranspositionTable.EMPTY or int(self.keys[index]) != key:
+            return None
+
+        self.numberOfHits += 1
+
+        return int(self.depths[index]), float(self.scores[index]), int(self.bounds[index]), TranspositionTable.unpackMove(int(self.moves[index]))
+
+    def store(self, key, depth, score, bound=EXACT, move=None):
+        # Depth-preferred replacement: an entry of the current search is only replaced by the same position, or by a search at least as deep;
+        # entries left by earlier searches are always replaced
+        index = key & self.mask
+        storedDepth = int(self.depths[index])
+        if storedDepth != TranspositionTable.EMPTY:
+            isSamePosition = int(self.keys[index]) == key
+            if not isSamePosition and int(self.ages[index]) == self.age and storedDepth > depth:
+                return False
+            if not isSamePosition:
+                self.numberOfReplacements += 1
+            elif move is None:
+                # A search that found no best move keeps the one found before
+                move = TranspositionTable.unpackMove(int(self.moves[index]))
+
+        self.keys[index] = key
+        self.depths[index] = max(0, min(127, depth))
+        self.scores[index] = score
+        self.bounds[index] = bound
+        self.moves[index] = TranspositionTable.packMove(move)
+        self.ages[index] = self.age
+
+        self.numberOfStores += 1
+
+        return True
+
+    def hitRate(self):
+        return self.numberOfHits / self.numberOfProbes if self.numberOfProbes > 0 else 0.
+
+    def printStatistics(self):
+        print("Transposition table: {} probes, {:.1f}% hits, {} stores, {} replacements, {:.1f}% full".format(self.numberOfProbes, 100. * self.hitRate(), self.numberOfStores, self.numberOfReplacements, 100. * len(self) / self.numberOfEntries))
@@ -0,0 +1,110 @@
+import threading
+
+import numpy as np
+
+class InferenceModel():
+
+    # Workspace buffers are kept per thread and per batch size; the oldest ones are dropped beyond this number
+    MAX_NUMBER_OF_BATCH_SIZES = 8
+
+    def __init__(self, weights, biases, activationFunctions, dtype=np.float32):
+
+        # A frozen copy of a trained network, for prediction only (see NeuralNetwork.freeze):
+        #   - no activation caches and no gradients
+        #   - the weights are stored transposed and contiguous, so that examples are taken row-major as (N, inputDimension)
+        #   - each layer is a single fused step: Z = X.W^T + b, then the activation applied in place on Z
+        self.dtype = np.dtype(dtype)
+
+        self.weights = [np.ascontiguousarray(np.transpose(W), dtype=self.dtype) for W in weights]
+        self.biases = [np.ascontiguousarray(np.reshape(b, (1, -1)), dtype=self.dtype) for b in biases]
+        self.activationFunctions = list(activationFunctions)
+
+        for activationFunction in self.activationFunctions:
+            if activationFunction not in InferenceModel.ACTIVATIONS:
+                raise ValueError("Activation function {} is not supported by InferenceModel".format(activationFunction))
+
+        self.inputDimension = self.weights[0].shape[0]
+        self.outputDimension = self.weights[-1].shape[1]
+
+        # The parameters are never written after freezing; the buffers are private to each thread, so one model can serve several games
+        for array in self.weights + self.biases:
+            array.setflags(write=False)
+
+        self.threadWorkspaces = threading.local()
+
+    def __str__(self):
+        dimensions = [self.inputDimension] + [W.shape[1] for W in self.weights]
+        return "InferenceModel({}, {}, {})".format(" -> ".join(str(dimension) for dimension in dimensions), "/".join(self.activationFunctions), self.dtype)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("threadWorkspaces")
+
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.threadWorkspaces = threading.local()
+
+    def workspace(self, numberOfExamples):
+        workspaces = getattr(self.threadWorkspaces, "buffers", None)
+        if workspaces is None:
+            workspaces = self.threadWorkspaces.buffers = {}
+
+        buffers = workspaces.get(numberOfExamples)
+        if buffers is None:
+            if len(workspaces) >= InferenceModel.MAX_NUMBER_OF_BATCH_SIZES:
+                workspaces.pop(next(iter(workspaces)))
+
+            buffers = [np.empty((numberOfExamples, W.shape[1]), dtype=self.dtype) for W in self.weights]
+            workspaces[numberOfExamples] = buffers
+
+        return buffers
+
+    def predict(self, X):
+        # X holds one example per row: (N, inputDimension), or a single example of shape (inputDimension,)
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        if X.shape[1] != self.inputDimension:
+            raise ValueError("InferenceModel expects {} features per example, got an array of shape {}".format(self.inputDimension, X.shape))
+
+        if X.dtype != self.dtype:
+            X = X.astype(self.dtype)
+
+        hidden = X
+        for W, b, activationFunction, Z in zip(self.weights, self.biases, self.activationFunctions, self.workspace(X.shape[0])):
+            np.dot(hidden, W, out=Z)
+            Z += b
+            InferenceModel.ACTIVATIONS[activationFunction](Z)
+            hidden = Z
+
+        # The scores are copied out of the workspace, so that they stay valid after the next prediction
+        return hidden.flatten()
+
+    @staticmethod
+    def reLU(Z):
+        np.maximum(Z, 0, out=Z)
+
+    @staticmethod
+    def sigmoid(Z):
+        np.negative(Z, out=Z)
+        with np.errstate(over="ignore"):
+            np.exp(Z, out=Z)
+        Z += 1
+        np.reciprocal(Z, out=Z)
+
+    @staticmethod
+    def gaussian(Z):
+        np.square(Z, out=Z)
+        Z *= -1. / 8.
+        np.exp(Z, out=Z)
+        Z *= 0.2
+
+    # Activation names as printed by the training layers (see layers.py)
+    ACTIVATIONS = {
+        "ReLU": reLU.__func__,
+        "Sigmoid": sigmoid.__func__,
+        "Gaussian": gaussian.__func__
+    }
@@ -1,21 +1,67 @@
 import numpy as np
 
+# ===============================================================================================================================
+# BASE CLASS FOR LAYERS WITH REUSABLE WORKSPACE BUFFERS
+class BufferedLayer():
+    
+    # Buffers are kept per (name, shape), so each batch size gets its own set; the oldest ones are dropped beyond this number
+    MAX_NUMBER_OF_WORKSPACE_BUFFERS = 32
+    
+    # Class-level default, so that layers unpickled from older models get their workspace lazily
+    workspaces = None
+    
+    def buffer(self, name, shape, dtype):
+        if self.workspaces is None:
+            self.workspaces = {}
+            
+        key = (name, shape)
+        buffer = self.workspaces.get(key)
+        if buffer is None or buffer.dtype != dtype:
+            if len(self.workspaces) >= BufferedLayer.MAX_NUMBER_OF_WORKSPACE_BUFFERS:
+                self.workspaces.pop(next(iter(self.workspaces)))
+                
+            buffer = np.empty(shape, dtype=dtype)
+            self.workspaces[key] = buffer
+            
+        return buffer
+    
+    def clearWorkspaces(self):
+        self.workspaces = None
+        self.cache = None
+    
+    def __getstate__(self):
+        # Neither the workspace buffers nor the activation caches are worth saving with a model
+        state = self.__dict__.copy()
+        state.pop("workspaces", None)
+        state["cache"] = None
+        
+        return state
+
 # ===============================================================================================================================
 # LINEAR LAYER CLASS
-class Linear():
+class Linear(BufferedLayer):
+    
+    # The input layer does not need the gradient with respect to its input (the examples), see NeuralNetwork
+    isInputGradientNeeded = True
     
-    def __init__(self, inputDimension, outputDimension, regularization=0.0, learningRate=3e-6):
+    def __init__(self, inputDimension, outputDimension, regularization=0.0, learningRate=3e-6, dtype=np.float32):
         
         # inputDimension means the number of units in the previous hidden layer, or the input size of the input layer (if that is the previous layer)
         # outputDimension also means the number of units in the current layer
         self.numberOfUnits = outputDimension
         
-        self.W = np.random.rand(outputDimension, inputDimension) - 0.5
-        self.b = np.random.rand(outputDimension, 1) - 0.5
+        # The compute dtype of the layer is the dtype of its parameters
+        self.W = (np.random.rand(outputDimension, inputDimension) - 0.5).astype(dtype)
+        self.b = (np.random.rand(outputDimension, 1) - 0.5).astype(dtype)
         
         self.cache = None
         
+        self.deltaW = None
+        self.deltab = None
+        
         self.regularization = regularization
+        
+        # Only used as the learning rate of the default optimizer (see NeuralNetwork); the updates themselves are done by the optimizers
         self.learingRate = learningRate
         
     def forward(self, A):
@@ -23,14 +69,19 @@ class Linear():
         # A is the output from the previous hidden layer with the shape of (<number of units in that previous layer>, <number of examples>)
         # A means X (matrix of examples) if the previous layer is the input layer
         
-        # Cache is stored for computing the backward pass efficiently
-        self.cache = (A, self.W, self.b)
+        if A.dtype != self.W.dtype:
+            A = A.astype(self.W.dtype)
+        
+        # Cache is stored for computing the backward pass efficiently (only the input is needed, W and b are attributes of the layer)
+        self.cache = A
         
         # Z is the result matrix after the linear transformation process, with the shape of (<number of units in the current layer>, <number of units in the previous hidden layer>)
         # The brief formula is Z = A * W + b
         
-        # Calculate simply using numpy matrix multiplication:
-        Z = np.dot(self.W, A) + self.b
+        # Calculate simply using numpy matrix multiplication, into the workspace buffer of this batch size:
+        Z = self.buffer("Z", (self.W.shape[0], A.shape[1]), self.W.dtype)
+        np.dot(self.W, A, out=Z)
+        Z += self.b
         
         # print("=========================Z - SIMPLE CALCULATING=========================")
         # print(Z)
@@ -85,7 +136,10 @@ class Linear():
         #   deltaZ = dL / dZ
         
         # Get the previous input
-        A = self.cache[0]
+        A = self.cache
+        
+        if deltaZ.dtype != self.W.dtype:
+            deltaZ = deltaZ.astype(self.W.dtype)
          
         # Get the number of examples 
         # m = A.shape[1]
@@ -98,20 +152,29 @@ class Linear():
         #       Also, in the forward process I have implemented: Z = A * W + b. That is why: dZ / dW = d(A * W + b) / dW = A
         #       Conclude: deltaW = deltaZ * A
 
-        deltaW = np.dot(deltaZ, A.transpose()) + self.regularization * self.W
+        deltaW = self.buffer("deltaW", self.W.shape, self.W.dtype)
+        regularizationW = self.buffer("regularizationW", self.W.shape, self.W.dtype)
+        np.dot(deltaZ, A.transpose(), out=deltaW)
+        np.multiply(self.W, self.regularization, out=regularizationW)
+        deltaW += regularizationW
         
         #   deltab is the gradient of the cost with respect to the biases b of the current linear layer (dZ / db)
         #       With a similar explanation presented above, I can state that dL / db = (dL / dZ) * (dZ / db) <=> deltab = deltaZ * (dZ / db)
         #       In the forward process I have implemented: Z = A * W + b. That is why: dZ / db = d(A * W + b) / db = 1
         #       Conclude: deltab = deltaZ
         
-        deltab = (np.sum(deltaZ, axis=1))
-        deltab = deltab.reshape((deltab.shape[0], 1))
-        deltab += (self.regularization * self.b)
+        deltab = self.buffer("deltab", self.b.shape, self.b.dtype)
+        regularizationb = self.buffer("regularizationb", self.b.shape, self.b.dtype)
+        np.sum(deltaZ, axis=1, keepdims=True, out=deltab)
+        np.multiply(self.b, self.regularization, out=regularizationb)
+        deltab += regularizationb
         
         #   dA is the gradient of the cost with respect to the input of the current linear layer (which is also the output of the previous layer)
         #       This is similar to what has happened when I caculating deltaW = dL / dA = (dL / dZ) * (dZ / dA) = deltaZ * [d(A * W + b) / dA] = deltaZ * W
-        deltaA = np.dot(self.W.transpose(), deltaZ)
+        deltaA = None
+        if self.isInputGradientNeeded:
+            deltaA = self.buffer("deltaA", A.shape, self.W.dtype)
+            np.dot(self.W.transpose(), deltaZ, out=deltaA)
         
         # It can be easily duduced that deltaZ, deltaW, deltab, and deltaA have the same shape as Z, W, b, and A respectively.
         # So we simply use the numpy.transpose effectively before multiplicating the matrices to make sure that all of those required output have the precise shape. 
@@ -128,19 +191,29 @@ class Linear():
         # print("Back deltaA: {}\n".format(deltaA.shape))
         #print("Back deltaA: {}\n".format(deltaA))
         
-        # print("Back W before updating: {}".format(self.W))
-        
-        # Update the weights and biases (Gradient descent)
-        self.W -= self.learingRate * deltaW
-        self.b -= self.learingRate * deltab
-        
-        # print("Back W after updating: {}".format(self.W))
+        # The weights and biases are not updated here: the gradients are kept, and applied by the optimizer of the network (see optimizers.py)
+        self.deltaW = deltaW
+        self.deltab = deltab
         
         return (deltaA, deltaW, deltab)
+    
+    def parameters(self):
+        # Pairs of (parameter, gradient of the last backward pass), updated in place by the optimizers
+        return [(self.W, self.deltaW), (self.b, self.deltab)]
+    
+    def __getstate__(self):
+        state = super().__getstate__()
+        state.pop("deltaW", None)
+        state.pop("deltab", None)
+        
+        return state
    
 # ===============================================================================================================================
 # ACTIVATION FUNCTION LAYER CLASS  
-class ActivationFunction():
+class ActivationFunction(BufferedLayer):
+    
+    # Activations are computed into workspace buffers, and the backward passes scale the incoming gradient in place:
+    # that gradient is a buffer of the next layer (or of the cost function) which is not used again afterwards
     
     def __init__(self): 
         self.cache = None
@@ -165,14 +238,15 @@ class ReLU(ActivationFunction):
         return "ReLU"
     
     def forward(self, A):
-
-        # Cache is stored for computing the backward pass efficiently
-        self.cache = A
         
         # ReLU activation function is stated: f(x) = max(0, x)
         
         # Calculate the output of this ReLU layer
-        Z = np.maximum(0, A)
+        Z = self.buffer("Z", A.shape, A.dtype)
+        np.maximum(A, 0, out=Z)
+        
+        # Cache is stored for computing the backward pass efficiently (the output is positive exactly where the input is)
+        self.cache = Z
         
         # print("===================================Z===================================")
         # print(Z)
@@ -183,8 +257,8 @@ class ReLU(ActivationFunction):
         
         # deltaZ is the gradient of the cost with respect to the output of this ReLU layer (dL / dZ)
         
-        # Get the previous input
-        A = self.cache
+        # Get the previous output
+        Z = self.cache
         
         # Given that g(x) is ReLU activation function, g'(x) means:
         #   If x < 0, g'(x) = 0
@@ -194,13 +268,14 @@ class ReLU(ActivationFunction):
         # deltaA is the gradient of the cost with respect to the input of this ReLU layer (dL / dA)
         # Using the chain rule, it is easy to see that: dL / dA = (dL / dZ) * (dZ / dA)
         #   Initially, calculate the gradient of the output with respect to this ReLU layer's input (dZ / dA) based on the g'(x) explanation above:
-        gradientZToA = (A > 0).astype(np.float32)
+        gradientZToA = self.buffer("gradientZToA", Z.shape, np.bool_)
+        np.greater(Z, 0, out=gradientZToA)
         
         # print("==========================GRADIENT OF Z TO A============================")     
         # print(gradientZToA)
         
         #   Then, calculate deltaA:
-        deltaA = deltaZ * gradientZToA
+        deltaA = np.multiply(deltaZ, gradientZToA, out=deltaZ)
         
         # print("===============================DELTA-A==================================")     
         # print(deltaA)
@@ -219,24 +294,33 @@ class Sigmoid(ActivationFunction):
         
     def forward(self, A):
         
-        # Cache is stored for computing the backward pass efficiently
-        self.cache = A
+        # Z = 1 / (1 + e^(-A)), computed step by step in the output buffer (e^(-A) overflowing to inf correctly gives 0)
+        Z = self.buffer("Z", A.shape, A.dtype)
+        np.negative(A, out=Z)
+        with np.errstate(over="ignore"):
+            np.exp(Z, out=Z)
+        Z += 1
+        np.reciprocal(Z, out=Z)
         
-        Z = 1 / (1 + np.exp(-A))
+        # Cache is stored for computing the backward pass efficiently (the output is enough, see below)
+        self.cache = Z
         
-        return np.array(Z)
+        return Z
     
     def backward(self, deltaZ):
         
-        # Get the previous input
-        A = self.cache
+        # Get the previous output
+        Z = self.cache
         
         # Calculate the gradient of the output with the respect to this Sigmoid layer's input (dZ / dA):
-        gradientZToA = np.exp(-A) / ((1 + np.exp(-A)) ** 2)
+        #   dZ / dA = e^(-A) / (1 + e^(-A))^2 = Z * (1 - Z), which needs no exponential at all
+        gradientZToA = self.buffer("gradientZToA", Z.shape, Z.dtype)
+        np.subtract(1, Z, out=gradientZToA)
+        gradientZToA *= Z
         
         # deltaA is the gradient of the cost with respect to the input of this Sigmoid layer (dL / dA)
         # Using the chain rule, it is easy to see that: dL / dA = (dL / dZ) * (dZ / dA) = deltaZ * gradientZToA
-        deltaA = deltaZ * gradientZToA
+        deltaA = np.multiply(deltaZ, gradientZToA, out=deltaZ)
         
         return deltaA
 
@@ -252,13 +336,17 @@ class Gaussian(ActivationFunction):
     
     def forward(self, A):
 
-        # Cache is stored for computing the backward pass efficiently
-        self.cache = A
-        
         # Gaussian activation function is stated: f(x) = (σ*sqrt(2pi))^(-1) * e^(-(x-μ)^2/2σ^2) ≈ 0.2 * e^(-x^2/8) (μ = 0, σ = 2)
         
-        # Calculate the output of this ReLU layer
-        Z = 0.2 * np.exp(-A**2 / 8.)
+        # Calculate the output of this Gaussian layer
+        Z = self.buffer("Z", A.shape, A.dtype)
+        np.square(A, out=Z)
+        Z *= -1. / 8.
+        np.exp(Z, out=Z)
+        Z *= 0.2
+        
+        # Cache is stored for computing the backward pass efficiently (both the input and the output are used)
+        self.cache = (A, Z)
         
         # print("===================================Z===================================")
         # print(Z)
@@ -267,15 +355,18 @@ class Gaussian(ActivationFunction):
     
     def backward(self, deltaZ):
         
-        # Get the previous input
-        A = self.cache
+        # Get the previous input and output
+        (A, Z) = self.cache
 
         # Calculate the gradient of the output with the respect to this Gaussian layer's input (dZ / dA):
-        gradientZToA = -0.05 * A * np.exp(-A**2 / 8.)
+        #   dZ / dA = -0.05 * A * e^(-A^2 / 8) = -0.25 * A * Z
+        gradientZToA = self.buffer("gradientZToA", Z.shape, Z.dtype)
+        np.multiply(A, Z, out=gradientZToA)
+        gradientZToA *= -0.25
         
         # deltaA is the gradient of the cost with respect to the input of this Gaussian layer (dL / dA)
         # Using the chain rule, it is easy to see that: dL / dA = (dL / dZ) * (dZ / dA) = deltaZ * gradientZToA
-        deltaA = deltaZ * gradientZToA
+        deltaA = np.multiply(deltaZ, gradientZToA, out=deltaZ)
         
         return deltaA
   
@@ -283,9 +374,9 @@ class Gaussian(ActivationFunction):
 # CLASS FOR LAYER THAT COMBINES LINEAR LAYER AND ACTIVATION-FUNCTION LAYER
 class StandardLayer():
     
-    def __init__(self, inputDimension, outputDimension, learningRate, regularization, activationFunction):
+    def __init__(self, inputDimension, outputDimension, learningRate, regularization, activationFunction, dtype=np.float32):
         
-        self.linearLayer = Linear(inputDimension=inputDimension, outputDimension=outputDimension, learningRate=learningRate, regularization=regularization)
+        self.linearLayer = Linear(inputDimension=inputDimension, outputDimension=outputDimension, learningRate=learningRate, regularization=regularization, dtype=dtype)
         
         self.activationFunctionLayer = None
         if (activationFunction == "ReLU"):
@@ -311,9 +402,16 @@ class StandardLayer():
         # deltaHidden is the gradient of the cost with the respect to the post-linear function output
         
         deltaHidden = self.activationFunctionLayer.backward(deltaZ)
-        (deltaA, deltaW, deltab) = self.linearLayer.backward(deltaZ)
+        (deltaA, deltaW, deltab) = self.linearLayer.backward(deltaHidden)
         
         return (deltaA, deltaW, deltab)
+    
+    def setComputeDtype(self, dtype):
+        self.linearLayer.W = self.linearLayer.W.astype(dtype)
+        self.linearLayer.b = self.linearLayer.b.astype(dtype)
+        
+        self.linearLayer.clearWorkspaces()
+        self.activationFunctionLayer.clearWorkspaces()
    
 # ===============================================================================================================================
 # CLASS TO COMPUTE THE COST USING BINARY CROSS ENTROPY 
@@ -0,0 +1,154 @@
+import numpy as np
+
+from deepLearningAI.deepNeuralNetwork.layers import BufferedLayer
+
+# ===============================================================================================================================
+# BASE CLASS OF THE COST FUNCTIONS
+class Loss(BufferedLayer):
+
+    # A loss taking logits is applied to the output of the final linear layer, and replaces the final Sigmoid in the backward pass
+    takesLogits = False
+
+    def __init__(self):
+        self.cache = None
+
+    def __str__(self):
+        return "Loss"
+
+    def forward(self, scores, labels):
+        # Mean cost of the batch; scores (or logits) have shape (1, m) and labels shape (m,)
+        raise NotImplementedError
+
+    def backward(self, labels):
+        # Gradient of the mean cost with respect to the scores (or logits) of the last forward pass
+        raise NotImplementedError
+
+    @staticmethod
+    def initializeLoss(lossName="BinaryCrossEntropy"):
+        if lossName == "BinaryCrossEntropy":
+            return SigmoidBinaryCrossEntropy()
+        elif lossName == "MeanSquaredError":
+            return MeanSquaredError()
+        elif lossName == "Huber":
+            return Huber()
+
+        raise ValueError("Unknown loss {}: expected BinaryCrossEntropy, MeanSquaredError or Huber".format(lossName))
+
+# ===============================================================================================================================
+# FUSED SIGMOID + BINARY CROSS ENTROPY, COMPUTED FROM THE LOGITS
+class SigmoidBinaryCrossEntropy(Loss):
+
+    takesLogits = True
+
+    def __str__(self):
+        return "BinaryCrossEntropy"
+
+    def forward(self, logits, labels):
+
+        # With a = sigmoid(z), the cross entropy -[y * log(a) + (1 - y) * log(1 - a)] can be rewritten from z only:
+        #   max(z, 0) - z * y + log(1 + e^(-|z|))
+        # which never takes the log of 0, however saturated the sigmoid is (the labels are scaled engine scores in [0, 1])
+        numberOfExamples = logits.shape[1]
+
+        expNegativeAbsLogits = self.buffer("expNegativeAbsLogits", logits.shape, logits.dtype)
+        np.abs(logits, out=expNegativeAbsLogits)
+        np.negative(expNegativeAbsLogits, out=expNegativeAbsLogits)
+        np.exp(expNegativeAbsLogits, out=expNegativeAbsLogits)
+
+        costs = self.buffer("costs", logits.shape, logits.dtype)
+        logitsTimesLabels = self.buffer("logitsTimesLabels", logits.shape, logits.dtype)
+        np.log1p(expNegativeAbsLogits, out=costs)
+        costs += np.maximum(logits, 0, out=logitsTimesLabels)
+        costs -= np.multiply(logits, labels, out=logitsTimesLabels)
+
+        # The sigmoid comes from the same exponential: 1 / (1 + e^(-|z|)) for z >= 0, and e^(-|z|) / (1 + e^(-|z|)) for z < 0
+        scores = self.buffer("scores", logits.shape, logits.dtype)
+        isNegative = self.buffer("isNegative", logits.shape, np.bool_)
+        np.add(expNegativeAbsLogits, 1, out=scores)
+        np.reciprocal(scores, out=scores)
+        np.less(logits, 0, out=isNegative)
+        np.multiply(scores, expNegativeAbsLogits, out=scores, where=isNegative)
+
+        self.cache = scores
+
+        return float(np.sum(costs)) / numberOfExamples
+
+    def scores(self):
+        # Sigmoid of the logits of the last forward pass
+        return self.cache
+
+    def backward(self, labels):
+
+        # The gradient of the mean cost with respect to each logit is simply (a - y) / m
+        scores = self.cache
+
+        deltaLogits = self.buffer("deltaLogits", scores.shape, scores.dtype)
+        np.subtract(scores, labels, out=deltaLogits)
+        deltaLogits *= 1. / scores.shape[1]
+
+        return deltaLogits
+
+# ===============================================================================================================================
+# MEAN SQUARED ERROR
+class MeanSquaredError(Loss):
+
+    def __str__(self):
+        return "MeanSquaredError"
+
+    def forward(self, scores, labels):
+
+        # J = (1 / m) * [(a_1 - y_1)^2 + (a_2 - y_2)^2 + ... + (a_m - y_m)^2]
+        errors = self.buffer("errors", scores.shape, scores.dtype)
+        np.subtract(scores, labels, out=errors)
+
+        self.cache = errors
+
+        return float(np.dot(errors[0], errors[0])) / scores.shape[1]
+
+    def backward(self, labels):
+
+        # J' = (2 / m) * (a_i - y_i)
+        errors = self.cache
+
+        deltaScores = self.buffer("deltaScores", errors.shape, errors.dtype)
+        np.multiply(errors, 2. / errors.shape[1], out=deltaScores)
+
+        return deltaScores
+
+# ===============================================================================================================================
+# HUBER LOSS: QUADRATIC FOR SMALL ERRORS, LINEAR FOR LARGE ONES
+class Huber(Loss):
+
+    def __init__(self, delta=0.1):
+        super().__init__()
+
+        # The scaled labels lie in [0, 1], so the quadratic zone has to be narrower than that range to make any difference
+        self.delta = delta
+
+    def __str__(self):
+        return "Huber"
+
+    def forward(self, scores, labels):
+
+        # J = (1 / m) * sum of: 0.5 * r^2 if |r| <= delta, delta * (|r| - 0.5 * delta) otherwise (r = a - y)
+        #   = (1 / m) * sum of: 0.5 * c^2 + delta * (|r| - |c|), with c = r clipped to [-delta, delta]
+        errors = self.buffer("errors", scores.shape, scores.dtype)
+        clippedErrors = self.buffer("clippedErrors", scores.shape, scores.dtype)
+        np.subtract(scores, labels, out=errors)
+        np.clip(errors, -self.delta, self.delta, out=clippedErrors)
+
+        self.cache = clippedErrors
+
+        linearPart = np.sum(np.abs(errors, out=errors)) - np.sum(np.abs(clippedErrors))
+
+        return (0.5 * float(np.dot(clippedErrors[0], clippedErrors[0])) + self.delta * float(linearPart)) / scores.shape[1]
+
+    def backward(self, labels):
+
+        # J' = (1 / m) * clip(a_i - y_i, -delta, delta)
+        clippedErrors = self.cache
+
+        deltaScores = self.buffer("deltaScores", clippedErrors.shape, clippedErrors.dtype)
+        np.multiply(clippedErrors, 1. / clippedErrors.shape[1], out=deltaScores)
+
+        return deltaScores
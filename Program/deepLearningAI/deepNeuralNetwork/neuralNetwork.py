@@ -1,17 +1,33 @@
+import os
+import json
 import pickle
 
 import numpy as np
 
-from deepLearningAI.deepNeuralNetwork.layers import StandardLayer, BinaryCrossEntropy
+from deepLearningAI.deepNeuralNetwork.layers import StandardLayer
+from deepLearningAI.deepNeuralNetwork.inferenceModel import InferenceModel
+from deepLearningAI.deepNeuralNetwork.losses import Loss
+from deepLearningAI.deepNeuralNetwork.optimizers import SGD, Optimizer
 
 class NeuralNetwork():
     
-    def __init__(self, inputDimension, hiddenDimensions=[], outputDimension=1, learningRate=3e-6, regularization=0.01, activationFunctions=[None]):
-        
-        np.set_printoptions(threshold=np.inf)
+    # Version of the weight file format written by save(); load() refuses files written by a newer version
+    FORMAT_VERSION = 1
+    
+    # Class-level default for the models pickled before the compute dtype was configurable (they are converted when loaded)
+    dtype = np.float64
+    optimizer = None
+    
+    # Free-form description of how the model was made (training configuration, scaling statistics), saved in the weight file
+    metadata = None
+    
+    def __init__(self, inputDimension, hiddenDimensions=[], outputDimension=1, learningRate=3e-6, regularization=0.01, activationFunctions=[None], dtype=np.float32, costFunction="BinaryCrossEntropy", optimizer=None):
         
         self.dimensions = [inputDimension] + hiddenDimensions
         
+        # Compute dtype of the parameters, the activations and the gradients
+        self.dtype = np.dtype(dtype)
+        
         if activationFunctions is None:
             activationFunctions = ["ReLU"] * (len(hiddenDimensions)) + ["Sigmoid"]
         elif len(activationFunctions) < len(hiddenDimensions):
@@ -20,17 +36,39 @@ class NeuralNetwork():
         # Initialize the hidden layers
         self.hiddenLayers = []
         for i in range(0, len(hiddenDimensions)):
-            self.hiddenLayers.append(StandardLayer(inputDimension=self.dimensions[i], outputDimension=self.dimensions[i + 1], learningRate=learningRate, regularization=regularization, activationFunction=activationFunctions[i]))
+            self.hiddenLayers.append(StandardLayer(inputDimension=self.dimensions[i], outputDimension=self.dimensions[i + 1], learningRate=learningRate, regularization=regularization, activationFunction=activationFunctions[i], dtype=self.dtype))
             
         # Initialize the final layer
-        self.finalLayer = StandardLayer(inputDimension=self.dimensions[-1], outputDimension=outputDimension, learningRate=learningRate, regularization=regularization, activationFunction=activationFunctions[-1])
+        self.finalLayer = StandardLayer(inputDimension=self.dimensions[-1], outputDimension=outputDimension, learningRate=learningRate, regularization=regularization, activationFunction=activationFunctions[-1], dtype=self.dtype)
+        
+        self.skipInputGradient()
+        
+        # Initialize the cost function (see losses.py; models pickled earlier keep the BinaryCrossEntropy of layers.py)
+        self.costFunction = Loss.initializeLoss(costFunction)
+        if self.costFunction.takesLogits and str(self.finalLayer.activationFunctionLayer) != "Sigmoid":
+            raise ValueError("The {} loss is computed from logits, and needs a Sigmoid output layer".format(self.costFunction))
+        
+        # The optimizer applies the gradients after each backward pass (see optimizers.py); plain SGD with learningRate by default
+        self.optimizer = optimizer if optimizer is not None else SGD(learningRate=learningRate)
+        
+        self.metadata = {}
+        
+    def __str__(self):
+        # One-line summary, e.g. "NeuralNetwork(72 -> 16 ReLU -> 1 Sigmoid, float32, BinaryCrossEntropy, Adam(...))"
+        architecture = " -> ".join(["{}".format(self.dimensions[0])] + ["{} {}".format(layer.linearLayer.numberOfUnits, layer.activationFunctionLayer) for layer in self.layers()])
         
-        # Initialize the cost function
-        self.costFunction = BinaryCrossEntropy()
+        return "NeuralNetwork({}, {}, {}, {})".format(architecture, self.dtype, self.costFunctionName(), self.optimizer)
         
-        self.printNeuralNetwork()
+    def costFunctionName(self):
+        # Models pickled before losses.py existed hold the BinaryCrossEntropy of layers.py, which has no name
+        return str(self.costFunction) if isinstance(self.costFunction, Loss) else "BinaryCrossEntropy"
+        
+    def printNeuralNetwork(self, isDetailed=False):
+        # Only the one-line summary by default; every weight and bias with isDetailed
+        if not isDetailed:
+            print(self)
+            return
         
-    def printNeuralNetwork(self):
         print("\n=======================================================================================")
         print("Neural network's components:")
         print(" - An Input layer, taken {} input features".format(self.dimensions[0]))
@@ -43,6 +81,37 @@ class NeuralNetwork():
         print("     Weights: {} \n{}".format(self.finalLayer.linearLayer.W.shape, self.finalLayer.linearLayer.W))
         print("     Biases: {} \n{}".format(self.finalLayer.linearLayer.b.shape, self.finalLayer.linearLayer.b))
       
+    def layers(self):
+        return self.hiddenLayers + [self.finalLayer]
+    
+    def parameters(self):
+        # (parameter, gradient) pairs of every layer, in a fixed order which the optimizer state follows
+        parameters = []
+        for layer in self.layers():
+            parameters += layer.linearLayer.parameters()
+            
+        return parameters
+    
+    def skipInputGradient(self):
+        # The gradient with respect to the examples themselves is never used, so the first layer does not compute it
+        for layer in self.layers():
+            layer.linearLayer.isInputGradientNeeded = True
+        self.layers()[0].linearLayer.isInputGradientNeeded = False
+    
+    def setComputeDtype(self, dtype):
+        self.dtype = np.dtype(dtype)
+        for layer in self.layers():
+            layer.setComputeDtype(self.dtype)
+            
+        self.skipInputGradient()
+      
+    def freeze(self, dtype=None):
+        # Prediction-only copy of the current weights, taking (N, inputDimension) examples (see InferenceModel)
+        return InferenceModel(weights=[layer.linearLayer.W for layer in self.layers()],
+                              biases=[layer.linearLayer.b for layer in self.layers()],
+                              activationFunctions=[str(layer.activationFunctionLayer) for layer in self.layers()],
+                              dtype=dtype if dtype is not None else self.dtype)
+      
     # def updateLearningRate(self, value):
     #     for layer in self.hiddenLayers:
     #         layer.linear.learningRate = value
@@ -71,7 +140,7 @@ class NeuralNetwork():
         
         return scores.flatten()
     
-    def forward(self, X, labels, training=True):
+    def forward(self, X, labels, training=True, isUpdated=True):
         
         # Forward pass through the hidden layers
         hidden = X
@@ -83,38 +152,134 @@ class NeuralNetwork():
             # print("     Shape: {}".format(hidden.shape))
             # print("     Values: {}".format(hidden))
                 
-        # scores is the output of the forward propagation (prediction values)
-        scores = self.finalLayer.forward(hidden)
+        # A loss taking logits is fused with the final Sigmoid: it gets the output of the final linear layer, and gives back the sigmoid scores
+        isFused = getattr(self.costFunction, "takesLogits", False)
+        
+        if isFused:
+            logits = self.finalLayer.linearLayer.forward(hidden)
+            cost = self.costFunction.forward(logits, labels)
+            scores = self.costFunction.scores()
+        else:
+            # scores is the output of the forward propagation (prediction values)
+            scores = self.finalLayer.forward(hidden)
+            
+            # Calculate the cost
+            cost = self.costFunction.forward(scores, labels)
         
         # print("\n========================================================================")
         # print("Scores")
         # print("     Shape: {}".format(scores.shape))
         # print("     Values: {}".format(scores))
         
-        # Calculate the cost
-        cost = self.costFunction.forward(scores=scores, labels=labels)
+        # (scores is a workspace buffer: it is only valid until the next forward pass)
         
         if training:
             # If the process is training, the we apply the backpropagation:
-            #   Calculate the gradient of the cost with respect to the scores
-            deltaAL = self.costFunction.backward(labels=labels)
+            #   Calculate the gradient of the cost with respect to the scores (or to the logits)
+            deltaAL = self.costFunction.backward(labels=labels).astype(self.dtype, copy=False)
             
             #   Backward pass to the final layer
-            (deltaAL, _, _) = self.finalLayer.backward(deltaAL)
+            if isFused:
+                (deltaAL, _, _) = self.finalLayer.linearLayer.backward(deltaAL)
+            else:
+                (deltaAL, _, _) = self.finalLayer.backward(deltaAL)
             
             #   Backward pass to the remaining layers
             for i in range(len(self.hiddenLayers) - 1, -1, -1):
                 (deltaAL, _, _) = self.hiddenLayers[i].backward(deltaAL)
             
+            #   Update the weights and biases; models pickled before the optimizers existed keep their plain SGD
+            #   (data-parallel replicas only compute the gradients, which are applied once they are summed, see DataParallelGroup)
+            if isUpdated:
+                if self.optimizer is None:
+                    self.optimizer = SGD(learningRate=self.finalLayer.linearLayer.learingRate)
+                self.optimizer.step(self.parameters())
+            
         return scores, cost
     
     @staticmethod
-    def save(model, modelFileName="model.pickle"):
-        with open("./deepLearningAI/models/{}".format(modelFileName), "wb") as file:
-            pickle.dump(model, file, protocol=pickle.HIGHEST_PROTOCOL)
+    def save(model, modelFileName="model.npz", metadata=None):
+        # Weight file: an uncompressed .npz archive (which np.load reads without pickle), holding
+        #   - "header": a JSON document with the format version, the architecture, the activation functions, the loss,
+        #     the optimizer's configuration and the metadata (training configuration, scaling statistics)
+        #   - "layers.<i>.W" and "layers.<i>.b": the parameters of each layer, the final one last
+        #   - "optimizer.<i>.<j>": the optimizer's state arrays (e.g. Adam's moving averages) of each parameter, so that training can be resumed
+        header = {
+            "formatVersion": NeuralNetwork.FORMAT_VERSION,
+            "dimensions": model.dimensions + [model.finalLayer.linearLayer.numberOfUnits],
+            "activationFunctions": [str(layer.activationFunctionLayer) for layer in model.layers()],
+            "costFunction": model.costFunctionName(),
+            "dtype": np.dtype(model.dtype).name,
+            "learningRate": model.finalLayer.linearLayer.learingRate,
+            "regularization": model.finalLayer.linearLayer.regularization,
+            "optimizer": model.optimizer.configuration() if model.optimizer is not None else None,
+            "optimizerStates": [len(states or []) for states in model.optimizer.states] if model.optimizer is not None else [],
+            "metadata": dict(model.metadata or {}, **(metadata or {}))
+        }
+        
+        arrays = {"header": np.array(json.dumps(header))}
+        for i, layer in enumerate(model.layers()):
+            arrays["layers.{}.W".format(i)] = layer.linearLayer.W
+            arrays["layers.{}.b".format(i)] = layer.linearLayer.b
+        if model.optimizer is not None:
+            for i, states in enumerate(model.optimizer.states):
+                for j, state in enumerate(states or []):
+                    arrays["optimizer.{}.{}".format(i, j)] = state
+        
+        # Written next to the previous file, then moved over it, so that an interrupted save never leaves a truncated model
+        filePath = "./deepLearningAI/models/{}".format(modelFileName)
+        with open(filePath + ".tmp", "wb") as file:
+            np.savez(file, **arrays)
+        os.replace(filePath + ".tmp", filePath)
 
     @staticmethod
-    def load(modelFileName="model.pickle"):
+    def load(modelFileName="model.npz", dtype=np.float32):
+        # Models saved before the .npz format are still pickles (see migrate)
+        if modelFileName.endswith(".pickle"):
+            return NeuralNetwork.loadPickle(modelFileName=modelFileName, dtype=dtype)
+        
+        with np.load("./deepLearningAI/models/{}".format(modelFileName), allow_pickle=False) as arrays:
+            header = json.loads(str(arrays["header"]))
+            if header["formatVersion"] > NeuralNetwork.FORMAT_VERSION:
+                raise ValueError("{} has the weight file format {}, this version only reads up to {}".format(modelFileName, header["formatVersion"], NeuralNetwork.FORMAT_VERSION))
+            
+            dimensions = header["dimensions"]
+            
+            optimizer = None
+            if header["optimizer"] is not None:
+                states = [[arrays["optimizer.{}.{}".format(i, j)].astype(dtype) for j in range(0, numberOfStates)] for i, numberOfStates in enumerate(header["optimizerStates"])]
+                optimizer = Optimizer.fromConfiguration(header["optimizer"], states=states)
+            
+            model = NeuralNetwork(inputDimension=dimensions[0], hiddenDimensions=dimensions[1:-1], outputDimension=dimensions[-1],
+                                  learningRate=header["learningRate"], regularization=header["regularization"],
+                                  activationFunctions=header["activationFunctions"], dtype=dtype, costFunction=header["costFunction"], optimizer=optimizer)
+            
+            # The random initial parameters are replaced by the saved ones, converted to the compute dtype
+            for i, layer in enumerate(model.layers()):
+                layer.linearLayer.W = arrays["layers.{}.W".format(i)].astype(model.dtype)
+                layer.linearLayer.b = arrays["layers.{}.b".format(i)].astype(model.dtype)
+            
+            model.metadata = header["metadata"]
+        
+        return model
+    
+    @staticmethod
+    def loadPickle(modelFileName="model.pickle", dtype=np.float32):
         with open("./deepLearningAI/models/{}".format(modelFileName), "rb") as file:
             model = pickle.load(file)
-        return model
\ No newline at end of file
+            
+        # Older models were trained in float64; they are converted to the requested compute dtype
+        model.setComputeDtype(dtype)
+        
+        return model
+    
+    @staticmethod
+    def migrate(modelFileName):
+        # Convert a pickled model to the .npz weight file format, next to it (the pickle is kept); returns the new file name.
+        # The weights are loaded in their original dtype, so that the conversion is exact
+        model = NeuralNetwork.loadPickle(modelFileName=modelFileName, dtype=np.float64)
+        
+        migratedModelFileName = modelFileName[:-len(".pickle")] + ".npz"
+        NeuralNetwork.save(model, modelFileName=migratedModelFileName, metadata={"migratedFrom": modelFileName})
+        
+        return migratedModelFileName
\ No newline at end of file
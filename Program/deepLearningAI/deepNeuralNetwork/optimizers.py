@@ -0,0 +1,284 @@
+import math
+
+import numpy as np
+
+# ===============================================================================================================================
+# LEARNING RATE SCHEDULES: FACTOR APPLIED TO THE BASE LEARNING RATE AT EACH STEP (ONE STEP = ONE BATCH)
+class LearningRateSchedule():
+
+    def __str__(self):
+        return "Constant"
+
+    def factor(self, step):
+        return 1.
+
+    def configuration(self):
+        # JSON-friendly description of the schedule, saved with the model (see NeuralNetwork.save)
+        configuration = {"name": type(self).__name__}
+        for key, value in vars(self).items():
+            configuration[key] = value.configuration() if isinstance(value, LearningRateSchedule) else value
+
+        return configuration
+
+    @staticmethod
+    def fromConfiguration(configuration):
+        configuration = dict(configuration)
+        scheduleClass = {scheduleClass.__name__: scheduleClass for scheduleClass in (LearningRateSchedule, StepDecay, CosineDecay, Warmup)}[configuration.pop("name")]
+
+        schedule = scheduleClass.__new__(scheduleClass)
+        for key, value in configuration.items():
+            setattr(schedule, key, LearningRateSchedule.fromConfiguration(value) if isinstance(value, dict) else value)
+
+        return schedule
+
+    @staticmethod
+    def initializeSchedule(scheduleName="Constant", totalSteps=1, warmupSteps=0):
+        if scheduleName == "Constant":
+            schedule = LearningRateSchedule()
+        elif scheduleName == "Step":
+            # Halve the learning rate 3 times over the run
+            schedule = StepDecay(stepSize=max(1, totalSteps // 4))
+        elif scheduleName == "Cosine":
+            schedule = CosineDecay(totalSteps=totalSteps)
+        else:
+            raise ValueError("Unknown learning rate schedule {}: expected Constant, Step or Cosine".format(scheduleName))
+
+        if warmupSteps > 0:
+            schedule = Warmup(warmupSteps=warmupSteps, schedule=schedule)
+
+        return schedule
+
+class StepDecay(LearningRateSchedule):
+
+    def __init__(self, stepSize, decayRate=0.5):
+        self.stepSize = stepSize
+        self.decayRate = decayRate
+
+    def __str__(self):
+        return "Step({}, {})".format(self.stepSize, self.decayRate)
+
+    def factor(self, step):
+        return self.decayRate ** (step // self.stepSize)
+
+class CosineDecay(LearningRateSchedule):
+
+    def __init__(self, totalSteps, minimumFactor=0.01):
+        self.totalSteps = max(1, totalSteps)
+        self.minimumFactor = minimumFactor
+
+    def __str__(self):
+        return "Cosine({})".format(self.totalSteps)
+
+    def factor(self, step):
+        progress = min(1., step / self.totalSteps)
+        return self.minimumFactor + (1. - self.minimumFactor) * 0.5 * (1. + math.cos(math.pi * progress))
+
+class Warmup(LearningRateSchedule):
+
+    def __init__(self, warmupSteps, schedule):
+        # Linear ramp from 0 to the base learning rate, then the wrapped schedule (counted from the end of the warmup)
+        self.warmupSteps = warmupSteps
+        self.schedule = schedule
+
+    def __str__(self):
+        return "Warmup({}, {})".format(self.warmupSteps, self.schedule)
+
+    def factor(self, step):
+        if step < self.warmupSteps:
+            return (step + 1) / self.warmupSteps
+
+        return self.schedule.factor(step - self.warmupSteps)
+
+# ===============================================================================================================================
+# BASE CLASS OF THE OPTIMIZERS
+class Optimizer():
+
+    def __init__(self, learningRate, schedule=None):
+
+        self.learningRate = learningRate
+        self.schedule = schedule if schedule is not None else LearningRateSchedule()
+
+        # Number of updates applied so far, which drives the schedule
+        self.numberOfSteps = 0
+
+        # Per-parameter state (e.g. moving averages), one list of arrays per parameter in the order given to step()
+        self.states = []
+
+        # Scratch buffer per parameter, so that updates do not allocate
+        self.scratches = []
+
+    def __str__(self):
+        return "{}(learningRate={}, schedule={})".format(type(self).__name__, self.learningRate, self.schedule)
+
+    def __getstate__(self):
+        # The per-parameter state is saved with the model, so that a training run can be resumed; the scratch buffers are not
+        state = self.__dict__.copy()
+        state["scratches"] = []
+
+        return state
+
+    def configuration(self):
+        # JSON-friendly description of the optimizer (hyperparameters, step count and schedule); the state arrays are saved apart
+        configuration = {"name": type(self).__name__, "schedule": self.schedule.configuration()}
+        for key, value in vars(self).items():
+            if isinstance(value, (bool, int, float, str)):
+                configuration[key] = value
+
+        return configuration
+
+    @staticmethod
+    def fromConfiguration(configuration, states=None):
+        configuration = dict(configuration)
+        optimizerClass = {optimizerClass.__name__: optimizerClass for optimizerClass in (SGD, Momentum, RMSProp, Adam)}[configuration.pop("name")]
+
+        optimizer = optimizerClass.__new__(optimizerClass)
+        optimizer.schedule = LearningRateSchedule.fromConfiguration(configuration.pop("schedule"))
+        for key, value in configuration.items():
+            setattr(optimizer, key, value)
+
+        optimizer.states = states if states is not None else []
+        optimizer.scratches = []
+
+        return optimizer
+
+    def currentLearningRate(self):
+        return self.learningRate * self.schedule.factor(self.numberOfSteps)
+
+    def stateOf(self, index, parameter, numberOfArrays):
+        # Zero-initialized state arrays of a parameter, allocated on first use
+        while len(self.states) <= index:
+            self.states.append(None)
+        while len(self.scratches) <= index:
+            self.scratches.append(None)
+
+        if self.states[index] is None or any(state.shape != parameter.shape or state.dtype != parameter.dtype for state in self.states[index]):
+            self.states[index] = [np.zeros_like(parameter) for i in range(0, numberOfArrays)]
+
+        if self.scratches[index] is None or self.scratches[index].shape != parameter.shape or self.scratches[index].dtype != parameter.dtype:
+            self.scratches[index] = np.empty_like(parameter)
+
+        return self.states[index], self.scratches[index]
+
+    def step(self, parameters):
+        # parameters: list of (parameter, gradient) pairs; every parameter is updated in place
+        learningRate = self.currentLearningRate()
+        self.numberOfSteps += 1
+
+        for index, (parameter, gradient) in enumerate(parameters):
+            self.update(index, parameter, gradient, learningRate)
+
+    def update(self, index, parameter, gradient, learningRate):
+        raise NotImplementedError
+
+    @staticmethod
+    def initializeOptimizer(optimizerName="Adam", learningRate=None, schedule=None):
+        # Without an explicit learning rate, each optimizer starts from a rate suited to the mean losses of losses.py
+        if optimizerName == "SGD":
+            return SGD(learningRate=learningRate if learningRate is not None else 0.1, schedule=schedule)
+        elif optimizerName == "Momentum":
+            return Momentum(learningRate=learningRate if learningRate is not None else 0.05, schedule=schedule)
+        elif optimizerName == "Nesterov":
+            return Momentum(learningRate=learningRate if learningRate is not None else 0.05, schedule=schedule, isNesterov=True)
+        elif optimizerName == "RMSProp":
+            return RMSProp(learningRate=learningRate if learningRate is not None else 1e-3, schedule=schedule)
+        elif optimizerName == "Adam":
+            return Adam(learningRate=learningRate if learningRate is not None else 1e-3, schedule=schedule)
+
+        raise ValueError("Unknown optimizer {}: expected SGD, Momentum, Nesterov, RMSProp or Adam".format(optimizerName))
+
+# ===============================================================================================================================
+# PLAIN (STOCHASTIC) GRADIENT DESCENT: θ = θ - α * g
+class SGD(Optimizer):
+
+    def update(self, index, parameter, gradient, learningRate):
+        states, scratch = self.stateOf(index, parameter, 0)
+
+        np.multiply(gradient, learningRate, out=scratch)
+        parameter -= scratch
+
+# ===============================================================================================================================
+# MOMENTUM: v = μ * v + g, then θ = θ - α * v (or θ = θ - α * (g + μ * v) with Nesterov's look-ahead)
+class Momentum(Optimizer):
+
+    def __init__(self, learningRate, schedule=None, momentum=0.9, isNesterov=False):
+        super().__init__(learningRate=learningRate, schedule=schedule)
+
+        self.momentum = momentum
+        self.isNesterov = isNesterov
+
+    def update(self, index, parameter, gradient, learningRate):
+        (velocity,), scratch = self.stateOf(index, parameter, 1)
+
+        velocity *= self.momentum
+        velocity += gradient
+
+        if self.isNesterov:
+            np.multiply(velocity, self.momentum, out=scratch)
+            scratch += gradient
+        else:
+            np.copyto(scratch, velocity)
+
+        scratch *= learningRate
+        parameter -= scratch
+
+# ===============================================================================================================================
+# RMSPROP: s = ρ * s + (1 - ρ) * g^2, then θ = θ - α * g / (sqrt(s) + ε)
+class RMSProp(Optimizer):
+
+    def __init__(self, learningRate, schedule=None, decay=0.9, epsilon=1e-8):
+        super().__init__(learningRate=learningRate, schedule=schedule)
+
+        self.decay = decay
+        self.epsilon = epsilon
+
+    def update(self, index, parameter, gradient, learningRate):
+        (meanSquare,), scratch = self.stateOf(index, parameter, 1)
+
+        np.square(gradient, out=scratch)
+        scratch *= 1. - self.decay
+        meanSquare *= self.decay
+        meanSquare += scratch
+
+        np.sqrt(meanSquare, out=scratch)
+        scratch += self.epsilon
+        np.divide(gradient, scratch, out=scratch)
+        scratch *= learningRate
+        parameter -= scratch
+
+# ===============================================================================================================================
+# ADAM: moving averages of the gradient (m) and of its square (v), both corrected for their zero initialization
+class Adam(Optimizer):
+
+    def __init__(self, learningRate, schedule=None, beta1=0.9, beta2=0.999, epsilon=1e-8):
+        super().__init__(learningRate=learningRate, schedule=schedule)
+
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+
+    def step(self, parameters):
+        # The bias corrections only depend on the step number, so they are folded into the learning rate and ε once per step:
+        #   θ = θ - α * m_hat / (sqrt(v_hat) + ε) = θ - [α * sqrt(1 - β2^t) / (1 - β1^t)] * m / (sqrt(v) + ε * sqrt(1 - β2^t))
+        t = self.numberOfSteps + 1
+        self.correction2 = math.sqrt(1. - self.beta2 ** t)
+        self.correction1 = 1. - self.beta1 ** t
+
+        super().step(parameters)
+
+    def update(self, index, parameter, gradient, learningRate):
+        (mean, meanSquare), scratch = self.stateOf(index, parameter, 2)
+
+        mean *= self.beta1
+        np.multiply(gradient, 1. - self.beta1, out=scratch)
+        mean += scratch
+
+        meanSquare *= self.beta2
+        np.square(gradient, out=scratch)
+        scratch *= 1. - self.beta2
+        meanSquare += scratch
+
+        np.sqrt(meanSquare, out=scratch)
+        scratch += self.epsilon * self.correction2
+        np.divide(mean, scratch, out=scratch)
+        scratch *= learningRate * self.correction2 / self.correction1
+        parameter -= scratch
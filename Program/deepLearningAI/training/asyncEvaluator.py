@@ -0,0 +1,187 @@
+import atexit
+import asyncio
+import concurrent.futures
+import weakref
+import threading
+
+import chess
+import chess.engine
+
+from deepLearningAI.training.enginePool import DEFAULT_ENGINE_PATH
+
+class AsyncEvaluator():
+
+    # Evaluators which have not been shut down, closed by the atexit hook below (weak references, as for EnginePool.livePools)
+    liveEvaluators = weakref.WeakSet()
+
+    def __init__(self, enginePath=DEFAULT_ENGINE_PATH, numberOfEngines=4, engineOptions=None, maxRequestsInFlight=None, limit=None, evaluationCache=None):
+
+        self.enginePath = enginePath
+        self.numberOfEngines = numberOfEngines
+        self.engineOptions = dict(engineOptions) if engineOptions else {}
+
+        # Bound on the number of positions being analysed at the same time; the remaining requests wait for a free slot
+        self.maxRequestsInFlight = maxRequestsInFlight if maxRequestsInFlight else numberOfEngines
+
+        # Default search limit, the same as ChessStateEncoder.evaluateWithStockfish
+        self.limit = limit if limit is not None else chess.engine.Limit(time=0.1)
+        
+        # Positions found in the cache are answered without taking an engine slot (see evaluateBatch)
+        self.evaluationCache = evaluationCache
+
+        self.engines = []
+        self.idleEngines = None
+        self.requestSlots = None
+
+        self.isShutdown = False
+
+        # The engines live on an event loop of their own, so that synchronous callers can submit batches from any thread
+        self.loop = asyncio.new_event_loop()
+        self.loopThread = threading.Thread(target=self.loop.run_forever, name="AsyncEvaluator", daemon=True)
+        self.loopThread.start()
+
+        self.runInLoop(self.startEngines())
+
+        AsyncEvaluator.liveEvaluators.add(self)
+
+    def __str__(self):
+        return "AsyncEvaluator({} x {})".format(self.numberOfEngines, self.enginePath)
+
+    def settings(self):
+        # Arguments from which another process starts an evaluator of its own, with the same engines and limit (see DataGenerator.initializeWorker)
+        return {"enginePath": self.enginePath, "numberOfEngines": self.numberOfEngines, "engineOptions": self.engineOptions, "maxRequestsInFlight": self.maxRequestsInFlight, "limit": self.limit}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exceptionType, exception, traceback):
+        self.shutdown()
+
+    def runInLoop(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    async def startEngine(self):
+        transport, engine = await chess.engine.popen_uci(self.enginePath)
+        if self.engineOptions:
+            await engine.configure(self.engineOptions)
+
+        self.engines.append(engine)
+
+        return engine
+
+    async def startEngines(self):
+        self.idleEngines = asyncio.Queue()
+        self.requestSlots = asyncio.Semaphore(self.maxRequestsInFlight)
+
+        engines = await asyncio.gather(*[self.startEngine() for i in range(0, self.numberOfEngines)])
+        for engine in engines:
+            self.idleEngines.put_nowait(engine)
+
+    async def restartEngine(self, engine):
+        print("Engine {} terminated unexpectedly; restarting it.".format(self.enginePath))
+
+        if engine in self.engines:
+            self.engines.remove(engine)
+
+        return await self.startEngine()
+
+    # A positive score <=> "White is likely winning"
+    # A negative socre <=> "Black is likely winning".
+    async def evaluate(self, board, limit=None):
+        limit = limit if limit is not None else self.limit
+
+        async with self.requestSlots:
+            engine = await self.idleEngines.get()
+            try:
+                try:
+                    result = await engine.analyse(board, limit)
+                except chess.engine.EngineTerminatedError:
+                    # Retry once on a fresh process
+                    engine = await self.restartEngine(engine)
+                    result = await engine.analyse(board, limit)
+            finally:
+                self.idleEngines.put_nowait(engine)
+
+        score = result['score'].white().score()
+
+        # Handling None value
+        if score is None:
+            score = 0
+
+        return score
+
+    def lookUpScores(self, boards, limit):
+        return [self.evaluationCache.get(board, limit) for board in boards]
+
+    def storeScores(self, boards, limit, scores):
+        for board, score in zip(boards, scores):
+            self.evaluationCache.put(board, limit, score)
+
+    async def evaluateBatch(self, boards, limit=None):
+        # Boards are copied so that callers may keep playing on them; gather returns the scores in input order
+        if self.evaluationCache is None:
+            return await asyncio.gather(*[self.evaluate(board.copy(), limit) for board in boards])
+
+        # The cache is looked up before the batch and filled after it, in a thread of the default executor:
+        # its (blocking) SQLite calls never hold up the event loop while other analyses are running
+        limit = limit if limit is not None else self.limit
+        loop = asyncio.get_running_loop()
+        boards = [board.copy() for board in boards]
+
+        scores = await loop.run_in_executor(None, self.lookUpScores, boards, limit)
+        missingIndices = [i for i in range(0, len(boards)) if scores[i] is None]
+        missingBoards = [boards[i] for i in missingIndices]
+
+        missingScores = await asyncio.gather(*[self.evaluate(board, limit) for board in missingBoards])
+        for i, score in zip(missingIndices, missingScores):
+            scores[i] = score
+
+        if missingBoards:
+            await loop.run_in_executor(None, self.storeScores, missingBoards, limit, missingScores)
+
+        return scores
+
+    def evaluateBoards(self, boards, limit=None, cancelEvent=None):
+        # Synchronous wrapper for the existing (blocking) callers. Setting cancelEvent (if given) cancels the analyses still running
+        # or waiting, and returns None instead of the scores
+        if not boards:
+            return []
+
+        if cancelEvent is None:
+            return self.runInLoop(self.evaluateBatch(boards, limit))
+
+        future = asyncio.run_coroutine_threadsafe(self.evaluateBatch(boards, limit), self.loop)
+        while True:
+            try:
+                return future.result(timeout=0.01)
+            except concurrent.futures.TimeoutError:
+                if cancelEvent.is_set():
+                    future.cancel()
+                    return None
+
+    async def closeEngines(self):
+        for engine in self.engines:
+            try:
+                await engine.quit()
+            except:
+                pass
+
+        self.engines = []
+
+    def shutdown(self):
+        if self.isShutdown:
+            return
+
+        self.isShutdown = True
+        AsyncEvaluator.liveEvaluators.discard(self)
+
+        self.runInLoop(self.closeEngines())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.loopThread.join()
+
+    @staticmethod
+    def shutdownAll():
+        for evaluator in list(AsyncEvaluator.liveEvaluators):
+            evaluator.shutdown()
+
+atexit.register(AsyncEvaluator.shutdownAll)
@@ -1,18 +1,45 @@
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import shutil
+import concurrent.futures
+
 import numpy as np
 import pandas as pd
 
 import chess
+import chess.pgn
 import chess.engine
 
 from chessManager.chess import Chess
 
 from chessBots.bot import Bot
+from deepLearningAI.training.enginePool import EnginePool
+from deepLearningAI.training.recordWriter import RecordWriter
+from deepLearningAI.training.asyncEvaluator import AsyncEvaluator
+from deepLearningAI.training.evaluationCache import EvaluationCache
 
 class ChessStateEncoder():
     
-    def __init__(self, board, isPrintedOutput=True):
+    # Number of encoded features: 64 squares, followed by the 8 additional features of initializeEncodedFenArray
+    NUMBER_OF_FEATURES = 72
+    
+    # Signed piece codes of the 12 bitboard planes used by the batch encoder (+ for White, - for Black), in the order of collectBoardFeatures
+    PIECE_PLANE_CODES = np.array([chess.PAWN, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN, chess.KING,
+                                  -chess.PAWN, -chess.KNIGHT, -chess.BISHOP, -chess.ROOK, -chess.QUEEN, -chess.KING], dtype=np.float32)
+    
+    def __init__(self, board, isPrintedOutput=True, enginePool=None, evaluationCache=None):
         self.board = board
         
+        # Engines are borrowed from a resident pool instead of being started for every evaluation
+        self.enginePool = enginePool
+        
+        # Evaluations already paid for (by any run sharing the cache file) are looked up before asking the engine
+        self.evaluationCache = evaluationCache
+        
         self.encodedFenArray = None
         
         self.isPrintedOutput = isPrintedOutput
@@ -72,21 +99,91 @@ class ChessStateEncoder():
     
     # A positive score <=> “White is likely winning” 
     # A negative socre <=> “Black is likely winning”.
-    def evaluateWithStockfish(self):
-        score = 0
-        with chess.engine.SimpleEngine.popen_uci('./deepLearningAI/training/stockfish/stockfish-windows-x86-64-avx2.exe') as sf:
-            result = sf.analyse(self.board, chess.engine.Limit(time=0.1))
-            score = result['score'].white().score()
-            
-            # Handling None value
-            if score is None:
-                score = 0
+    # None when cancelEvent (if given) is set before the engine has finished
+    def evaluateWithStockfish(self, cancelEvent=None):
+        limit = chess.engine.Limit(time=0.1)
+        
+        if self.evaluationCache is not None:
+            score = self.evaluationCache.get(self.board, limit)
+            if score is not None:
+                return score
+        
+        enginePool = self.enginePool if self.enginePool is not None else EnginePool.getDefaultPool()
+        
+        result = enginePool.analyse(self.board, limit, cancelEvent=cancelEvent)
+        if cancelEvent is not None and cancelEvent.is_set():
+            return None
+        
+        score = result['score'].white().score()
+        
+        # Handling None value
+        if score is None:
+            score = 0
+            
+        if self.evaluationCache is not None:
+            self.evaluationCache.put(self.board, limit, score)
                 
         return score
+    
+    # Score every candidate move of the current position with a single multi-PV search restricted to those moves,
+    # so that the whole timeBudget (in seconds) is shared by the candidates, however many there are.
+    # The scores are returned in the order of the moves, from White's point of view (the same as evaluateWithStockfish on each child),
+    # or None when cancelEvent (if given) is set before they are all known
+    def evaluateMovesWithStockfish(self, moves, timeBudget=0.5, cancelEvent=None):
+        rootMoves = [chess.Move.from_uci(move) if isinstance(move, str) else move for move in moves]
+        if not rootMoves:
+            return []
         
-    # Create Record of Encoded board's state and its Evaluation    
-    def createDataRecord(self):
-        score = self.evaluateWithStockfish()
+        # Each candidate position is cached under the root search's limit, so that only the candidates missing from the cache are analysed
+        limit = chess.engine.Limit(time=timeBudget)
+        
+        rootScores = {}
+        if self.evaluationCache is not None:
+            for move in rootMoves:
+                self.board.push(move)
+                score = self.evaluationCache.get(self.board, limit, creditedTime=timeBudget / len(rootMoves))
+                self.board.pop()
+                if score is not None:
+                    rootScores[move] = score
+        
+        missingMoves = [move for move in rootMoves if move not in rootScores]
+        if missingMoves:
+            enginePool = self.enginePool if self.enginePool is not None else EnginePool.getDefaultPool()
+            
+            results = enginePool.analyse(self.board, limit, cancelEvent=cancelEvent, multipv=len(missingMoves), root_moves=missingMoves)
+            
+            # The lines of an interrupted search are incomplete: they are neither used nor cached
+            if cancelEvent is not None and cancelEvent.is_set():
+                return None
+            
+            for result in results:
+                if result.get('pv') and 'score' in result:
+                    score = result['score'].white().score()
+                    rootScores[result['pv'][0]] = score if score is not None else 0
+        
+        for move in missingMoves:
+            if move not in rootScores:
+                # The engine may report fewer lines than requested (e.g. when a mate is found); such moves are scored on their own
+                if cancelEvent is not None and cancelEvent.is_set():
+                    return None
+                
+                self.board.push(move)
+                rootScores[move] = self.evaluateWithStockfish(cancelEvent=cancelEvent)
+                self.board.pop()
+                if rootScores[move] is None:
+                    return None
+                
+            if self.evaluationCache is not None:
+                self.board.push(move)
+                self.evaluationCache.put(self.board, limit, rootScores[move])
+                self.board.pop()
+            
+        return [rootScores[move] for move in rootMoves]
+        
+    # Create Record of Encoded board's state and its Evaluation (an already known score skips the engine call)
+    def createDataRecord(self, score=None):
+        if score is None:
+            score = self.evaluateWithStockfish()
             
         record =  np.concatenate((self.initializeEncodedFenArray(), np.array([score])))     
         
@@ -116,48 +213,168 @@ class ChessStateEncoder():
             
             print(" => Encoded FEN Array: {} ({} elements)".format(self.encodedFenArray, len(self.encodedFenArray)))
 
+    @staticmethod
+    def collectBoardFeatures(board, pieceMasks, additionalFeatures, index):
+        # Store the 12 piece bitboards and the 8 additional features of a board into row index of the batch buffers
+        whitePieces = board.occupied_co[chess.WHITE]
+        blackPieces = board.occupied_co[chess.BLACK]
+        
+        pieceMasks[index] = (board.pawns & whitePieces, board.knights & whitePieces, board.bishops & whitePieces, board.rooks & whitePieces, board.queens & whitePieces, board.kings & whitePieces,
+                             board.pawns & blackPieces, board.knights & blackPieces, board.bishops & blackPieces, board.rooks & blackPieces, board.queens & blackPieces, board.kings & blackPieces)
+        
+        # Same encodings as initializeEncodedFenArray
+        additionalFeatures[index] = (1 if board.turn == chess.WHITE else -1,
+                                     1 if board.has_kingside_castling_rights(chess.WHITE) else 0,
+                                     1 if board.has_queenside_castling_rights(chess.WHITE) else 0,
+                                     1 if board.has_kingside_castling_rights(chess.BLACK) else 0,
+                                     1 if board.has_queenside_castling_rights(chess.BLACK) else 0,
+                                     board.ep_square if board.ep_square else -1,
+                                     board.halfmove_clock,
+                                     board.fullmove_number)
+        
+    @staticmethod
+    def encodeBitboards(pieceMasks, additionalFeatures, out):
+        # Bit i of a bitboard is square i, which is also feature i of initializeEncodedFenArray (A1, B1, ..., H8)
+        # Viewing the masks as little-endian bytes and unpacking them gives the (N, 12, 64) occupancy planes
+        planes = np.unpackbits(pieceMasks.astype("<u8").view(np.uint8).reshape(-1, 12, 8), axis=2, bitorder="little")
+        
+        # Each square holds at most one piece, so weighting the planes by their piece codes gives the signed board vector
+        out[:, :64] = np.matmul(ChessStateEncoder.PIECE_PLANE_CODES, planes.astype(np.float32))
+        
+        if np.issubdtype(out.dtype, np.integer):
+            # e.g. the fullmove number does not always fit into int8
+            typeInformation = np.iinfo(out.dtype)
+            additionalFeatures = np.clip(additionalFeatures, typeInformation.min, typeInformation.max)
+        out[:, 64:] = additionalFeatures
+        
+        return out
+    
+    @staticmethod
+    def encodeBoards(boards, out=None, dtype=np.float32):
+        # Batch version of initializeEncodedFenArray: writes the features of every board into the rows of a (N, 72) array
+        if out is None:
+            out = np.empty((len(boards), ChessStateEncoder.NUMBER_OF_FEATURES), dtype=dtype)
+        
+        pieceMasks = np.empty((len(boards), 12), dtype=np.uint64)
+        additionalFeatures = np.empty((len(boards), 8), dtype=np.int64)
+        for i in range(0, len(boards)):
+            ChessStateEncoder.collectBoardFeatures(boards[i], pieceMasks, additionalFeatures, i)
+            
+        return ChessStateEncoder.encodeBitboards(pieceMasks, additionalFeatures, out[:len(boards)])
+    
+    @staticmethod
+    def encodeMoves(board, moves, out=None, dtype=np.float32):
+        # Encode the position reached after each candidate move (UCI strings or chess.Move) of the board, without copying the board
+        if out is None:
+            out = np.empty((len(moves), ChessStateEncoder.NUMBER_OF_FEATURES), dtype=dtype)
+            
+        pieceMasks = np.empty((len(moves), 12), dtype=np.uint64)
+        additionalFeatures = np.empty((len(moves), 8), dtype=np.int64)
+        for i in range(0, len(moves)):
+            board.push(chess.Move.from_uci(moves[i]) if isinstance(moves[i], str) else moves[i])
+            ChessStateEncoder.collectBoardFeatures(board, pieceMasks, additionalFeatures, i)
+            board.pop()
+            
+        return ChessStateEncoder.encodeBitboards(pieceMasks, additionalFeatures, out[:len(moves)])
+
 class DataGenerator():
     
-    def __init__(self, whiteBot="Random", blackBot="Random", numberOfSimulations=1):
+    COLUMNS = ["A8", "B8", "C8", "D8", "E8", "F8", "G8", "H8",
+               "A7", "B7", "C7", "D7", "E7", "F7", "G7", "H7",
+               "A6", "B6", "C6", "D6", "E6", "F6", "G6", "H6",
+               "A5", "B5", "C5", "D5", "E5", "F5", "G5", "H5",
+               "A4", "B4", "C4", "D4", "E4", "F4", "G4", "H4",
+               "A3", "B3", "C3", "D3", "E3", "F3", "G3", "H3",
+               "A2", "B2", "C2", "D2", "E2", "F2", "G2", "H2",
+               "A1", "B1", "C1", "D1", "E1", "F1", "G1", "H1",
+               "Active Player",
+               "White Kingside Castling Right", "White Queenside Castling Right", "Black Kingside Castling Right", "Black Queenside Castling Right",
+               "En passant Target",
+               "Halfmove Clock",
+               "Fullmove Number",
+               "Who is winning"]
+    
+    # The generator owned by a self-play worker process (see generateInParallel)
+    workerGenerator = None
+    
+    def __init__(self, whiteBot="Random", blackBot="Random", numberOfSimulations=1, enginePool=None, evaluator=None, evaluationCache=None, numberOfWorkers=1, seed=None, isPrintedOutput=True, isResumed=False):
         
         self.chess = Chess()
         
-        self.whiteBot = Bot.initializeBot(chess=self.chess, botName=whiteBot, playerIndex=1)
-        self.blackBot = Bot.initializeBot(chess=self.chess, botName=blackBot, playerIndex=-1)
+        # Both bots and the encoder share the same resident engines (parallel workers start engines of their own)
+        self.enginePool = enginePool if enginePool is not None or numberOfWorkers > 1 else EnginePool.getDefaultPool()
+        
+        # With an AsyncEvaluator, the positions of a game are labelled together once the game is over, spread over several engines
+        self.evaluator = evaluator
+        
+        self.evaluationCache = evaluationCache
+        
+        self.whiteBotName = whiteBot
+        self.blackBotName = blackBot
+        
+        self.whiteBot = Bot.initializeBot(chess=self.chess, botName=whiteBot, playerIndex=1, enginePool=self.enginePool, evaluator=self.evaluator, evaluationCache=self.evaluationCache)
+        self.blackBot = Bot.initializeBot(chess=self.chess, botName=blackBot, playerIndex=-1, enginePool=self.enginePool, evaluator=self.evaluator, evaluationCache=self.evaluationCache)
         
         self.turn = "White"
         
-        self.chessStateEncoder = ChessStateEncoder(board=self.chess.board, isPrintedOutput=True)
-        
-        self.data = pd.DataFrame(columns=["A8", "B8", "C8", "D8", "E8", "F8", "G8", "H8",
-                                          "A7", "B7", "C7", "D7", "E7", "F7", "G7", "H7",
-                                          "A6", "B6", "C6", "D6", "E6", "F6", "G6", "H6",
-                                          "A5", "B5", "C5", "D5", "E5", "F5", "G5", "H5",
-                                          "A4", "B4", "C4", "D4", "E4", "F4", "G4", "H4",
-                                          "A3", "B3", "C3", "D3", "E3", "F3", "G3", "H3",
-                                          "A2", "B2", "C2", "D2", "E2", "F2", "G2", "H2",
-                                          "A1", "B1", "C1", "D1", "E1", "F1", "G1", "H1",
-                                          "Active Player",
-                                          "White Kingside Castling Right", "White Queenside Castling Right", "Black Kingside Castling Right", "Black Queenside Castling Right",
-                                          "En passant Target",
-                                          "Halfmove Clock",
-                                          "Fullmove Number",
-                                          "Who is winning"])
+        self.isPrintedOutput = isPrintedOutput
+        
+        self.chessStateEncoder = ChessStateEncoder(board=self.chess.board, isPrintedOutput=self.isPrintedOutput, enginePool=self.enginePool, evaluationCache=self.evaluationCache)
         
+        # A generator created with no simulations only sets up its bots and encoder (used by the self-play workers)
         self.numberOfSimulations = numberOfSimulations
-        for i in range(0, self.numberOfSimulations):
-            self.simulate()
-           
-        self.data, _, _ = DataGenerator.minMaxScaling(data=self.data)  
-        self.data.to_csv("./deepLearningAI/data/{}_Simulations_Of_White_{}_VS_Black_{}.csv".format(numberOfSimulations, self.whiteBot, self.blackBot), index=False)
+        if self.numberOfSimulations <= 0:
+            return
+        
+        self.dataFileName = "{}_Simulations_Of_White_{}_VS_Black_{}".format(numberOfSimulations, self.whiteBot, self.blackBot)
+        
+        # Unscaled records are streamed to disk as games finish; an interrupted run can be resumed from its last completed game
+        self.recordFilePath = "./deepLearningAI/data/{}.records".format(self.dataFileName)
+        
+        # The moves of every game are also written as PGN, from which an opening book can be built (see OpeningBook.build);
+        # a game is only added to it when its records are committed, so that the PGN and the records always hold the same games
+        self.pgnFilePath = "./deepLearningAI/data/{}.pgn".format(self.dataFileName)
+        
+        # Every game is seeded from the seed of the run and its index, whatever the number of workers: a new seed (random by default) gives new games,
+        # and a resumed run plays the remaining games with the seed of the interrupted one
+        self.seed = DataGenerator.runSeed(seedFilePath="./deepLearningAI/data/{}.seed.json".format(self.dataFileName), seed=seed, isResumed=isResumed)
+        
+        print("\n=======================================================================================")
+        print("Seed of the simulations: {}".format(self.seed))
+        
+        if numberOfWorkers > 1:
+            DataGenerator.generateInParallel(whiteBot=whiteBot, blackBot=blackBot, numberOfSimulations=numberOfSimulations, numberOfWorkers=numberOfWorkers, seed=self.seed, dataFileName=self.dataFileName, evaluator=self.evaluator, evaluationCache=self.evaluationCache, isResumed=isResumed)
+        else:
+            self.recordWriter = RecordWriter(recordFilePath=self.recordFilePath, numberOfColumns=len(DataGenerator.COLUMNS), isResumed=isResumed, pgnFilePath=self.pgnFilePath)
+            for i in range(0, self.numberOfSimulations):
+                if self.recordWriter.isGameCompleted(i):
+                    continue
+                
+                DataGenerator.seedGame(seed=self.seed, gameIndex=i)
+                records = self.simulateGame()
+                self.recordWriter.writeGame(gameIndex=i, records=records, pgn=self.gamePgn(gameIndex=i))
+                
+            self.recordWriter.close()
+        
+        # Global Min-Max Scaling is a separate pass over the finished stream
+        self.numberOfRecords = DataGenerator.exportScaledData(recordFilePath=self.recordFilePath, csvFilePath="./deepLearningAI/data/{}.csv".format(self.dataFileName))
         self.printData()
         
-    def simulate(self):
+        if self.evaluationCache is not None:
+            self.evaluationCache.printStatistics()
+        
+    def simulateGame(self):
+        # Play one game between the two bots and return the records of every position reached in it
         self.chess = Chess()
         self.whiteBot.chess = self.chess
         self.blackBot.chess = self.chess
-        self.chessStateEncoder = ChessStateEncoder(self.chess.board)
+        self.chessStateEncoder = ChessStateEncoder(self.chess.board, isPrintedOutput=self.isPrintedOutput, enginePool=self.enginePool, evaluationCache=self.evaluationCache)
         
+        # Every game starts with White to move, whoever made the last move of the previous game
+        self.turn = "White"
+        
+        records = []
+        simulatedBoards = []
         while not self.chess.board.is_game_over():
             if self.turn == "White":
                 self.whiteBot.perform()
@@ -166,12 +383,184 @@ class DataGenerator():
                 self.blackBot.perform()
                 self.turn = "White"
             
-            self.data.loc[len(self.data)] = self.chessStateEncoder.createDataRecord()
+            if self.evaluator is None:
+                records.append(self.chessStateEncoder.createDataRecord())
+            else:
+                simulatedBoards.append(self.chess.board.copy())
+                
+        if self.evaluator is not None:
+            scores = self.evaluator.evaluateBoards(simulatedBoards)
+            for i in range(0, len(simulatedBoards)):
+                records.append(ChessStateEncoder(simulatedBoards[i], isPrintedOutput=self.isPrintedOutput).createDataRecord(score=scores[i]))
+                
+        return records
+    
+    def gamePgn(self, gameIndex):
+        # PGN of the game just simulated
+        game = chess.pgn.Game.from_board(self.chess.board)
+        game.headers["Event"] = "{} VS {}".format(self.whiteBot, self.blackBot)
+        game.headers["Round"] = str(gameIndex + 1)
+        game.headers["White"] = str(self.whiteBot)
+        game.headers["Black"] = str(self.blackBot)
+        
+        return str(game) + "\n\n"
+    
+    @staticmethod
+    def runSeed(seedFilePath, seed=None, isResumed=False):
+        # The seed saved by the interrupted run when resuming, otherwise seed (a random one if None), saved for a later resume
+        if isResumed and os.path.exists(seedFilePath):
+            with open(seedFilePath, "r") as file:
+                savedSeed = json.load(file)["seed"]
+                
+            if seed is not None and seed != savedSeed:
+                print("The interrupted run was seeded with {}: it is resumed with that seed, not {}".format(savedSeed, seed))
+                
+            return savedSeed
+        
+        if seed is None:
+            seed = random.SystemRandom().randrange(2**31)
+            
+        with open(seedFilePath, "w") as file:
+            json.dump({"seed": seed}, file)
+            
+        return seed
+    
+    @staticmethod
+    def seedGame(seed, gameIndex):
+        # Each game has its own seed, so that a game plays out the same whichever worker it is scheduled on
+        random.seed(seed + gameIndex)
+        np.random.seed((seed + gameIndex) % 2**32)
+    
+    @staticmethod
+    def initializeWorker(whiteBot, blackBot, enginePoolSettings, shardDirectory, evaluatorSettings=None, evaluationCacheSettings=None):
+        # Runs once in every worker process: each worker owns its bots, its engine, its shard file, its connection to the evaluation cache,
+        # and its own AsyncEvaluator when the parent was given one (so numberOfWorkers x numberOfEngines engines run in total)
+        sys.stdout = open(os.devnull, "w")
+        
+        EnginePool.defaultPool = None
+        EnginePool.configureDefaultPool(**enginePoolSettings)
+        
+        evaluationCache = EvaluationCache(**evaluationCacheSettings) if evaluationCacheSettings is not None else None
+        
+        evaluator = AsyncEvaluator(evaluationCache=evaluationCache, **evaluatorSettings) if evaluatorSettings is not None else None
+        
+        DataGenerator.workerGenerator = DataGenerator(whiteBot=whiteBot, blackBot=blackBot, numberOfSimulations=0, enginePool=EnginePool.getDefaultPool(), evaluator=evaluator, evaluationCache=evaluationCache, isPrintedOutput=False)
+        # A resumed run keeps the shards of the interrupted one, and a new worker may be given the PID of an old one:
+        # the random suffix makes sure that a worker never truncates a shard holding games counted as completed
+        shardName = "shard-{}-{}".format(os.getpid(), uuid.uuid4().hex[:8])
+        DataGenerator.workerGenerator.recordWriter = RecordWriter(recordFilePath=os.path.join(shardDirectory, shardName + ".records"), numberOfColumns=len(DataGenerator.COLUMNS), gamesPerChunk=1, pgnFilePath=os.path.join(shardDirectory, shardName + ".pgn"))
+        
+    @staticmethod
+    def simulateInWorker(gameIndex, seed):
+        generator = DataGenerator.workerGenerator
+        
+        if seed is not None:
+            DataGenerator.seedGame(seed=seed, gameIndex=gameIndex)
+            
+        # Cache lookups of this game, added up by the parent process
+        statistics = generator.evaluationCache.statistics() if generator.evaluationCache is not None else (0, 0, 0.)
+        
+        records = generator.simulateGame()
+        
+        # Records and PGN are streamed to the worker's shard together with their game index, so that the merge can restore the game order
+        generator.recordWriter.writeGame(gameIndex=gameIndex, records=records, pgn=generator.gamePgn(gameIndex=gameIndex))
+        
+        if generator.evaluationCache is not None:
+            statistics = tuple(after - before for after, before in zip(generator.evaluationCache.statistics(), statistics))
+        
+        return gameIndex, len(records), statistics
+    
+    @staticmethod
+    def generateInParallel(whiteBot, blackBot, numberOfSimulations, numberOfWorkers, seed=None, dataFileName="data", evaluator=None, evaluationCache=None, isResumed=False):
+        shardDirectory = "./deepLearningAI/data/shards/{}".format(dataFileName)
+        if os.path.isdir(shardDirectory) and not isResumed:
+            shutil.rmtree(shardDirectory)
+        os.makedirs(shardDirectory, exist_ok=True)
+        
+        # Games already committed to the shards of an interrupted run are not played again
+        completedGames = set()
+        for shardFilePath in DataGenerator.shardFilePaths(shardDirectory):
+            completedGames.update(RecordWriter.readProgress(shardFilePath)["completedGames"])
+        remainingGames = [gameIndex for gameIndex in range(0, numberOfSimulations) if gameIndex not in completedGames]
+        
+        print("\n=======================================================================================")
+        print("Simulating {} matches between {} (White) and {} (Black) on {} worker processes ({} already completed):".format(numberOfSimulations, whiteBot, blackBot, numberOfWorkers, len(completedGames)))
+        
+        startTime = time.perf_counter()
+        numberOfFinishedGames = 0
+        numberOfPositions = 0
+        
+        with concurrent.futures.ProcessPoolExecutor(max_workers=numberOfWorkers, initializer=DataGenerator.initializeWorker, initargs=(whiteBot, blackBot, EnginePool.defaultPoolSettings, shardDirectory, evaluator.settings() if evaluator is not None else None, evaluationCache.settings() if evaluationCache is not None else None)) as executor:
+            futures = [executor.submit(DataGenerator.simulateInWorker, gameIndex, seed) for gameIndex in remainingGames]
+            
+            for future in concurrent.futures.as_completed(futures):
+                gameIndex, numberOfGamePositions, cacheStatistics = future.result()
+                
+                # The workers' cache hits and misses are reported with the parent's
+                if evaluationCache is not None:
+                    evaluationCache.addStatistics(*cacheStatistics)
+                
+                numberOfFinishedGames += 1
+                numberOfPositions += numberOfGamePositions
+                elapsedTime = time.perf_counter() - startTime
+                
+                print("     Game [{}/{}] finished ({} positions); {:.2f} games/s, {:.1f} positions/s".format(numberOfFinishedGames, len(remainingGames), numberOfGamePositions, numberOfFinishedGames / elapsedTime, numberOfPositions / elapsedTime))
+                
+        DataGenerator.mergeShards(shardDirectory=shardDirectory, recordFilePath="./deepLearningAI/data/{}.records".format(dataFileName), pgnFilePath="./deepLearningAI/data/{}.pgn".format(dataFileName))
+        shutil.rmtree(shardDirectory)
+    
+    @staticmethod
+    def shardFilePaths(shardDirectory):
+        # A shard without progress file was interrupted before its first game was committed: it holds no record
+        shardFilePaths = [os.path.join(shardDirectory, shardFileName) for shardFileName in sorted(os.listdir(shardDirectory)) if shardFileName.endswith(".records")]
+        
+        return [shardFilePath for shardFilePath in shardFilePaths if os.path.exists(RecordWriter.progressFilePathOf(shardFilePath))]
+    
+    @staticmethod
+    def mergeShards(shardDirectory, recordFilePath, pgnFilePath=None):
+        shardFilePaths = DataGenerator.shardFilePaths(shardDirectory)
+        shards = [RecordWriter.readRecords(shardFilePath) for shardFilePath in shardFilePaths]
+        records = np.concatenate(shards)
+        
+        # The PGN of the committed games only: a game interrupted in a shard, then played again, is written once
+        pgns = {}
+        for shardFilePath in shardFilePaths:
+            pgns.update(RecordWriter.readPgns(shardFilePath))
+        
+        # A stable sort on the game index gives the same data as a sequential run, however the games were scheduled
+        records = records[np.argsort(records[:, 0], kind="stable")]
+        
+        gameIndices, gameStarts = np.unique(records[:, 0], return_index=True)
+        gameEnds = list(gameStarts[1:]) + [len(records)]
+        
+        recordWriter = RecordWriter(recordFilePath=recordFilePath, numberOfColumns=len(DataGenerator.COLUMNS), gamesPerChunk=len(gameIndices) + 1, pgnFilePath=pgnFilePath)
+        for i in range(0, len(gameIndices)):
+            gameIndex = int(gameIndices[i])
+            recordWriter.writeGame(gameIndex=gameIndex, records=records[gameStarts[i]:gameEnds[i], 1:], pgn=pgns.get(gameIndex))
+        recordWriter.close()
+    
+    @staticmethod
+    def exportScaledData(recordFilePath, csvFilePath, chunkSize=100000):
+        # Scale the finished record stream with the global minimum and maximum of every column, then write it as CSV chunk by chunk
+        data = RecordWriter.readRecords(recordFilePath)[:, 1:]
+        
+        minColumnValues = data.min(axis=0) if len(data) > 0 else np.zeros(data.shape[1])
+        maxColumnValues = data.max(axis=0) if len(data) > 0 else np.zeros(data.shape[1])
+        
+        minmaxRangeValue = maxColumnValues - minColumnValues
+        minmaxRangeValue = np.where(minmaxRangeValue == 0, 1, minmaxRangeValue)
+        
+        pd.DataFrame(columns=DataGenerator.COLUMNS).to_csv(csvFilePath, index=False)
+        for start in range(0, len(data), chunkSize):
+            scaledChunk = (data[start:start + chunkSize] - minColumnValues) / minmaxRangeValue
+            pd.DataFrame(scaledChunk, columns=DataGenerator.COLUMNS).to_csv(csvFilePath, mode="a", header=False, index=False)
+            
+        return len(data)
                     
     def printData(self):
         print("\n=======================================================================================")
-        print("Data generated when simulating a match between {} (White) and {} (Black), after applying Min-Max Scaling:".format(self.whiteBot, self.blackBot))
-        print(self.data)
+        print("Data generated when simulating a match between {} (White) and {} (Black), after applying Min-Max Scaling: {} records".format(self.whiteBot, self.blackBot, self.numberOfRecords))
+        print(pd.read_csv("./deepLearningAI/data/{}.csv".format(self.dataFileName), nrows=10))
     
     @staticmethod
     def minMaxScaling(data):
@@ -197,6 +586,26 @@ class DataGenerator():
             
         return scaledData, minColumnValues, maxColumnValues
     
+    @staticmethod
+    def minMaxScalingArray(data):
+        # NumPy version of minMaxScaling, applied to every column of a 2D array (or to a 1D array) at once
+        minColumnValues = data.min(axis=0)
+        maxColumnValues = data.max(axis=0)
+        
+        minmaxRangeValue = maxColumnValues - minColumnValues
+        minmaxRangeValue = np.where(minmaxRangeValue == 0, 1, minmaxRangeValue)
+        
+        scaledData = (data - minColumnValues) / minmaxRangeValue
+        
+        return scaledData, minColumnValues, maxColumnValues
+    
+    @staticmethod
+    def minMaxDescalingArray(scaledData, minColumnValues, maxColumnValues):
+        minmaxRangeValue = maxColumnValues - minColumnValues
+        minmaxRangeValue = np.where(minmaxRangeValue == 0, 1, minmaxRangeValue)
+        
+        return scaledData * minmaxRangeValue + minColumnValues
+    
     @staticmethod
     def minMaxDescaling(scaledData, minColumnValues, maxColumnValues):
         # minColumnValues (dict): Dictionary containing the minimum values for each column used during scaling.
@@ -0,0 +1,132 @@
+import queue
+import threading
+
+import numpy as np
+
+from deepLearningAI.training.dataset import Dataset
+
+class DataLoader():
+
+    # Sentinel put on the prefetch queue once every batch of the epoch has been produced
+    END_OF_EPOCH = None
+
+    def __init__(self, source, indices=None, batchSize=64, isShuffled=True, isLastBatchDropped=False, isPrefetched=None, prefetchDepth=2, dtype=np.float32):
+
+        # source is either a Dataset (memory-mapped, see dataset.py), or a pair (X, y) of in-memory arrays holding one example per row of X
+        # indices restricts the loader to some examples of the source (e.g. the training split); all of them by default
+        self.source = source
+        if isinstance(source, Dataset):
+            self.numberOfFeatures = Dataset.NUMBER_OF_FEATURES
+            numberOfExamples = len(source)
+        else:
+            (self.X, self.y) = source
+            self.numberOfFeatures = self.X.shape[1]
+            numberOfExamples = self.X.shape[0]
+
+        self.indices = np.arange(numberOfExamples) if indices is None else np.asarray(indices)
+        self.isIndicesContiguous = len(self.indices) > 0 and bool(np.all(np.diff(self.indices) == 1))
+
+        # batchSize is the number of examples per batch; the last batch of an epoch holds the remaining examples, unless it is dropped
+        self.batchSize = batchSize
+        self.isShuffled = isShuffled
+        self.isLastBatchDropped = isLastBatchDropped
+
+        # The next batches are gathered by a background thread while the current one is being trained on.
+        # By default only a memory-mapped dataset is prefetched: gathering in-memory rows takes a few microseconds, less than handing a batch over between threads
+        self.isPrefetched = isPrefetched if isPrefetched is not None else isinstance(source, Dataset)
+        self.prefetchDepth = prefetchDepth
+
+        self.dtype = np.dtype(dtype)
+
+        # Batches are gathered into a ring of reusable buffers: one being filled, up to prefetchDepth waiting, one being used
+        numberOfBuffers = prefetchDepth + 2 if self.isPrefetched else 1
+        labelsDtype = np.float32 if isinstance(source, Dataset) else self.y.dtype
+        self.featureBuffers = [np.empty((batchSize, self.numberOfFeatures), dtype=self.dtype) for i in range(0, numberOfBuffers)]
+        self.labelBuffers = [np.empty(batchSize, dtype=labelsDtype) for i in range(0, numberOfBuffers)]
+
+    def __str__(self):
+        return "DataLoader({} examples, {} per batch)".format(len(self.indices), self.batchSize)
+
+    def __len__(self):
+        # Number of batches per epoch
+        if self.isLastBatchDropped:
+            return len(self.indices) // self.batchSize
+
+        return -(-len(self.indices) // self.batchSize)
+
+    def indexBatches(self):
+        # Example indices of each batch of a new epoch; only the (small) permutation is shuffled, never the data
+        order = self.indices[np.random.permutation(len(self.indices))] if self.isShuffled else self.indices
+
+        return [order[start:start + self.batchSize] for start in range(0, len(self) * self.batchSize, self.batchSize)]
+
+    def gather(self, batchIndices, bufferIndex):
+        # Features (batch length, number of features) and labels of the given examples, in the buffers of the ring
+        numberOfExamples = len(batchIndices)
+        features = self.featureBuffers[bufferIndex][:numberOfExamples]
+        labels = self.labelBuffers[bufferIndex][:numberOfExamples]
+
+        if isinstance(self.source, Dataset):
+            self.source.gather(batchIndices, out=features, labelsOut=labels)
+        elif not self.isShuffled and self.isIndicesContiguous and self.X.dtype == self.dtype:
+            # Batches of consecutive in-memory examples are handed out as views, without any copy
+            return self.X[batchIndices[0]:batchIndices[0] + numberOfExamples], self.y[batchIndices[0]:batchIndices[0] + numberOfExamples]
+        else:
+            # (mode="clip" keeps np.take from buffering its output; the indices are valid anyway)
+            np.take(self.X, batchIndices, axis=0, out=features, mode="clip")
+            np.take(self.y, batchIndices, out=labels, mode="clip")
+
+        return features, labels
+
+    def __iter__(self):
+        # Yields (X, y) per batch, with X of shape (number of features, batch length) as the network expects it.
+        # Both are views of reusable buffers: they are only valid until the next batch is requested
+        indexBatches = self.indexBatches()
+
+        if not self.isPrefetched:
+            for batchIndices in indexBatches:
+                features, labels = self.gather(batchIndices, 0)
+                yield features.transpose(), labels
+            return
+
+        readyBatches = queue.Queue(maxsize=self.prefetchDepth)
+        isStopped = threading.Event()
+
+        def prefetch():
+            try:
+                for batchNumber, batchIndices in enumerate(indexBatches):
+                    batch = self.gather(batchIndices, batchNumber % len(self.featureBuffers))
+                    while not isStopped.is_set():
+                        try:
+                            readyBatches.put(batch, timeout=0.1)
+                            break
+                        except queue.Full:
+                            pass
+                    if isStopped.is_set():
+                        return
+                readyBatches.put(DataLoader.END_OF_EPOCH)
+            except BaseException as exception:
+                readyBatches.put(exception)
+
+        prefetchThread = threading.Thread(target=prefetch, name="DataLoader", daemon=True)
+        prefetchThread.start()
+
+        try:
+            while True:
+                batch = readyBatches.get()
+                if batch is DataLoader.END_OF_EPOCH:
+                    break
+                if isinstance(batch, BaseException):
+                    raise batch
+
+                features, labels = batch
+                yield features.transpose(), labels
+        finally:
+            # Also reached when the consumer stops early: the thread is released from a full queue, then joined
+            isStopped.set()
+            while prefetchThread.is_alive():
+                try:
+                    readyBatches.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            prefetchThread.join()
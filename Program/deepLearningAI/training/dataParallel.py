@@ -0,0 +1,208 @@
+import traceback
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+class DataParallelGroup():
+
+    def __init__(self, dnn, xTrain, yTrain, numberOfWorkers=2):
+
+        # Data-parallel training: every mini-batch is split into numberOfWorkers contiguous shards, and each shard's gradients
+        # are computed on a replica of the network; the main process computes the first shard itself.
+        # The weights, the gradients, the training data and the batch indices all live in shared memory:
+        #   - the replicas' W and b are views of the shared weights, so they see each update without any copy
+        #   - each shard's gradients are weighted by (shard size / batch size) before they are summed, which gives exactly
+        #     the gradient of the mean cost of the whole batch, i.e. the same update as single-process training
+        self.dnn = dnn
+        self.numberOfWorkers = numberOfWorkers
+
+        self.sharedMemories = []
+
+        parameters = self.parameterList()
+        self.parameterSizes = [parameter.size for parameter in parameters]
+        self.parameterOffsets = np.concatenate([[0], np.cumsum(self.parameterSizes)]).tolist()
+        numberOfParameters = self.parameterOffsets[-1]
+
+        self.weights = self.createSharedArray((numberOfParameters,), dnn.dtype)
+        self.gradients = self.createSharedArray((numberOfWorkers, numberOfParameters), dnn.dtype)
+        self.reducedGradients = np.empty(numberOfParameters, dtype=dnn.dtype)
+
+        self.xTrain = self.createSharedArray(xTrain.shape, xTrain.dtype)
+        self.yTrain = self.createSharedArray(yTrain.shape, yTrain.dtype)
+        self.xTrain[...] = xTrain
+        self.yTrain[...] = yTrain
+
+        self.batchIndices = self.createSharedArray((xTrain.shape[1],), np.int64)
+        self.scores = self.createSharedArray((xTrain.shape[1],), dnn.dtype)
+
+        # From now on the network of the main process trains on the shared weights
+        DataParallelGroup.bindParameters(dnn, self.weights, self.parameterOffsets)
+
+        self.connections = []
+        self.processes = []
+        for workerIndex in range(1, numberOfWorkers):
+            connection, workerConnection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=DataParallelGroup.runWorker, name="DataParallelWorker-{}".format(workerIndex), daemon=True,
+                                              args=(workerConnection, workerIndex, dnn, self.sharedArraySpecifications(), self.parameterOffsets))
+            process.start()
+
+            self.connections.append(connection)
+            self.processes.append(process)
+
+        self.isClosed = False
+
+    def __str__(self):
+        return "DataParallelGroup({} workers)".format(self.numberOfWorkers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exceptionType, exceptionValue, exceptionTraceback):
+        self.close()
+
+    def parameterList(self):
+        # W and b of every layer, in the order of NeuralNetwork.parameters()
+        return [parameter for layer in self.dnn.layers() for parameter in (layer.linearLayer.W, layer.linearLayer.b)]
+
+    def createSharedArray(self, shape, dtype):
+        dtype = np.dtype(dtype)
+        sharedMemory = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+        self.sharedMemories.append((sharedMemory, shape, dtype))
+
+        return np.ndarray(shape, dtype=dtype, buffer=sharedMemory.buf)
+
+    def sharedArraySpecifications(self):
+        # (name, shape, dtype) of the shared arrays, in creation order: weights, gradients, xTrain, yTrain, batchIndices, scores
+        return [(sharedMemory.name, shape, dtype.str) for sharedMemory, shape, dtype in self.sharedMemories]
+
+    @staticmethod
+    def bindParameters(dnn, weights, parameterOffsets):
+        # Replace the W and b of every layer by views of the flat weights array, initialized with the current values
+        index = 0
+        for layer in dnn.layers():
+            for name in ("W", "b"):
+                parameter = getattr(layer.linearLayer, name)
+                view = weights[parameterOffsets[index]:parameterOffsets[index + 1]].reshape(parameter.shape)
+                if not np.shares_memory(view, parameter):
+                    view[...] = parameter
+                setattr(layer.linearLayer, name, view)
+                index += 1
+
+    @staticmethod
+    def unbindParameters(dnn):
+        for layer in dnn.layers():
+            layer.linearLayer.W = layer.linearLayer.W.copy()
+            layer.linearLayer.b = layer.linearLayer.b.copy()
+
+    @staticmethod
+    def shardBounds(batchLength, numberOfWorkers):
+        # Contiguous shards whose sizes differ by at most one (as np.array_split); some are empty when the batch is smaller than the group
+        shardLength, remainder = divmod(batchLength, numberOfWorkers)
+        shardLengths = [shardLength + 1] * remainder + [shardLength] * (numberOfWorkers - remainder)
+
+        return np.concatenate([[0], np.cumsum(shardLengths)]).astype(np.int64)
+
+    @staticmethod
+    def computeShard(dnn, xTrain, yTrain, batchIndices, scores, gradientRow, parameterOffsets, shardStart, shardStop, batchLength):
+        # Gradients (and cost) of one shard, weighted by its share of the batch and written to this worker's row
+        shardLength = shardStop - shardStart
+        if shardLength == 0:
+            gradientRow[...] = 0
+            return 0.
+
+        indices = batchIndices[shardStart:shardStop]
+        shardScores, cost = dnn.forward(X=xTrain[:, indices], labels=yTrain[indices], training=True, isUpdated=False)
+
+        weight = shardLength / batchLength
+        for index, (parameter, gradient) in enumerate(dnn.parameters()):
+            np.multiply(gradient.reshape(-1), weight, out=gradientRow[parameterOffsets[index]:parameterOffsets[index + 1]])
+
+        scores[shardStart:shardStop] = shardScores.reshape(-1)
+
+        return cost * weight
+
+    @staticmethod
+    def runWorker(connection, workerIndex, dnn, sharedArraySpecifications, parameterOffsets):
+        sharedMemories = [shared_memory.SharedMemory(name=name) for name, shape, dtype in sharedArraySpecifications]
+        (weights, gradients, xTrain, yTrain, batchIndices, scores) = [np.ndarray(shape, dtype=np.dtype(dtype), buffer=sharedMemory.buf) for sharedMemory, (name, shape, dtype) in zip(sharedMemories, sharedArraySpecifications)]
+
+        # The replica trains on the shared weights too; the main process is the only one to update them
+        DataParallelGroup.bindParameters(dnn, weights, parameterOffsets)
+
+        try:
+            while True:
+                message = connection.recv()
+                if message is None:
+                    break
+
+                shardStart, shardStop, batchLength = message
+                try:
+                    cost = DataParallelGroup.computeShard(dnn, xTrain, yTrain, batchIndices, scores, gradients[workerIndex], parameterOffsets, shardStart, shardStop, batchLength)
+                    connection.send(("done", cost))
+                except:
+                    connection.send(("error", traceback.format_exc()))
+        finally:
+            # Drop every view of the shared memory before closing it
+            DataParallelGroup.unbindParameters(dnn)
+            del weights, gradients, xTrain, yTrain, batchIndices, scores
+            for sharedMemory in sharedMemories:
+                sharedMemory.close()
+
+    def forward(self, batchIndices):
+        # One synchronous training step on the training examples batchIndices: same scores, cost and update as
+        # dnn.forward(X=xTrain[:, batchIndices], labels=yTrain[batchIndices], training=True)
+        batchLength = len(batchIndices)
+        self.batchIndices[:batchLength] = batchIndices
+
+        shardBounds = DataParallelGroup.shardBounds(batchLength, self.numberOfWorkers)
+        for workerIndex, connection in enumerate(self.connections, start=1):
+            connection.send((int(shardBounds[workerIndex]), int(shardBounds[workerIndex + 1]), batchLength))
+
+        cost = DataParallelGroup.computeShard(self.dnn, self.xTrain, self.yTrain, self.batchIndices, self.scores, self.gradients[0], self.parameterOffsets, int(shardBounds[0]), int(shardBounds[1]), batchLength)
+
+        errors = []
+        for connection in self.connections:
+            status, result = connection.recv()
+            if status == "error":
+                errors.append(result)
+            else:
+                cost += result
+
+        if errors:
+            raise RuntimeError("A data-parallel worker failed:\n{}".format(errors[0]))
+
+        # Sum the weighted shard gradients, then apply them once, in the main process
+        np.sum(self.gradients, axis=0, out=self.reducedGradients)
+
+        parameters = []
+        for index, (parameter, gradient) in enumerate(self.dnn.parameters()):
+            parameters.append((parameter, self.reducedGradients[self.parameterOffsets[index]:self.parameterOffsets[index + 1]].reshape(parameter.shape)))
+        self.dnn.optimizer.step(parameters)
+
+        return self.scores[:batchLength].reshape(1, -1), cost
+
+    def close(self):
+        if self.isClosed:
+            return
+
+        self.isClosed = True
+
+        for connection in self.connections:
+            try:
+                connection.send(None)
+            except:
+                pass
+        for process in self.processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+
+        # The network keeps private copies of its final weights
+        DataParallelGroup.unbindParameters(self.dnn)
+
+        del self.weights, self.gradients, self.xTrain, self.yTrain, self.batchIndices, self.scores
+        for sharedMemory, shape, dtype in self.sharedMemories:
+            sharedMemory.close()
+            sharedMemory.unlink()
+        self.sharedMemories = []
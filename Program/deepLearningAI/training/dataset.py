@@ -0,0 +1,153 @@
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+from deepLearningAI.training.recordWriter import RecordWriter
+from deepLearningAI.training.dataGenerating import DataGenerator
+
+class Dataset():
+
+    FORMAT_VERSION = 1
+
+    NUMBER_OF_BOARD_FEATURES = 64
+    NUMBER_OF_FEATURES = 72
+
+    # Raw piece codes go from -6 (black king) to +6 (white king)
+    MAX_PIECE_CODE = 6
+
+    def __init__(self, dataFileName):
+
+        # A binary dataset is a directory holding a JSON header and one .npy file per array:
+        #   boardCodes (N, 64) int8:      one code per square, turned into the scaled feature through the boardValues table
+        #   boardValues (64, K) float32:  scaled value of each code of each square
+        #   scalarFeatures (N, 8) float32 and labels (N,) float32, already scaled
+        # The arrays are memory-mapped, so opening a dataset does not read it
+        self.dataFileName = dataFileName
+        self.directory = Dataset.directoryOf(dataFileName)
+
+        with open(os.path.join(self.directory, "header.json"), "r") as file:
+            self.header = json.load(file)
+
+        if self.header["formatVersion"] > Dataset.FORMAT_VERSION:
+            raise ValueError("Dataset {} has format version {}, this program reads up to version {}".format(dataFileName, self.header["formatVersion"], Dataset.FORMAT_VERSION))
+
+        self.columns = self.header["columns"]
+        self.numberOfRecords = self.header["numberOfRecords"]
+
+        self.boardCodes = np.load(os.path.join(self.directory, "boardCodes.npy"), mmap_mode="r")
+        self.boardValues = np.load(os.path.join(self.directory, "boardValues.npy"))
+        self.scalarFeatures = np.load(os.path.join(self.directory, "scalarFeatures.npy"), mmap_mode="r")
+        self.labels = np.load(os.path.join(self.directory, "labels.npy"), mmap_mode="r")
+
+        self.squareIndices = np.arange(Dataset.NUMBER_OF_BOARD_FEATURES)
+
+    def __len__(self):
+        return self.numberOfRecords
+
+    def __str__(self):
+        return "Dataset({}: {} records)".format(self.directory, self.numberOfRecords)
+
+    def scalingStatistics(self):
+        # Minimum and maximum of every column before scaling, when the dataset was built from unscaled records (None otherwise)
+        return self.header.get("scaling")
+
+    def gather(self, indices, out=None, labelsOut=None):
+        # Scaled (len(indices), 72) float32 features and (len(indices),) labels of the given records
+        indices = np.asarray(indices)
+        if out is None:
+            out = np.empty((len(indices), Dataset.NUMBER_OF_FEATURES), dtype=np.float32)
+        if labelsOut is None:
+            labelsOut = np.empty(len(indices), dtype=np.float32)
+
+        out[:, :Dataset.NUMBER_OF_BOARD_FEATURES] = self.boardValues[self.squareIndices, self.boardCodes[indices]]
+        out[:, Dataset.NUMBER_OF_BOARD_FEATURES:] = self.scalarFeatures[indices]
+        labelsOut[...] = self.labels[indices]
+
+        return out, labelsOut
+
+    @staticmethod
+    def directoryOf(dataFileName):
+        return "./deepLearningAI/data/{}".format(dataFileName)
+
+    @staticmethod
+    def exists(dataFileName):
+        return os.path.exists(os.path.join(Dataset.directoryOf(dataFileName), "header.json"))
+
+    @staticmethod
+    def write(dataFileName, columns, boardCodes, boardValues, scalarFeatures, labels, scaling=None, source=None):
+        directory = Dataset.directoryOf(dataFileName)
+        os.makedirs(directory, exist_ok=True)
+
+        np.save(os.path.join(directory, "boardCodes.npy"), np.ascontiguousarray(boardCodes, dtype=np.int8))
+        np.save(os.path.join(directory, "boardValues.npy"), np.ascontiguousarray(boardValues, dtype=np.float32))
+        np.save(os.path.join(directory, "scalarFeatures.npy"), np.ascontiguousarray(scalarFeatures, dtype=np.float32))
+        np.save(os.path.join(directory, "labels.npy"), np.ascontiguousarray(labels, dtype=np.float32))
+
+        header = {
+            "formatVersion": Dataset.FORMAT_VERSION,
+            "numberOfRecords": len(labels),
+            "columns": list(columns),
+            "source": source,
+            "scaling": scaling
+        }
+
+        # The header is written last: a dataset without one is incomplete
+        with open(os.path.join(directory, "header.json"), "w") as file:
+            json.dump(header, file, indent=4)
+
+        return Dataset(dataFileName)
+
+    @staticmethod
+    def convertCsv(dataFileName):
+        # The existing CSV files are already Min-Max scaled, so each square column holds at most 13 distinct values (one per piece code):
+        # they are stored as indices into a per-square table of those values, which is lossless
+        data = pd.read_csv("./deepLearningAI/data/{}.csv".format(dataFileName))
+        values = data.to_numpy()
+
+        boardFeatures = values[:, :Dataset.NUMBER_OF_BOARD_FEATURES]
+        boardCodes = np.zeros(boardFeatures.shape, dtype=np.int8)
+        boardValues = np.zeros((Dataset.NUMBER_OF_BOARD_FEATURES, 2 * Dataset.MAX_PIECE_CODE + 1))
+        for square in range(0, Dataset.NUMBER_OF_BOARD_FEATURES):
+            squareValues, squareCodes = np.unique(boardFeatures[:, square], return_inverse=True)
+            if len(squareValues) > boardValues.shape[1]:
+                raise ValueError("Column {} of {} holds {} distinct values, which is not a board feature".format(data.columns[square], dataFileName, len(squareValues)))
+
+            boardValues[square, :len(squareValues)] = squareValues
+            boardCodes[:, square] = squareCodes
+
+        return Dataset.write(dataFileName=dataFileName, columns=data.columns, boardCodes=boardCodes, boardValues=boardValues,
+                             scalarFeatures=values[:, Dataset.NUMBER_OF_BOARD_FEATURES:Dataset.NUMBER_OF_FEATURES], labels=values[:, -1],
+                             source="{}.csv".format(dataFileName))
+
+    @staticmethod
+    def convertRecords(dataFileName):
+        # Unscaled records (see RecordWriter) hold the raw piece codes, which are stored as they are;
+        # the scaled value of each code of each square follows from the global Min-Max statistics
+        records = RecordWriter.readRecords("./deepLearningAI/data/{}.records".format(dataFileName))[:, 1:]
+
+        minColumnValues = records.min(axis=0)
+        maxColumnValues = records.max(axis=0)
+        minmaxRangeValue = np.where(maxColumnValues - minColumnValues == 0, 1, maxColumnValues - minColumnValues)
+
+        pieceCodes = np.arange(-Dataset.MAX_PIECE_CODE, Dataset.MAX_PIECE_CODE + 1)
+        boardMinValues = minColumnValues[:Dataset.NUMBER_OF_BOARD_FEATURES, np.newaxis]
+        boardRangeValues = minmaxRangeValue[:Dataset.NUMBER_OF_BOARD_FEATURES, np.newaxis]
+        boardValues = (pieceCodes[np.newaxis, :] - boardMinValues) / boardRangeValues
+
+        scalarFeatures = (records[:, Dataset.NUMBER_OF_BOARD_FEATURES:Dataset.NUMBER_OF_FEATURES] - minColumnValues[Dataset.NUMBER_OF_BOARD_FEATURES:Dataset.NUMBER_OF_FEATURES]) / minmaxRangeValue[Dataset.NUMBER_OF_BOARD_FEATURES:Dataset.NUMBER_OF_FEATURES]
+        labels = (records[:, -1] - minColumnValues[-1]) / minmaxRangeValue[-1]
+
+        return Dataset.write(dataFileName=dataFileName, columns=DataGenerator.COLUMNS, boardCodes=records[:, :Dataset.NUMBER_OF_BOARD_FEATURES] + Dataset.MAX_PIECE_CODE, boardValues=boardValues,
+                             scalarFeatures=scalarFeatures, labels=labels,
+                             scaling={"min": minColumnValues.tolist(), "max": maxColumnValues.tolist()},
+                             source="{}.records".format(dataFileName))
+
+    @staticmethod
+    def convert(dataFileName):
+        # Convert a generated data file to the binary format, preferring the unscaled record stream when it is still available
+        if os.path.exists("./deepLearningAI/data/{}.records".format(dataFileName)):
+            return Dataset.convertRecords(dataFileName=dataFileName)
+
+        return Dataset.convertCsv(dataFileName=dataFileName)
@@ -0,0 +1,210 @@
+import sys
+import queue
+import atexit
+import weakref
+import threading
+from contextlib import contextmanager
+
+import chess
+import chess.engine
+
+DEFAULT_ENGINE_PATH = "./deepLearningAI/training/stockfish/stockfish-windows-x86-64-avx2.exe"
+
+class EnginePool():
+
+    # The shared pool which encoders and bots borrow from when they are not given a pool explicitly
+    defaultPool = None
+    defaultPoolSettings = {}
+    defaultPoolLock = threading.Lock()
+
+    # Pools which have not been shut down, closed by the atexit hook below; the set only holds weak references,
+    # so that a pool which is dropped without shutdown() (e.g. a temporary one) can still be garbage collected
+    livePools = weakref.WeakSet()
+
+    def __init__(self, enginePath=DEFAULT_ENGINE_PATH, numberOfEngines=1, engineOptions=None, isHealthChecked=True):
+
+        # enginePath is either the path of a UCI executable, or a command list (e.g. [sys.executable, "stubEngine.py"])
+        self.enginePath = enginePath
+        self.numberOfEngines = numberOfEngines
+
+        # UCI options applied to every engine of the pool, e.g. {"Hash": 64, "Threads": 1}
+        self.engineOptions = dict(engineOptions) if engineOptions else {}
+
+        # Ping the engine before lending it, so that a crashed process is replaced instead of being handed out
+        self.isHealthChecked = isHealthChecked
+
+        self.lock = threading.Lock()
+        self.idleEngines = queue.Queue()
+        self.engines = []
+
+        self.numberOfRestarts = 0
+        self.isShutdown = False
+
+        for i in range(0, self.numberOfEngines):
+            self.idleEngines.put(self.startEngine())
+
+        EnginePool.livePools.add(self)
+
+    def __str__(self):
+        return "EnginePool({} x {})".format(self.numberOfEngines, self.enginePath)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exceptionType, exception, traceback):
+        self.shutdown()
+
+    def startEngine(self):
+        # python-chess drives every engine from a thread which inherits the daemon flag of the thread starting it. The engine is started
+        # from a short-lived daemon thread, so that an engine left open never keeps the interpreter from exiting (and from running atexit hooks)
+        started = []
+        def popen():
+            try:
+                started.append(chess.engine.SimpleEngine.popen_uci(self.enginePath))
+            except BaseException as error:
+                started.append(error)
+
+        starter = threading.Thread(target=popen, name="EngineStarter", daemon=True)
+        starter.start()
+        starter.join()
+
+        engine = started[0]
+        if isinstance(engine, BaseException):
+            raise engine
+
+        if self.engineOptions:
+            engine.configure(self.engineOptions)
+
+        with self.lock:
+            self.engines.append(engine)
+
+        return engine
+
+    def closeEngine(self, engine):
+        with self.lock:
+            if engine in self.engines:
+                self.engines.remove(engine)
+
+        try:
+            engine.close()
+        except:
+            pass
+
+    def restartEngine(self, engine, reason):
+        print("Engine {} {}; restarting it.".format(self.enginePath, reason))
+
+        self.closeEngine(engine)
+        self.numberOfRestarts += 1
+
+        return self.startEngine()
+
+    def isHealthy(self, engine):
+        try:
+            engine.ping()
+            return True
+        except (chess.engine.EngineError, chess.engine.EngineTerminatedError, TimeoutError):
+            return False
+
+    @contextmanager
+    def borrow(self, timeout=None):
+        if self.isShutdown:
+            raise RuntimeError("{} has been shut down".format(self))
+
+        # Block until one of the resident engines is idle. None stands for an engine which could not be restarted:
+        # its replacement is started here, so that the pool keeps its size once the engine can be started again
+        engine = self.idleEngines.get(timeout=timeout)
+        try:
+            if engine is None:
+                engine = self.startEngine()
+            elif self.isHealthChecked and not self.isHealthy(engine):
+                deadEngine, engine = engine, None
+                engine = self.restartEngine(deadEngine, reason="failed its health check")
+
+            yield engine
+        except chess.engine.EngineTerminatedError:
+            # The engine crashed while it was borrowed: replace it before giving it back to the pool
+            deadEngine, engine = engine, None
+            engine = self.restartEngine(deadEngine, reason="terminated unexpectedly ({})".format(sys.exc_info()[1]))
+            raise
+        finally:
+            # When the restart failed (e.g. the engine crashes at start-up), the dead engine has been closed and None is put back in its place
+            if self.isShutdown:
+                if engine is not None:
+                    self.closeEngine(engine)
+            else:
+                self.idleEngines.put(engine)
+
+    def analyse(self, board, limit, cancelEvent=None, **kwargs):
+        # A crashed engine is restarted by borrow(), so the analysis is retried once on a fresh process.
+        # Setting cancelEvent (if given) stops the search early: the result is then whatever the engine had found
+        for attempt in range(0, 2):
+            try:
+                with self.borrow() as engine:
+                    if cancelEvent is None:
+                        return engine.analyse(board, limit, **kwargs)
+                    
+                    return EnginePool.analyseUntilCancelled(engine, board, limit, cancelEvent, **kwargs)
+            except chess.engine.EngineTerminatedError:
+                if attempt == 1:
+                    raise
+
+    @staticmethod
+    def analyseUntilCancelled(engine, board, limit, cancelEvent, **kwargs):
+        # Same result as engine.analyse(), but a watcher thread sends "stop" to the engine as soon as cancelEvent is set
+        with engine.analysis(board, limit, **kwargs) as analysis:
+            isFinished = threading.Event()
+            def stopWhenCancelled():
+                while not isFinished.is_set():
+                    if cancelEvent.wait(0.01):
+                        analysis.stop()
+                        return
+
+            threading.Thread(target=stopWhenCancelled, name="EngineStopper", daemon=True).start()
+            try:
+                analysis.wait()
+            finally:
+                # The watcher ends by itself within 10 ms; it is not waited for
+                isFinished.set()
+
+            return analysis.info if kwargs.get("multipv") is None else analysis.multipv[:kwargs["multipv"]]
+
+    def shutdown(self):
+        if self.isShutdown:
+            return
+
+        self.isShutdown = True
+        EnginePool.livePools.discard(self)
+
+        with self.lock:
+            engines = list(self.engines)
+
+        for engine in engines:
+            self.closeEngine(engine)
+
+    @staticmethod
+    def shutdownAll():
+        for pool in list(EnginePool.livePools):
+            pool.shutdown()
+
+    @staticmethod
+    def configureDefaultPool(**kwargs):
+        # Settings only take effect for a default pool that has not been started yet
+        EnginePool.defaultPoolSettings = kwargs
+
+    @staticmethod
+    def getDefaultPool():
+        with EnginePool.defaultPoolLock:
+            if EnginePool.defaultPool is None or EnginePool.defaultPool.isShutdown:
+                EnginePool.defaultPool = EnginePool(**EnginePool.defaultPoolSettings)
+
+        return EnginePool.defaultPool
+
+    @staticmethod
+    def shutdownDefaultPool():
+        with EnginePool.defaultPoolLock:
+            if EnginePool.defaultPool is not None:
+                EnginePool.defaultPool.shutdown()
+                EnginePool.defaultPool = None
+
+# Pools still open when the program exits (the default pool, or one whose owner forgot to shut it down) close their engines
+atexit.register(EnginePool.shutdownAll)
@@ -0,0 +1,130 @@
+import time
+import sqlite3
+import threading
+
+import chess
+import chess.polyglot
+
+class EvaluationCache():
+
+    def __init__(self, cacheFileName="evaluationCache.sqlite", maxEntries=1000000, evictionInterval=1000):
+
+        self.cacheFileName = cacheFileName
+        self.cacheFilePath = "./deepLearningAI/data/{}".format(cacheFileName)
+
+        # Once the cache holds more than maxEntries evaluations, the least recently used ones are evicted
+        self.maxEntries = maxEntries
+        self.evictionInterval = evictionInterval
+
+        self.hits = 0
+        self.misses = 0
+        self.savedEngineTime = 0.
+        self.numberOfInsertsSinceEviction = 0
+
+        # A hit only refreshes the entry's lastUsed in memory, so that lookups stay read-only transactions, which several processes run at once;
+        # the refreshed times are written in one transaction before an eviction, on close, or once evictionInterval of them are waiting
+        self.pendingLastUsed = {}
+
+        self.lock = threading.Lock()
+
+        # WAL journaling lets several generator processes read the cache while one of them is writing
+        self.connection = sqlite3.connect(self.cacheFilePath, timeout=30., isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS evaluations (zobristKey INTEGER NOT NULL, searchLimit TEXT NOT NULL, score INTEGER NOT NULL, lastUsed INTEGER NOT NULL, PRIMARY KEY (zobristKey, searchLimit)) WITHOUT ROWID")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS evaluationsLastUsed ON evaluations (lastUsed)")
+
+    def __str__(self):
+        return "EvaluationCache({})".format(self.cacheFilePath)
+
+    def settings(self):
+        # Arguments from which another process opens the same cache (see DataGenerator.initializeWorker)
+        return {"cacheFileName": self.cacheFileName, "maxEntries": self.maxEntries, "evictionInterval": self.evictionInterval}
+
+    @staticmethod
+    def key(board, limit):
+        zobristKey = chess.polyglot.zobrist_hash(board)
+
+        # SQLite integers are signed 64-bit values
+        if zobristKey >= 2**63:
+            zobristKey -= 2**64
+
+        return zobristKey, repr(limit)
+
+    def get(self, board, limit, creditedTime=None):
+        # creditedTime: engine seconds saved by a hit (limit.time by default, less when the evaluation shared its search with others)
+        zobristKey, searchLimit = EvaluationCache.key(board, limit)
+
+        with self.lock:
+            row = self.connection.execute("SELECT score FROM evaluations WHERE zobristKey = ? AND searchLimit = ?", (zobristKey, searchLimit)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            if creditedTime is not None:
+                self.savedEngineTime += creditedTime
+            elif limit.time is not None:
+                self.savedEngineTime += limit.time
+
+            self.pendingLastUsed[(zobristKey, searchLimit)] = time.time_ns()
+            if len(self.pendingLastUsed) >= self.evictionInterval:
+                self.writeLastUsed()
+
+        return row[0]
+
+    def put(self, board, limit, score):
+        zobristKey, searchLimit = EvaluationCache.key(board, limit)
+
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO evaluations (zobristKey, searchLimit, score, lastUsed) VALUES (?, ?, ?, ?)", (zobristKey, searchLimit, int(score), time.time_ns()))
+
+            self.numberOfInsertsSinceEviction += 1
+            if self.numberOfInsertsSinceEviction >= self.evictionInterval:
+                self.numberOfInsertsSinceEviction = 0
+                self.evict()
+
+    def writeLastUsed(self):
+        # Called with the lock held
+        if not self.pendingLastUsed:
+            return
+
+        self.connection.execute("BEGIN")
+        try:
+            self.connection.executemany("UPDATE evaluations SET lastUsed = ? WHERE zobristKey = ? AND searchLimit = ?", [(lastUsed, zobristKey, searchLimit) for (zobristKey, searchLimit), lastUsed in self.pendingLastUsed.items()])
+            self.connection.execute("COMMIT")
+        except:
+            self.connection.execute("ROLLBACK")
+            raise
+
+        self.pendingLastUsed = {}
+
+    def evict(self):
+        # The entries used since the last write must not be evicted as if they had not been
+        self.writeLastUsed()
+
+        numberOfEntries = self.connection.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+        if numberOfEntries > self.maxEntries:
+            self.connection.execute("DELETE FROM evaluations WHERE (zobristKey, searchLimit) IN (SELECT zobristKey, searchLimit FROM evaluations ORDER BY lastUsed LIMIT ?)", (numberOfEntries - self.maxEntries,))
+
+    def addStatistics(self, hits, misses, savedEngineTime):
+        # Counts of lookups made on another connection to the same file, e.g. by a worker process
+        self.hits += hits
+        self.misses += misses
+        self.savedEngineTime += savedEngineTime
+
+    def statistics(self):
+        return self.hits, self.misses, self.savedEngineTime
+
+    def hitRate(self):
+        numberOfLookups = self.hits + self.misses
+        return self.hits / numberOfLookups if numberOfLookups > 0 else 0.
+
+    def printStatistics(self):
+        print("\n=======================================================================================")
+        print("Evaluation cache {}: {} hits, {} misses (hit rate {:.1%}), about {:.1f} secs. of engine time saved".format(self.cacheFilePath, self.hits, self.misses, self.hitRate(), self.savedEngineTime))
+
+    def close(self):
+        with self.lock:
+            self.writeLastUsed()
+            self.connection.close()
@@ -0,0 +1,158 @@
+import os
+import json
+import time
+
+import numpy as np
+
+class RecordWriter():
+
+    # Every record is stored as float64 values: the index of the game it comes from, followed by the record itself
+    RECORD_DTYPE = np.dtype("<f8")
+
+    def __init__(self, recordFilePath, numberOfColumns, isResumed=False, gamesPerChunk=16, flushInterval=30., pgnFilePath=None):
+
+        self.recordFilePath = recordFilePath
+        self.progressFilePath = RecordWriter.progressFilePathOf(recordFilePath)
+
+        # The PGN of every game, when given, is committed in the same chunk as its records: a game played again after an interruption
+        # is never written twice to the PGN (see OpeningBook.build)
+        self.pgnFilePath = pgnFilePath
+
+        self.numberOfColumns = numberOfColumns
+        self.recordSize = (numberOfColumns + 1) * RecordWriter.RECORD_DTYPE.itemsize
+
+        # Finished games are buffered, then appended as one chunk when gamesPerChunk games are waiting or flushInterval seconds have passed
+        self.gamesPerChunk = gamesPerChunk
+        self.flushInterval = flushInterval
+
+        self.bufferedGames = []
+        self.lastFlushTime = time.perf_counter()
+
+        self.numberOfRecords = 0
+        self.completedGames = set()
+
+        # Byte offsets (start, end) of the PGN of every committed game, by game index
+        self.pgnOffsets = {}
+        self.pgnSize = 0
+
+        if isResumed and os.path.exists(self.progressFilePath):
+            progress = RecordWriter.readProgress(recordFilePath)
+            if progress["numberOfColumns"] != numberOfColumns:
+                raise ValueError("Cannot resume {}: it stores {} columns, not {}".format(recordFilePath, progress["numberOfColumns"], numberOfColumns))
+
+            self.numberOfRecords = progress["numberOfRecords"]
+            self.completedGames = set(progress["completedGames"])
+            self.pgnOffsets = {gameIndex: (start, end) for gameIndex, start, end in progress.get("pgnOffsets", [])}
+            self.pgnSize = progress.get("pgnSize", 0)
+
+            # Anything after the last committed chunk belongs to games that were interrupted; they will be played again
+            with open(self.recordFilePath, "r+b") as file:
+                file.truncate(self.numberOfRecords * self.recordSize)
+            if self.pgnFilePath is not None:
+                with open(self.pgnFilePath, "ab") as file:
+                    file.truncate(self.pgnSize)
+        else:
+            open(self.recordFilePath, "wb").close()
+            if self.pgnFilePath is not None:
+                open(self.pgnFilePath, "wb").close()
+            self.writeProgress()
+
+        self.file = open(self.recordFilePath, "ab")
+        self.pgnFile = open(self.pgnFilePath, "ab") if self.pgnFilePath is not None else None
+
+    def __str__(self):
+        return "RecordWriter({}: {} records, {} games)".format(self.recordFilePath, self.numberOfRecords, len(self.completedGames))
+
+    @staticmethod
+    def progressFilePathOf(recordFilePath):
+        return recordFilePath + ".json"
+
+    def isGameCompleted(self, gameIndex):
+        return gameIndex in self.completedGames
+
+    def writeGame(self, gameIndex, records, pgn=None):
+        records = np.asarray(records, dtype=RecordWriter.RECORD_DTYPE).reshape(-1, self.numberOfColumns)
+
+        gameRecords = np.empty((records.shape[0], self.numberOfColumns + 1), dtype=RecordWriter.RECORD_DTYPE)
+        gameRecords[:, 0] = gameIndex
+        gameRecords[:, 1:] = records
+
+        self.bufferedGames.append((gameIndex, gameRecords, pgn))
+
+        if len(self.bufferedGames) >= self.gamesPerChunk or time.perf_counter() - self.lastFlushTime >= self.flushInterval:
+            self.flush()
+
+    def flush(self):
+        if self.bufferedGames:
+            for gameIndex, gameRecords, pgn in self.bufferedGames:
+                self.file.write(gameRecords.tobytes())
+                self.numberOfRecords += gameRecords.shape[0]
+                self.completedGames.add(gameIndex)
+
+                if self.pgnFile is not None and pgn is not None:
+                    pgn = pgn.encode("utf-8")
+                    self.pgnFile.write(pgn)
+                    self.pgnOffsets[gameIndex] = (self.pgnSize, self.pgnSize + len(pgn))
+                    self.pgnSize += len(pgn)
+
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            if self.pgnFile is not None:
+                self.pgnFile.flush()
+                os.fsync(self.pgnFile.fileno())
+
+            # The games only count as completed once their records are safely on disk
+            self.writeProgress()
+
+            self.bufferedGames = []
+
+        self.lastFlushTime = time.perf_counter()
+
+    def writeProgress(self):
+        progress = {
+            "numberOfColumns": self.numberOfColumns,
+            "numberOfRecords": self.numberOfRecords,
+            "completedGames": sorted(self.completedGames)
+        }
+        if self.pgnFilePath is not None:
+            progress["pgnFilePath"] = self.pgnFilePath
+            progress["pgnSize"] = self.pgnSize
+            progress["pgnOffsets"] = [[gameIndex, start, end] for gameIndex, (start, end) in sorted(self.pgnOffsets.items())]
+
+        # Written aside then renamed, so that an interruption never leaves a half-written progress file
+        temporaryFilePath = self.progressFilePath + ".tmp"
+        with open(temporaryFilePath, "w") as file:
+            json.dump(progress, file)
+        os.replace(temporaryFilePath, self.progressFilePath)
+
+    def close(self):
+        self.flush()
+        self.file.close()
+        if self.pgnFile is not None:
+            self.pgnFile.close()
+
+    @staticmethod
+    def readProgress(recordFilePath):
+        with open(RecordWriter.progressFilePathOf(recordFilePath), "r") as file:
+            return json.load(file)
+
+    @staticmethod
+    def readRecords(recordFilePath):
+        # Memory-mapped (number of records, 1 + number of columns) view of the committed records; column 0 is the game index
+        progress = RecordWriter.readProgress(recordFilePath)
+        if progress["numberOfRecords"] == 0:
+            return np.empty((0, progress["numberOfColumns"] + 1), dtype=RecordWriter.RECORD_DTYPE)
+
+        return np.memmap(recordFilePath, dtype=RecordWriter.RECORD_DTYPE, mode="r", shape=(progress["numberOfRecords"], progress["numberOfColumns"] + 1))
+
+    @staticmethod
+    def readPgns(recordFilePath):
+        # PGN of every committed game, by game index (empty when the games were written without PGN)
+        progress = RecordWriter.readProgress(recordFilePath)
+        if progress.get("pgnFilePath") is None:
+            return {}
+
+        with open(progress["pgnFilePath"], "rb") as file:
+            pgnData = file.read(progress["pgnSize"])
+
+        return {gameIndex: pgnData[start:end].decode("utf-8") for gameIndex, start, end in progress["pgnOffsets"]}
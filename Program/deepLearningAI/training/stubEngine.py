@@ -0,0 +1,100 @@
+import sys
+
+import chess
+
+# A small stand-in UCI engine, used to exercise the engine pool, the bots and the data generator without Stockfish:
+#   EnginePool(enginePath=[sys.executable, "./deepLearningAI/training/stubEngine.py"])
+# Positions are scored with a plain material count, which is enough to produce deterministic, sign-correct evaluations.
+
+PIECE_VALUES = {
+    chess.PAWN: 100,
+    chess.KNIGHT: 300,
+    chess.BISHOP: 300,
+    chess.ROOK: 500,
+    chess.QUEEN: 900,
+    chess.KING: 0
+}
+
+def materialBalance(board):
+    # Material balance from the point of view of the side to move
+    score = 0
+    for pieceType, value in PIECE_VALUES.items():
+        score += value * (len(board.pieces(pieceType, chess.WHITE)) - len(board.pieces(pieceType, chess.BLACK)))
+
+    return score if board.turn == chess.WHITE else -score
+
+def send(line):
+    sys.stdout.write(line + "\n")
+    sys.stdout.flush()
+
+def search(board, multiPV, searchMoves):
+    rootMoves = searchMoves if searchMoves else list(board.legal_moves)
+    if not rootMoves:
+        send("info depth 0 score cp 0")
+        send("bestmove 0000")
+        return
+
+    # Score each root move one ply deep, from the point of view of the side to move at the root
+    scoredMoves = []
+    for move in rootMoves:
+        board.push(move)
+        scoredMoves.append((-materialBalance(board), move))
+        board.pop()
+
+    scoredMoves.sort(key=lambda scoredMove: scoredMove[0], reverse=True)
+
+    for i in range(0, min(multiPV, len(scoredMoves))):
+        score, move = scoredMoves[i]
+        send("info depth 1 seldepth 1 multipv {} score cp {} nodes {} pv {}".format(i + 1, score, len(rootMoves), move.uci()))
+
+    send("bestmove {}".format(scoredMoves[0][1].uci()))
+
+def main():
+    board = chess.Board()
+    multiPV = 1
+
+    for line in sys.stdin:
+        tokens = line.split()
+        if not tokens:
+            continue
+
+        command = tokens[0]
+        if command == "uci":
+            send("id name StubEngine")
+            send("id author chessbot-with-dnn")
+            send("option name Hash type spin default 16 min 1 max 33554432")
+            send("option name Threads type spin default 1 min 1 max 1024")
+            send("option name MultiPV type spin default 1 min 1 max 500")
+            send("uciok")
+        elif command == "isready":
+            send("readyok")
+        elif command == "setoption":
+            if len(tokens) >= 5 and tokens[2] == "MultiPV":
+                multiPV = int(tokens[4])
+        elif command == "ucinewgame":
+            board = chess.Board()
+        elif command == "position":
+            if tokens[1] == "startpos":
+                board = chess.Board()
+                movesIndex = 2
+            else:
+                movesIndex = tokens.index("moves") if "moves" in tokens else len(tokens)
+                board = chess.Board(" ".join(tokens[2:movesIndex]))
+
+            for move in tokens[movesIndex + 1:]:
+                board.push_uci(move)
+        elif command == "go":
+            searchMoves = []
+            if "searchmoves" in tokens:
+                for token in tokens[tokens.index("searchmoves") + 1:]:
+                    try:
+                        searchMoves.append(chess.Move.from_uci(token))
+                    except ValueError:
+                        break
+
+            search(board, multiPV, searchMoves)
+        elif command == "quit":
+            break
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+import os
+import sys
+import json
+import time
+
+# Peak resident memory is read from getrusage, which only exists on Unix
+try:
+    import resource
+except ImportError:
+    resource = None
+
+class Telemetry():
+
+    def __init__(self, logFileName, logDirectory="./deepLearningAI/logs"):
+
+        # Training metrics, one JSON object per line of ./deepLearningAI/logs/<logFileName>.jsonl:
+        #   - {"type": "batch", ...}: cost, MAE and samples per second of every batch
+        #   - {"type": "epoch", ...}: averages of the epoch, validation cost and MAE, forward / backward seconds of every layer, peak RSS
+        #     (the layers are null when they were not timed, i.e. when they run in data-parallel worker processes)
+        # The Trainer only creates a Telemetry when it is enabled; without one, training runs exactly the uninstrumented code
+        os.makedirs(logDirectory, exist_ok=True)
+        self.logFilePath = os.path.join(logDirectory, "{}.jsonl".format(logFileName))
+        self.logFile = open(self.logFilePath, "a", buffering=1 << 16)
+
+        # Seconds spent in forward and backward by each timed component, since the start of the epoch
+        self.layerTimings = {}
+        self.instrumentedComponents = []
+
+        self.batchStartTime = None
+        self.epochStartTime = None
+
+    def __str__(self):
+        return "Telemetry({})".format(self.logFilePath)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exceptionType, exceptionValue, exceptionTraceback):
+        self.close()
+
+    def instrument(self, dnn):
+        # Time the forward and backward passes of every linear and activation layer, and of the loss, by shadowing their methods on the instances;
+        # uninstrument() removes the shadows, so a network which is not instrumented pays nothing
+        for i, layer in enumerate(dnn.layers()):
+            self.timeComponent(layer.linearLayer, "layers.{}.linear".format(i))
+            self.timeComponent(layer.activationFunctionLayer, "layers.{}.{}".format(i, layer.activationFunctionLayer))
+        self.timeComponent(dnn.costFunction, "loss")
+
+    def timeComponent(self, component, name):
+        timings = self.layerTimings.setdefault(name, [0., 0.])
+        forward = component.forward
+        backward = component.backward
+
+        def timedForward(*arguments, **keywordArguments):
+            startTime = time.perf_counter()
+            result = forward(*arguments, **keywordArguments)
+            timings[0] += time.perf_counter() - startTime
+            return result
+
+        def timedBackward(*arguments, **keywordArguments):
+            startTime = time.perf_counter()
+            result = backward(*arguments, **keywordArguments)
+            timings[1] += time.perf_counter() - startTime
+            return result
+
+        component.forward = timedForward
+        component.backward = timedBackward
+        self.instrumentedComponents.append(component)
+
+    def uninstrument(self):
+        for component in self.instrumentedComponents:
+            del component.forward
+            del component.backward
+        self.instrumentedComponents = []
+
+    @staticmethod
+    def peakResidentMemory():
+        # Peak resident set size of the process in MB (None where it cannot be measured); ru_maxrss is in KB on Linux, in bytes on macOS
+        if resource is None:
+            return None
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        return peak / (1 << 20) if sys.platform == "darwin" else peak / (1 << 10)
+
+    def write(self, record):
+        self.logFile.write(json.dumps(record) + "\n")
+
+    def startEpoch(self, epoch):
+        for timings in self.layerTimings.values():
+            timings[0] = timings[1] = 0.
+
+        self.epoch = epoch
+        self.epochStartTime = time.perf_counter()
+        self.batchStartTime = self.epochStartTime
+
+    def recordBatch(self, batch, numberOfExamples, cost, mae):
+        endTime = time.perf_counter()
+        seconds = endTime - self.batchStartTime
+        self.batchStartTime = endTime
+
+        self.write({"type": "batch", "epoch": self.epoch, "batch": batch, "examples": numberOfExamples, "seconds": seconds,
+                    "samplesPerSecond": numberOfExamples / seconds if seconds > 0 else None, "cost": float(cost), "mae": float(mae)})
+
+    def endEpoch(self, numberOfExamples, cost, mae):
+        # Epoch record of the training part of the epoch (the validation forward passes are not counted); completed by recordEpoch()
+        seconds = time.perf_counter() - self.epochStartTime
+
+        return {"type": "epoch", "epoch": self.epoch, "examples": numberOfExamples, "seconds": seconds,
+                "samplesPerSecond": numberOfExamples / seconds if seconds > 0 else None, "cost": float(cost), "mae": float(mae),
+                "layers": {name: {"forward": timings[0], "backward": timings[1]} for name, timings in self.layerTimings.items()} if self.instrumentedComponents else None}
+
+    def recordEpoch(self, record, validationCost, validationMae):
+        record = dict(record, validationCost=float(validationCost), validationMae=float(validationMae), peakResidentMemory=Telemetry.peakResidentMemory())
+        self.write(record)
+        self.logFile.flush()
+
+        return record
+
+    @staticmethod
+    def formatLayerTimings(record):
+        # E.g. "layers.0.linear 12.1/25.3 ms, layers.0.ReLU 1.2/1.5 ms, ..." (forward / backward)
+        if record["layers"] is None:
+            return "not timed"
+
+        return ", ".join("{} {:.1f}/{:.1f} ms".format(name, timings["forward"] * 1e3, timings["backward"] * 1e3) for name, timings in record["layers"].items())
+
+    def close(self):
+        self.uninstrument()
+        if not self.logFile.closed:
+            self.logFile.close()
@@ -1,30 +1,104 @@
+import os
+import time
+import contextlib
+
 import pandas as pd
 import numpy as np
 
 from deepLearningAI.deepNeuralNetwork.neuralNetwork import NeuralNetwork
+from deepLearningAI.deepNeuralNetwork.optimizers import Optimizer, LearningRateSchedule
+from deepLearningAI.training.dataset import Dataset
+from deepLearningAI.training.dataParallel import DataParallelGroup
+from deepLearningAI.training.dataLoader import DataLoader
+from deepLearningAI.training.telemetry import Telemetry
 
 class Trainer:
     
-    def __init__(self, dataFileName, activationFunctionsOfHiddenLayers="ReLU", numberOfEpoches=10, batchSize=0):     
+    def __init__(self, dataFileName, activationFunctionsOfHiddenLayers="ReLU", numberOfEpoches=10, batchSize=0, lossFunction="BinaryCrossEntropy", optimizer="Adam", learningRate=None, learningRateSchedule="Constant", warmupSteps=0, numberOfWorkers=1, validationFraction=0.1, patience=10, isResumed=False, summaryInterval=0, isTelemetryEnabled=False):     
         
         self.dataFileName = dataFileName
+        self.dataset = None
+        
+        # Record indices of the training examples in the dataset, when training from a binary dataset (None from a CSV file)
+        self.trainIndices = None
         self.activationFunctionsOfHiddenLayers = activationFunctionsOfHiddenLayers
         
-        self.dnn = NeuralNetwork(inputDimension=72, hiddenDimensions=[8], outputDimension=1, activationFunctions=[activationFunctionsOfHiddenLayers] * 1 + ["Sigmoid"])
+        # BinaryCrossEntropy (fused with the output Sigmoid), MeanSquaredError or Huber, see losses.py
+        self.lossFunction = lossFunction
+        
+        self.dnn = NeuralNetwork(inputDimension=72, hiddenDimensions=[8], outputDimension=1, activationFunctions=[activationFunctionsOfHiddenLayers] * 1 + ["Sigmoid"], costFunction=lossFunction)
         
         self.xTrain, self.yTrain, self.xTest, self.yTest = self.readData(dataFileName=dataFileName)
         
+        # A part of the training split is held out to be evaluated after every epoch; the test split is only used by test()
+        self.xTrain, self.yTrain, self.xValidation, self.yValidation = self.splitValidation(validationFraction=validationFraction)
+        
         self.numberOfEpoches = numberOfEpoches
         
+        # batchSize is the number of examples per mini-batch (0 for full-batch gradient descent)
         self.batchSize = batchSize
-        if self.batchSize == 0:
-            self.trainWithStochasticGD(numberOfEpoches=self.numberOfEpoches)
-        else:
-            self.trainWithMiniBatchGD(numberOfEpoches=self.numberOfEpoches, batchSize=self.batchSize)
+        self.dataLoader = None
+        
+        # SGD, Momentum, Nesterov, RMSProp or Adam (see optimizers.py), stored with the model; the schedule (Constant, Step or Cosine) spans the whole run
+        self.optimizerName = optimizer
+        schedule = LearningRateSchedule.initializeSchedule(scheduleName=learningRateSchedule, totalSteps=self.numberOfEpoches * self.numberOfBatchesPerEpoch(), warmupSteps=warmupSteps)
+        self.dnn.optimizer = Optimizer.initializeOptimizer(optimizerName=optimizer, learningRate=learningRate, schedule=schedule)
+        self.dnn.printNeuralNetwork()
+        
+        # With several workers, mini-batch training splits every batch across processes (see DataParallelGroup)
+        self.numberOfWorkers = numberOfWorkers
+        
+        # Training stops once the validation cost has not improved for patience epochs (never with 0).
+        # The model with the best validation cost is saved under the model's file name, and the last epoch's state in a checkpoint next to it
+        self.patience = patience
+        self.trainingState = {"epoch": 0, "bestEpoch": 0, "bestValidationCost": None, "epochsWithoutImprovement": 0, "history": []}
+        
+        # The console shows a summary every summaryInterval batches (only the epoch summaries with 0).
+        # With telemetry, the metrics of every batch and epoch, per-layer timings included, are also written to ./deepLearningAI/logs (see Telemetry)
+        self.summaryInterval = summaryInterval
+        self.telemetry = None
+        
+        # Without any epoch to train, the trainer is only set up (e.g. by the benchmarks)
+        if self.numberOfEpoches <= 0:
+            return
+        
+        # An interrupted run continues from its last checkpoint: weights, optimizer state, random generator state and epoch count
+        if isResumed:
+            self.resume(modelFileName=self.modelFileName(numberOfEpoches=self.numberOfEpoches, batchSize=self.batchSize))
+        
+        if isTelemetryEnabled:
+            self.telemetry = Telemetry(logFileName=self.modelFileName(numberOfEpoches=self.numberOfEpoches, batchSize=self.batchSize)[:-len(".npz")])
+            self.telemetry.write(dict({"type": "run"}, **self.trainingMetadata(numberOfEpoches=self.numberOfEpoches, batchSize=self.batchSize)["training"], network=str(self.dnn)))
+        
+        try:
+            if self.batchSize == 0:
+                self.trainWithStochasticGD(numberOfEpoches=self.numberOfEpoches)
+            else:
+                self.trainWithMiniBatchGD(numberOfEpoches=self.numberOfEpoches, batchSize=self.batchSize)
+        finally:
+            if self.telemetry is not None:
+                self.telemetry.close()
+        
+        # The best model is the one which is kept, and tested
+        self.dnn = NeuralNetwork.load(modelFileName=self.modelFileName(numberOfEpoches=self.numberOfEpoches, batchSize=self.batchSize), dtype=self.dnn.dtype)
         
         self.test()
                 
     def readData(self, dataFileName):
+        # A binary dataset (see Dataset) is used when one exists, otherwise the CSV file
+        if Dataset.exists(dataFileName):
+            self.dataset = Dataset(dataFileName)
+            
+            # Same split as the CSV path below, computed on the record indices only.
+            # The training features are not gathered: mini-batches are read from the memory-mapped dataset (see createDataLoader)
+            self.trainIndices = pd.Series(np.arange(len(self.dataset))).sample(frac=0.8, random_state=42).to_numpy()
+            testIndices = np.setdiff1d(np.arange(len(self.dataset)), self.trainIndices)
+            
+            yTrain = np.asarray(self.dataset.labels[self.trainIndices], dtype=np.float32)
+            xTest, yTest = self.dataset.gather(testIndices)
+            
+            return None, yTrain, xTest.transpose(), yTest
+        
         data = pd.read_csv("./deepLearningAI/data/{}.csv".format(dataFileName))
         
         trainData = data.copy().sample(frac=0.8, random_state=42)
@@ -36,72 +110,297 @@ class Trainer:
         xTest = testData.iloc[:, :72].to_numpy()
         yTest = testData.iloc[:, -1].to_numpy()
         
+        # The features are converted once to the compute dtype of the network, rather than batch by batch,
+        # and stored one example per row (pandas hands out column-major arrays), so that batches gather contiguous rows
+        xTrain = np.ascontiguousarray(xTrain, dtype=self.dnn.dtype)
+        xTest = np.ascontiguousarray(xTest, dtype=self.dnn.dtype)
+        
         return xTrain.transpose(), yTrain, xTest.transpose(), yTest
     
-    def trainWithStochasticGD(self, numberOfEpoches):
+    def splitValidation(self, validationFraction):
+        # The training examples are split into training and validation examples, whose features stay one example per row
+        numberOfExamples = len(self.yTrain)
+        validationIndices = np.sort(pd.Series(np.arange(numberOfExamples)).sample(frac=validationFraction, random_state=42).to_numpy())
+        trainIndices = np.setdiff1d(np.arange(numberOfExamples), validationIndices)
         
-        print("\n========================================================================================================================")
-        print("TRAINING: (with Stochastic Gradient Descend)")
-        trainingCosts = []
-        maes = []
-        for epoch in range(0, numberOfEpoches):
+        if self.xTrain is None:
+            # From a dataset, only the validation examples are gathered; the training ones stay record indices
+            xValidation, yValidation = self.dataset.gather(self.trainIndices[validationIndices])
+            self.trainIndices = self.trainIndices[trainIndices]
+            
+            return None, self.yTrain[trainIndices], xValidation.transpose(), yValidation
+        
+        examples = self.xTrain.transpose()
+        
+        return examples[trainIndices].transpose(), self.yTrain[trainIndices], examples[validationIndices].transpose(), self.yTrain[validationIndices]
+    
+    def trainingFeatures(self):
+        # (72, number of training examples) features of the training split. Full-batch training and the data-parallel workers' shared copy
+        # need the whole split in memory: from a dataset, it is only gathered then, once
+        if self.xTrain is None:
+            xTrain, _ = self.dataset.gather(self.trainIndices)
+            self.xTrain = xTrain.transpose()
+            
+        return self.xTrain
+    
+    def numberOfTrainingExamples(self):
+        return len(self.yTrain)
+    
+    def startDataParallelGroup(self):
+        if self.numberOfWorkers <= 1:
+            return None
+        
+        return DataParallelGroup(dnn=self.dnn, xTrain=self.trainingFeatures(), yTrain=self.yTrain, numberOfWorkers=self.numberOfWorkers)
+    
+    def createDataLoader(self, batchSize):
+        # Shuffled batches of batchSize training examples, gathered into reusable buffers: straight from the memory-mapped dataset when there is one.
+        # A data-parallel group gathers its batches from its own shared copy, by position in the training split, so it gets a loader over that copy
+        if self.dataLoader is None or self.dataLoader.batchSize != batchSize:
+            if self.dataset is not None and self.numberOfWorkers <= 1:
+                self.dataLoader = DataLoader(source=self.dataset, indices=self.trainIndices, batchSize=batchSize, dtype=self.dnn.dtype)
+            else:
+                self.dataLoader = DataLoader(source=(self.trainingFeatures().transpose(), self.yTrain), batchSize=batchSize, dtype=self.dnn.dtype)
+            
+        return self.dataLoader
+    
+    def trainOneEpoch(self, batchSize, group=None):
+        epochCosts = []
+        epochMaes = []
+        
+        dataLoader = self.createDataLoader(batchSize=batchSize)
+        numberOfBatches = len(dataLoader)
+        
+        # A data-parallel group gathers each batch from its shared copy of the training data, so it only needs the indices
+        if group is None:
+            batches = ((xBatch, yBatch, None) for (xBatch, yBatch) in dataLoader)
+        else:
+            batches = ((None, self.yTrain[batchIndices], batchIndices) for batchIndices in dataLoader.indexBatches())
+        
+        summaryStartTime = time.perf_counter()
+        summaryExamples = 0
+        
+        for batch, (xBatch, yBatch, batchIndices) in enumerate(batches):
             # Forward propagation
-            scores, cost = self.dnn.forward(X=self.xTrain, labels=self.yTrain, training=True)
+            if group is None:
+                batchScores, cost = self.dnn.forward(X=xBatch, labels=yBatch, training=True)
+            else:
+                batchScores, cost = group.forward(batchIndices=batchIndices)
             
             # Calculate Mean Absolute Error (MAE)
-            mae = np.mean(np.abs(scores - self.yTrain))
-        
-            print("\n     Epoch [{}/{}]; Cost: {}; MAE: {}".format(epoch + 1, numberOfEpoches, cost, mae))
-            print("   -----------------------------------------------------------------------------------------------------------")
+            mae = np.mean(np.abs(batchScores - yBatch))
+            
+            epochCosts.append(cost)
+            epochMaes.append(mae)
+            
+            if self.telemetry is not None:
+                self.telemetry.recordBatch(batch=batch + 1, numberOfExamples=len(yBatch), cost=cost, mae=mae)
             
-            trainingCosts.append(cost)
-            maes.append(mae)
+            # Printing every batch costs a measurable part of an epoch, so the console only gets a summary every summaryInterval batches
+            if self.summaryInterval > 0:
+                summaryExamples += len(yBatch)
+                if (batch + 1) % self.summaryInterval == 0 or batch + 1 == numberOfBatches:
+                    summaryEndTime = time.perf_counter()
+                    print("\n       Batch [{}/{}]; Cost: {}; MAE: {}; Samples/s: {:.0f}".format(batch + 1, numberOfBatches, np.mean(epochCosts[-self.summaryInterval:]), np.mean(epochMaes[-self.summaryInterval:]), summaryExamples / max(summaryEndTime - summaryStartTime, 1e-9)))
+                    summaryStartTime = summaryEndTime
+                    summaryExamples = 0
+            
+        return np.mean(epochCosts), np.mean(epochMaes)
+    
+    def numberOfBatchesPerEpoch(self):
+        if self.batchSize == 0:
+            return 1
+        
+        return -(-self.numberOfTrainingExamples() // self.batchSize)
+    
+    def trainWithStochasticGD(self, numberOfEpoches):
+        
+        print("\n========================================================================================================================")
+        print("TRAINING: (with Stochastic Gradient Descend; Optimizer: {})".format(self.dnn.optimizer))
+        
+        def trainEpoch():
+            # Forward propagation
+            scores, cost = self.dnn.forward(X=self.trainingFeatures(), labels=self.yTrain, training=True)
             
-        trainingCosts = np.array(trainingCosts)
-        maes = np.array(maes)
+            # Calculate Mean Absolute Error (MAE)
+            return cost, np.mean(np.abs(scores - self.yTrain))
         
-        NeuralNetwork.save(model=self.dnn, modelFileName="ModelDataFile-'{}'__HiddenLayersActivationFunction-'{}'__Epoches-'{}'__StochasticGD.pickle".format(self.dataFileName, self.activationFunctionsOfHiddenLayers, numberOfEpoches))
+        self.trainEpochs(numberOfEpoches=numberOfEpoches, batchSize=0, trainEpoch=trainEpoch)
         
     def trainWithMiniBatchGD(self, numberOfEpoches, batchSize):
         
         print("\n========================================================================================================================")
-        print("TRAINING: (with Mini-batch Gradient Descend - Batch Size: {})".format(batchSize))
-        for epoch in range(0, numberOfEpoches):
+        print("TRAINING: (with Mini-batch Gradient Descend - Batch Size: {}; Optimizer: {}; Workers: {})".format(batchSize, self.dnn.optimizer, self.numberOfWorkers))
+        
+        group = self.startDataParallelGroup()
+        try:
+            self.trainEpochs(numberOfEpoches=numberOfEpoches, batchSize=batchSize, trainEpoch=lambda: self.trainOneEpoch(batchSize=batchSize, group=group))
+        finally:
+            if group is not None:
+                group.close()
+    
+    def trainEpochs(self, numberOfEpoches, batchSize, trainEpoch):
+        # Runs trainEpoch (which returns the epoch's average cost and MAE) from the current epoch of the training state, then after each epoch:
+        # evaluates the validation examples, saves the model when it is the best so far, saves the last checkpoint, and stops early without improvement
+        modelFileName = self.modelFileName(numberOfEpoches=numberOfEpoches, batchSize=batchSize)
+        state = self.trainingState
+        
+        if state["epoch"] > 0:
+            print("\n     Resumed after epoch {} (best validation cost {} at epoch {})".format(state["epoch"], state["bestValidationCost"], state["bestEpoch"]))
+        
+        # With data-parallel workers, the layers run in the worker processes: the parent's copy would only report zero timings, so none are written
+        if self.telemetry is not None and (batchSize == 0 or self.numberOfWorkers <= 1):
+            self.telemetry.instrument(self.dnn)
+        try:
+            self.runEpochs(numberOfEpoches=numberOfEpoches, batchSize=batchSize, trainEpoch=trainEpoch, modelFileName=modelFileName)
+        finally:
+            if self.telemetry is not None:
+                self.telemetry.uninstrument()
+    
+    def runEpochs(self, numberOfEpoches, batchSize, trainEpoch, modelFileName):
+        state = self.trainingState
+        
+        for epoch in range(state["epoch"], numberOfEpoches):
             print("\n     Epoch [{}/{}]:".format(epoch + 1, numberOfEpoches))
             
-            epochCosts = []
-            epochMaes = []
+            if self.telemetry is not None:
+                self.telemetry.startEpoch(epoch=epoch + 1)
+            startTime = time.perf_counter()
             
-            randomIndices = np.random.choice(self.xTrain.shape[1], size=self.xTrain.shape[1], replace=False)
-            xShuffle = self.xTrain[:, randomIndices]
-            yShuffle = self.yTrain[randomIndices]
+            averageCost, averageMae = trainEpoch()
             
-            xBatches = np.array_split(xShuffle, batchSize, axis=1)
-            yBatches = np.array_split(yShuffle, batchSize)
+            elapsedTime = time.perf_counter() - startTime
+            if self.telemetry is not None:
+                epochRecord = self.telemetry.endEpoch(numberOfExamples=self.numberOfTrainingExamples(), cost=averageCost, mae=averageMae)
             
-            scores = []
+            validationCost, validationMae = self.validate()
             
-            for batch in range(0, min(len(xBatches), len(yBatches))):
-                # Forward propagation
-                batchScores, cost = self.dnn.forward(X=xBatches[batch], labels=yBatches[batch], training=True)
-                
-                # Calculate Mean Absolute Error (MAE)
-                mae = np.mean(np.abs(batchScores - yBatches[batch]))
-                
-                print("\n       Batch [{}/{}]; Cost: {}; MAE: {}".format(batch + 1, min(len(xBatches), len(yBatches)), cost, mae))
-                
-                epochCosts.append(cost)
-                epochMaes.append(mae)
-                
-                scores = np.append(scores, batchScores)
+            print("\n     Epoch's Average Cost: {}; Epoch's Average MAE: {}; Samples/s: {:.0f}".format(averageCost, averageMae, self.numberOfTrainingExamples() / max(elapsedTime, 1e-9)))
+            print("     Validation Cost: {}; Validation MAE: {}".format(validationCost, validationMae))
+            
+            if self.telemetry is not None:
+                epochRecord = self.telemetry.recordEpoch(epochRecord, validationCost=validationCost, validationMae=validationMae)
+                print("     Layers (forward/backward): {}; Peak RSS: {} MB".format(Telemetry.formatLayerTimings(epochRecord), epochRecord["peakResidentMemory"]))
+            
+            state["epoch"] = epoch + 1
+            state["history"].append({"epoch": epoch + 1, "cost": float(averageCost), "mae": float(averageMae), "validationCost": float(validationCost), "validationMae": float(validationMae)})
+            
+            if state["bestValidationCost"] is None or validationCost < state["bestValidationCost"]:
+                state["bestValidationCost"] = float(validationCost)
+                state["bestEpoch"] = epoch + 1
+                state["epochsWithoutImprovement"] = 0
                 
-            averageCost = np.mean(epochCosts)
-            averageMae = np.mean(epochMaes)
+                NeuralNetwork.save(model=self.dnn, modelFileName=modelFileName, metadata=self.trainingMetadata(numberOfEpoches=numberOfEpoches, batchSize=batchSize))
+                print("     Best model so far, saved")
+            else:
+                state["epochsWithoutImprovement"] += 1
             
-            print("\n     Epoch's Average Cost: {}; Epoch's Average MAE: {}".format(averageCost, averageMae))
+            self.saveCheckpoint(modelFileName=modelFileName, numberOfEpoches=numberOfEpoches, batchSize=batchSize)
             print("   -----------------------------------------------------------------------------------------------------------")
             
-        NeuralNetwork.save(model=self.dnn, modelFileName="ModelDataFile-'{}'__HiddenLayersActivationFunction-'{}'__Epoches-'{}'__MiniBatchGD-'{}'.pickle".format(self.dataFileName, self.activationFunctionsOfHiddenLayers, numberOfEpoches, batchSize))
+            if self.patience > 0 and state["epochsWithoutImprovement"] >= self.patience:
+                print("\n     Early stopping: no improvement of the validation cost for {} epochs (best at epoch {})".format(self.patience, state["bestEpoch"]))
+                break
+    
+    def validate(self):
+        # Cost and MAE of the validation examples, without any update (the training examples when there are no validation examples)
+        if len(self.yValidation) == 0:
+            xValidation, yValidation = self.trainingFeatures(), self.yTrain
+        else:
+            xValidation, yValidation = self.xValidation, self.yValidation
+        
+        scores, cost = self.dnn.forward(X=xValidation, labels=yValidation, training=False)
+        
+        return cost, np.mean(np.abs(scores - yValidation))
+    
+    def modelFileName(self, numberOfEpoches, batchSize):
+        if batchSize == 0:
+            return "ModelDataFile-'{}'__HiddenLayersActivationFunction-'{}'__Epoches-'{}'__StochasticGD{}.npz".format(self.dataFileName, self.activationFunctionsOfHiddenLayers, numberOfEpoches, self.configurationSuffix())
+        
+        return "ModelDataFile-'{}'__HiddenLayersActivationFunction-'{}'__Epoches-'{}'__MiniBatchGD-'{}'{}.npz".format(self.dataFileName, self.activationFunctionsOfHiddenLayers, numberOfEpoches, batchSize, self.configurationSuffix())
+    
+    @staticmethod
+    def checkpointFileName(modelFileName):
+        return modelFileName[:-len(".npz")] + "__Checkpoint-'Last'.npz"
+    
+    def saveCheckpoint(self, modelFileName, numberOfEpoches, batchSize):
+        # The last epoch's weights and optimizer state, with the training state and the state of NumPy's random generator (which shuffles the batches)
+        (algorithm, keys, position, hasGauss, cachedGaussian) = np.random.get_state()
+        randomState = {"algorithm": algorithm, "keys": keys.tolist(), "position": position, "hasGauss": hasGauss, "cachedGaussian": cachedGaussian}
+        
+        metadata = dict(self.trainingMetadata(numberOfEpoches=numberOfEpoches, batchSize=batchSize), trainingState=self.trainingState, randomState=randomState)
+        NeuralNetwork.save(model=self.dnn, modelFileName=Trainer.checkpointFileName(modelFileName), metadata=metadata)
+        
+    def resume(self, modelFileName):
+        checkpointFileName = Trainer.checkpointFileName(modelFileName)
+        if not os.path.exists("./deepLearningAI/models/{}".format(checkpointFileName)):
+            print("\nNo checkpoint {} to resume from: the training starts from scratch".format(checkpointFileName))
+            return
+        
+        self.dnn = NeuralNetwork.load(modelFileName=checkpointFileName, dtype=self.dnn.dtype)
+        
+        self.trainingState = self.dnn.metadata.pop("trainingState")
+        randomState = self.dnn.metadata.pop("randomState")
+        np.random.set_state((randomState["algorithm"], np.array(randomState["keys"], dtype=np.uint32), randomState["position"], randomState["hasGauss"], randomState["cachedGaussian"]))
+        
+    @staticmethod
+    def benchmarkDataParallel(dataFileName, workerCounts=(1, 2, 4, 8), numberOfEpoches=5, batchSize=64, seed=0):
+        # Seconds per epoch of mini-batch training with each number of workers, from the same seed; the final weights of every run
+        # are compared with the single-process ones, which they should match up to float rounding
+        print("\n========================================================================================================================")
+        print("DATA-PARALLEL TRAINING BENCHMARK: {} ({} epochs, Batch Size: {}, {} CPUs)".format(dataFileName, numberOfEpoches, batchSize, os.cpu_count()))
+        
+        results = []
+        referenceWeights = None
+        for numberOfWorkers in workerCounts:
+            np.random.seed(seed)
+            with contextlib.redirect_stdout(open(os.devnull, "w")):
+                trainer = Trainer(dataFileName=dataFileName, numberOfEpoches=0, batchSize=batchSize, numberOfWorkers=numberOfWorkers)
+                
+                group = trainer.startDataParallelGroup()
+                try:
+                    startTime = time.perf_counter()
+                    for epoch in range(0, numberOfEpoches):
+                        trainer.trainOneEpoch(batchSize=batchSize, group=group)
+                    elapsedTime = time.perf_counter() - startTime
+                finally:
+                    if group is not None:
+                        group.close()
+                        
+            weights = np.concatenate([parameter.reshape(-1) for parameter, gradient in trainer.dnn.parameters()])
+            if referenceWeights is None:
+                referenceWeights = weights
+            
+            result = {
+                "numberOfWorkers": numberOfWorkers,
+                "secondsPerEpoch": elapsedTime / max(1, numberOfEpoches),
+                "speedup": results[0]["secondsPerEpoch"] / (elapsedTime / max(1, numberOfEpoches)) if results else 1.,
+                "maxWeightDifference": float(np.max(np.abs(weights - referenceWeights)))
+            }
+            results.append(result)
+            
+            print("     {} workers: {:.4f} secs./epoch; speedup x{:.2f}; max. weight difference with 1 worker: {:.2e}".format(numberOfWorkers, result["secondsPerEpoch"], result["speedup"], result["maxWeightDifference"]))
+            
+        return results
+        
+    def configurationSuffix(self):
+        # Model file names only mention the loss and the optimizer when they are not the default ones, so that they stay as they were
+        suffix = ""
+        if self.lossFunction != "BinaryCrossEntropy":
+            suffix += "__Loss-'{}'".format(self.lossFunction)
+        if self.optimizerName != "Adam":
+            suffix += "__Optimizer-'{}'".format(self.optimizerName)
+            
+        return suffix
+    
+    def trainingMetadata(self, numberOfEpoches, batchSize):
+        # Saved in the weight file's header (see NeuralNetwork.save): how the model was trained, and how its inputs were scaled
+        return {
+            "training": {"dataFileName": self.dataFileName, "numberOfEpoches": numberOfEpoches, "batchSize": batchSize, "lossFunction": self.lossFunction,
+                         "optimizer": self.optimizerName, "numberOfWorkers": self.numberOfWorkers},
+            "scaling": self.dataset.scalingStatistics() if self.dataset is not None else None,
+            "bestEpoch": self.trainingState["bestEpoch"],
+            "bestValidationCost": self.trainingState["bestValidationCost"]
+        }
         
     def test(self):
         print("\n========================================================================================================================")
@@ -1,3 +1,4 @@
+import os
 import sys
 import pyglet
 
@@ -5,19 +6,48 @@ from chessManager.graphics import window
 from chessManager.point2d import Point2D
 from chessManager.board import Board
 from chessManager.chess import Chess
+from chessBots.bot import Bot
+from chessBots.botWorker import BotWorker
+from chessBots.ponderer import Ponderer
+from chessBots.openingBook import OpeningBook
 from chessBots.randomBot import RandomBot
 from chessBots.deepLearningBot import DeepLearningBot
 
 class Game():
-    def __init__(self, modelFileName="ModelDataFile-'1_Simulations_Of_White_RandomBot_VS_Black_RandomBot'__HiddenLayersActivationFunction-'ReLU'__Epoches-'150'__MiniBatchGD-'64'.pickle"):
+    def __init__(self, modelFileName="ModelDataFile-'1_Simulations_Of_White_RandomBot_VS_Black_RandomBot'__HiddenLayersActivationFunction-'ReLU'__Epoches-'150'__MiniBatchGD-'64'.npz", botName=None, isPondering=True, openingBookFileName="book.bin"):
         self.chess = Chess()
         self.board = Board(chess=self.chess, boardSize=640., boardOffset=Point2D(80., 80.), firstColor="BLUE", secondColor="WHITE")
         
         # self.bot = RandomBot(chess=self.chess)
-        self.bot = DeepLearningBot(chess=self.chess, playerIndex=-1, modelFileName=modelFileName)
+        # A bot name registered in Bot.initializeBot (e.g. "Search_<model file name>") selects another bot than the one-ply DeepLearningBot
+        if botName is not None:
+            self.bot = Bot.initializeBot(chess=self.chess, botName=botName, playerIndex=-1)
+        else:
+            self.bot = DeepLearningBot(chess=self.chess, playerIndex=-1, modelFileName=modelFileName)
+        
+        # The bot plays from the opening book, when one has been built (see OpeningBook.build)
+        if openingBookFileName is not None and os.path.exists(os.path.join(OpeningBook.BOOK_DIRECTORY, openingBookFileName)):
+            self.bot.openingBook = OpeningBook(bookFileName=openingBookFileName)
+            print(self.bot.openingBook)
+        
+        # The bot thinks in a background thread, and its move is played by update() once chosen
+        self.botWorker = BotWorker(bot=self.bot)
+        
+        # While the player thinks, the bot prepares its answers to the player's likeliest replies (see Ponderer)
+        self.ponderer = Ponderer(botWorker=self.botWorker) if isPondering else None
         
         self.turn = "Player"
-        self.botThinkingTimer = 0.
+        
+    def reset(self):
+        # New game: the bot's search and pondering, if any, are cancelled and their moves discarded
+        self.botWorker.cancel()
+        if self.ponderer is not None:
+            self.ponderer.cancel()
+        self.chess.initializeChessBoard()
+        self.board.chosenSourceBox = None
+        self.turn = "Player"
+        print("\n=======================================================================================")
+        print("The game has been reset.")
 
     def inputMouse(self, x, y, button, modifiers):
         if button == pyglet.window.mouse.LEFT and self.turn == "Player":
@@ -46,7 +76,9 @@ class Game():
                     self.turn = "Bot"
 
     def inputKeyboard(self, symbol, modifiers):
-        return
+        # R: reset the game
+        if symbol == pyglet.window.key.R:
+            self.reset()
 
     def update(self, delta):      
         try:
@@ -58,14 +90,33 @@ class Game():
             print("FAILED TO CONVERT BOARD'S CODES TO IMAGES: {}".format(sys.exc_info()))
                 
         self.board.update(delta)
-        window.updateLabel("bot's thinking timer", "ETA Thinking time: {} secs.".format((self.bot.thinkingTime - self.botThinkingTimer), ".2f"))
         
-        if self.turn == "Bot":
-            self.botThinkingTimer += delta
-            if self.botThinkingTimer >= self.bot.thinkingTime:
-                self.bot.perform()
+        if self.turn == "Player":
+            if self.ponderer is not None and not self.ponderer.isStarted():
+                self.ponderer.start(board=self.chess.board)
+        elif self.turn == "Bot":
+            if self.ponderer is not None and self.ponderer.isStarted():
+                # The answer is played at once when the player's move was pondered; otherwise the bot starts thinking once pondering has stopped
+                isFinished, move = self.ponderer.finish(board=self.chess.board)
+                if isFinished:
+                    if move is not None:
+                        self.bot.playMove(move)
+                        self.turn = "Player"
+                    else:
+                        self.botWorker.start(board=self.chess.board)
+            elif not self.botWorker.isThinking():
+                self.botWorker.start(board=self.chess.board)
+            
+            isChosen, move = self.botWorker.poll()
+            if isChosen:
+                self.bot.playMove(move)
                 self.turn = "Player"
-        elif self.turn == "Player":
-            self.botThinkingTimer = 0
+                
+        if self.botWorker.isThinking():
+            window.updateLabel("bot's thinking timer", "Bot thinking: {:.1f} secs.".format(self.botWorker.elapsedTime()))
+        elif self.turn == "Bot" and self.ponderer is not None:
+            window.updateLabel("bot's thinking timer", "Bot thinking: {:.1f} secs.".format(self.ponderer.waitingTime()))
+        else:
+            window.updateLabel("bot's thinking timer", "Your turn")
     
 game = None
\ No newline at end of file
@@ -1,12 +1,15 @@
+import os
 import sys
 import pyglet
 
 import game
 from deepLearningAI.training.dataGenerating import DataGenerator
 from deepLearningAI.training.training import Trainer
+from deepLearningAI.training.dataset import Dataset
+from deepLearningAI.deepNeuralNetwork.neuralNetwork import NeuralNetwork
 
-def play(modelFileName="ModelDataFile-'1_Simulations_Of_White_RandomBot_VS_Black_RandomBot'__HiddenLayersActivationFunction-'ReLU'__Epoches-'150'__MiniBatchGD-'64'.pickle"):
-    game.game = game.Game(modelFileName=modelFileName)
+def play(modelFileName="ModelDataFile-'1_Simulations_Of_White_RandomBot_VS_Black_RandomBot'__HiddenLayersActivationFunction-'ReLU'__Epoches-'150'__MiniBatchGD-'64'.npz", botName=None):
+    game.game = game.Game(modelFileName=modelFileName, botName=botName)
     pyglet.clock.schedule_interval(game.game.update, 1/60.)
     pyglet.app.run()
     
@@ -18,30 +21,102 @@ if __name__ == '__main__':
     print("================================================================================================================================================")
     print()
     if len(sys.argv) >= 2:  
-        if len(sys.argv) == 5 and sys.argv[1] == "generateData":
-            # E.g. "python main.py generateData DeepLearning_ModelDataFile-'1_Simulations_Of_White_RandomBot_VS_Black_RandomBot'__HiddenLayersActivationFunction-'ReLU'__Epoches-'150'__MiniBatchGD-'64'.pickle Random 1"
+        if 5 <= len(sys.argv) <= 10 and sys.argv[1] == "generateData":
+            # E.g. "python main.py generateData DeepLearning_ModelDataFile-'1_Simulations_Of_White_RandomBot_VS_Black_RandomBot'__HiddenLayersActivationFunction-'ReLU'__Epoches-'150'__MiniBatchGD-'64'.npz Random 1"
+            # The optional arguments are the number of worker processes, and "resume" to continue an interrupted run, e.g. "python main.py generateData Random Random 100 8 resume"
+            # and "async" to score positions concurrently on an AsyncEvaluator of 4 engines (the positions of each game, and the candidate moves of DeepLearning bots),
+            # e.g. "python main.py generateData DeepLearning_ModelDataFile-'...'.npz Random 100 async"
+            # and "cache" to look every evaluation up in ./deepLearningAI/data/evaluationCache.sqlite before asking an engine (from every worker process), e.g. "python main.py generateData Random Random 100 8 cache"
+            # and "seed=<number>" to replay the games of an earlier run (a random seed is chosen and printed otherwise), e.g. "python main.py generateData Random Random 100 8 seed=42"
+            evaluator = None
+            evaluationCache = None
             try:
-                numberOfSimulations = (int)(sys.argv[4])
-                data = DataGenerator(whiteBot=sys.argv[2], blackBot=sys.argv[3], numberOfSimulations=numberOfSimulations)
+                options = [argument for argument in sys.argv[5:] if argument in ("resume", "async", "cache") or argument.startswith("seed=")]
+                isResumed = "resume" in options
+                seeds = [(int)(option[len("seed="):]) for option in options if option.startswith("seed=")]
+                arguments = [argument for argument in sys.argv if argument not in options]
+                
+                numberOfSimulations = (int)(arguments[4])
+                numberOfWorkers = (int)(arguments[5]) if len(arguments) == 6 else 1
+                
+                if "cache" in options:
+                    from deepLearningAI.training.evaluationCache import EvaluationCache
+                    
+                    evaluationCache = EvaluationCache()
+                    
+                if "async" in options:
+                    from deepLearningAI.training.asyncEvaluator import AsyncEvaluator
+                    
+                    evaluator = AsyncEvaluator(evaluationCache=evaluationCache)
+                    
+                data = DataGenerator(whiteBot=arguments[2], blackBot=arguments[3], numberOfSimulations=numberOfSimulations, evaluator=evaluator, evaluationCache=evaluationCache, numberOfWorkers=numberOfWorkers, seed=seeds[0] if seeds else None, isResumed=isResumed)
             except:
                 print("Unable to generate data: {}. The game will start instead".format(sys.exc_info()))
                 play()
-        elif len(sys.argv) == 6 and sys.argv[1] == "train":
+            finally:
+                if evaluator is not None:
+                    evaluator.shutdown()
+                if evaluationCache is not None:
+                    evaluationCache.close()
+        elif 6 <= len(sys.argv) <= 11 and sys.argv[1] == "train":
             # E.g. "python main.py train 1_Simulations_Of_White_RandomBot_VS_Black_RandomBot ReLU 1"
+            # The optional arguments are the loss: BinaryCrossEntropy (default), MeanSquaredError or Huber, e.g. "python main.py train 1_Simulations_Of_White_RandomBot_VS_Black_RandomBot ReLU 150 64 Huber"
+            # and the optimizer: Adam (default), SGD, Momentum, Nesterov or RMSProp, e.g. "python main.py train 1_Simulations_Of_White_RandomBot_VS_Black_RandomBot ReLU 150 64 BinaryCrossEntropy Momentum"
+            # and the number of data-parallel worker processes, e.g. "python main.py train 1_Simulations_Of_White_RandomBot_VS_Black_RandomBot ReLU 150 64 BinaryCrossEntropy Adam 4"
+            # and "resume" to continue an interrupted run from its last checkpoint, e.g. "python main.py train 1_Simulations_Of_White_RandomBot_VS_Black_RandomBot ReLU 150 64 resume"
+            # and "telemetry" to log the training metrics to ./deepLearningAI/logs, with a console summary every 16 batches, e.g. "python main.py train 1_Simulations_Of_White_RandomBot_VS_Black_RandomBot ReLU 150 64 telemetry"
             try:
-                dataFileName = sys.argv[2]
-                activationFunctionsOfHiddenLayers = sys.argv[3]
-                numberOfEpoches = (int)(sys.argv[4])
-                batchSize = (int)(sys.argv[5])
+                options = [argument for argument in sys.argv[6:] if argument in ("resume", "telemetry")]
+                isResumed = "resume" in options
+                isTelemetryEnabled = "telemetry" in options
+                arguments = [argument for argument in sys.argv if argument not in options]
+                
+                dataFileName = arguments[2]
+                activationFunctionsOfHiddenLayers = arguments[3]
+                numberOfEpoches = (int)(arguments[4])
+                batchSize = (int)(arguments[5])
+                lossFunction = arguments[6] if len(arguments) >= 7 else "BinaryCrossEntropy"
+                optimizer = arguments[7] if len(arguments) >= 8 else "Adam"
+                numberOfWorkers = (int)(arguments[8]) if len(arguments) == 9 else 1
                 
-                trainer = Trainer(dataFileName=dataFileName, activationFunctionsOfHiddenLayers=activationFunctionsOfHiddenLayers, numberOfEpoches=numberOfEpoches, batchSize=batchSize)
+                trainer = Trainer(dataFileName=dataFileName, activationFunctionsOfHiddenLayers=activationFunctionsOfHiddenLayers, numberOfEpoches=numberOfEpoches, batchSize=batchSize, lossFunction=lossFunction, optimizer=optimizer, numberOfWorkers=numberOfWorkers, isResumed=isResumed, summaryInterval=16 if isTelemetryEnabled else 0, isTelemetryEnabled=isTelemetryEnabled)
             except:
                 print("Unable to train Neural network: {}. The game will start instead".format(sys.exc_info()))
                 play()
+        elif len(sys.argv) in (3, 4, 5) and sys.argv[1] == "benchmarkDataParallel":
+            # E.g. "python main.py benchmarkDataParallel 10_Simulations_Of_White_RandomBot_VS_Black_RandomBot 5 64": seconds per epoch with 1, 2, 4 and 8 workers
+            numberOfEpoches = (int)(sys.argv[3]) if len(sys.argv) >= 4 else 5
+            batchSize = (int)(sys.argv[4]) if len(sys.argv) == 5 else 64
+            Trainer.benchmarkDataParallel(dataFileName=sys.argv[2], numberOfEpoches=numberOfEpoches, batchSize=batchSize)
+        elif len(sys.argv) in (2, 3) and sys.argv[1] == "convertData":
+            # E.g. "python main.py convertData 10_Simulations_Of_White_RandomBot_VS_Black_RandomBot"; without a name, every CSV data file is converted
+            dataFileNames = [sys.argv[2]] if len(sys.argv) == 3 else sorted(fileName[:-4] for fileName in os.listdir("./deepLearningAI/data") if fileName.endswith(".csv"))
+            for dataFileName in dataFileNames:
+                print("Converted {}".format(Dataset.convert(dataFileName=dataFileName)))
+        elif len(sys.argv) in (3, 4) and sys.argv[1] == "benchmark":
+            # E.g. "python main.py benchmark benchmark.json", then after a change "python main.py benchmark after.json benchmark.json" to flag the regressions (see Benchmark)
+            from benchmark import Benchmark
+            
+            sys.exit(Benchmark.main(sys.argv[2:]))
+        elif len(sys.argv) in (2, 3) and sys.argv[1] == "migrateModels":
+            # E.g. "python main.py migrateModels": every pickled model without an .npz weight file is converted (see NeuralNetwork.migrate); the pickles are kept
+            modelFileNames = [sys.argv[2]] if len(sys.argv) == 3 else sorted(fileName for fileName in os.listdir("./deepLearningAI/models") if fileName.endswith(".pickle") and not os.path.exists("./deepLearningAI/models/{}.npz".format(fileName[:-len(".pickle")])))
+            for modelFileName in modelFileNames:
+                print("Migrated {} to {}".format(modelFileName, NeuralNetwork.migrate(modelFileName=modelFileName)))
+        elif len(sys.argv) >= 2 and sys.argv[1] == "buildBook":
+            # E.g. "python main.py buildBook": every game written by generateData (./deepLearningAI/data/*.pgn) is compiled into ./deepLearningAI/books/book.bin;
+            # "python main.py buildBook myBook.bin 20 games.pgn more.pgn" names the book, its maximum depth in plies and the PGN files
+            from chessBots.openingBook import OpeningBook
+            
+            OpeningBook.build(pgnFilePaths=sys.argv[4:] or None, bookFileName=sys.argv[2] if len(sys.argv) >= 3 else "book.bin", maximumDepth=int(sys.argv[3]) if len(sys.argv) >= 4 else 16)
         elif len(sys.argv) == 2:    
+            # Either a model file name for the default bot, or a bot name, e.g. "python main.py Search_ModelDataFile-'...'.npz"
             try:
                 modelFileName = sys.argv[1]
-                play(modelFileName=modelFileName)
+                if modelFileName == "Random" or modelFileName.startswith(("DeepLearning_", "Search_", "MCTS_")):
+                    play(botName=modelFileName)
+                else:
+                    play(modelFileName=modelFileName)
             except:
                 print("Unable to start the game with the model {}: {}. The game will start with the default bot instead".format(modelFileName, sys.exc_info()))
                 play()
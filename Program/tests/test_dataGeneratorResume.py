@@ -0,0 +1,97 @@
+import os
+import sys
+import glob
+import json
+import time
+import signal
+import subprocess
+
+import numpy as np
+
+PROGRAM_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUB_ENGINE_PATH = os.path.join(PROGRAM_DIRECTORY, "deepLearningAI", "training", "stubEngine.py")
+
+NUMBER_OF_SIMULATIONS = 8
+NUMBER_OF_WORKERS = 2
+
+# Seeded self-play between random bots on the stub engine, run from the working directory of the test
+GENERATE = """
+import sys
+from deepLearningAI.training.enginePool import EnginePool
+from deepLearningAI.training.dataGenerating import DataGenerator
+
+EnginePool.configureDefaultPool(enginePath=[sys.executable, {stubEnginePath!r}])
+DataGenerator(numberOfSimulations={numberOfSimulations}, numberOfWorkers={numberOfWorkers}, seed=0, isPrintedOutput=False, isResumed=sys.argv[1] == "resume")
+"""
+
+def startGeneration(workingDirectory, isResumed=False):
+    os.makedirs(os.path.join(workingDirectory, "deepLearningAI", "data"), exist_ok=True)
+    script = GENERATE.format(stubEnginePath=STUB_ENGINE_PATH, numberOfSimulations=NUMBER_OF_SIMULATIONS, numberOfWorkers=NUMBER_OF_WORKERS)
+
+    # A session of its own, so that the generator, its workers and their engines can be killed together
+    return subprocess.Popen([sys.executable, "-c", script, "resume" if isResumed else "new"], cwd=workingDirectory, env=dict(os.environ, PYTHONPATH=PROGRAM_DIRECTORY),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, start_new_session=True)
+
+def completedShardGames(workingDirectory):
+    completedGames = set()
+    for progressFilePath in glob.glob(os.path.join(workingDirectory, "deepLearningAI", "data", "shards", "*", "*.records.json")):
+        try:
+            with open(progressFilePath) as file:
+                completedGames.update(json.load(file)["completedGames"])
+        except (OSError, ValueError):
+            pass
+
+    return completedGames
+
+def generatedRecords(workingDirectory):
+    from deepLearningAI.training.recordWriter import RecordWriter
+
+    (recordFilePath,) = glob.glob(os.path.join(workingDirectory, "deepLearningAI", "data", "*.records"))
+    return np.array(RecordWriter.readRecords(recordFilePath))
+
+def generatedPgnGames(workingDirectory):
+    import chess.pgn
+
+    (pgnFilePath,) = glob.glob(os.path.join(workingDirectory, "deepLearningAI", "data", "*.pgn"))
+    games = []
+    with open(pgnFilePath) as pgnFile:
+        while True:
+            game = chess.pgn.read_game(pgnFile)
+            if game is None:
+                return games
+            games.append(game)
+
+def test_killedParallelRunResumesToTheSameRecords(tmp_path):
+    sys.path.insert(0, PROGRAM_DIRECTORY)
+
+    referenceDirectory = str(tmp_path / "reference")
+    reference = startGeneration(referenceDirectory)
+    assert reference.wait(timeout=600) == 0, reference.stderr.read().decode()
+
+    # Killed without warning once some games are committed to the shards, but before the run is over
+    interruptedDirectory = str(tmp_path / "interrupted")
+    interrupted = startGeneration(interruptedDirectory)
+    deadline = time.time() + 600
+    while len(completedShardGames(interruptedDirectory)) < 2:
+        assert interrupted.poll() is None, "the run finished before it could be interrupted"
+        assert time.time() < deadline
+        time.sleep(0.01)
+    os.killpg(interrupted.pid, signal.SIGKILL)
+    interrupted.wait()
+
+    completedBeforeResume = completedShardGames(interruptedDirectory)
+    assert 2 <= len(completedBeforeResume) < NUMBER_OF_SIMULATIONS
+
+    resumed = startGeneration(interruptedDirectory, isResumed=True)
+    assert resumed.wait(timeout=600) == 0, resumed.stderr.read().decode()
+
+    # Every game committed before the kill is still there, no game is duplicated, and the data is the uninterrupted run's
+    records = generatedRecords(interruptedDirectory)
+    assert set(np.unique(records[:, 0]).astype(int)) == set(range(0, NUMBER_OF_SIMULATIONS))
+    np.testing.assert_array_equal(records, generatedRecords(referenceDirectory))
+
+    # The PGN holds every game exactly once, however many of them were played again after the kill (see OpeningBook.build)
+    games = generatedPgnGames(interruptedDirectory)
+    assert len(games) == NUMBER_OF_SIMULATIONS
+    assert sorted(int(game.headers["Round"]) for game in games) == list(range(1, NUMBER_OF_SIMULATIONS + 1))
+    assert [str(game) for game in games] == [str(game) for game in generatedPgnGames(referenceDirectory)]
@@ -0,0 +1,118 @@
+import os
+import sys
+import queue
+import time
+import signal
+import concurrent.futures
+
+import chess
+import chess.engine
+import pytest
+
+PROGRAM_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUB_ENGINE_PATH = os.path.join(PROGRAM_DIRECTORY, "deepLearningAI", "training", "stubEngine.py")
+
+sys.path.insert(0, PROGRAM_DIRECTORY)
+
+from deepLearningAI.training.enginePool import EnginePool
+
+LIMIT = chess.engine.Limit(time=0.01)
+
+def stubPool(numberOfEngines=1):
+    return EnginePool(enginePath=[sys.executable, STUB_ENGINE_PATH], numberOfEngines=numberOfEngines)
+
+def kill(engine, timeout=5.):
+    # Crash the engine, and wait until python-chess has noticed that its process died
+    os.kill(engine.transport.get_pid(), signal.SIGKILL)
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            engine.ping()
+        except chess.engine.EngineTerminatedError:
+            return
+        except concurrent.futures.CancelledError:
+            pass
+        time.sleep(0.01)
+
+def hasExited(pid, timeout=5.):
+    # The engines are closed asynchronously, by python-chess' background thread
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        time.sleep(0.01)
+
+    return False
+
+def test_borrowLendsEveryEngineOnceAtATime():
+    with stubPool(numberOfEngines=2) as pool:
+        with pool.borrow() as first, pool.borrow() as second:
+            assert first is not second
+
+            # Both engines are lent: a third borrow waits for one of them
+            with pytest.raises(queue.Empty):
+                with pool.borrow(timeout=0.1):
+                    pass
+
+        with pool.borrow(timeout=1.) as engine:
+            assert engine in (first, second)
+
+        # Material count of the stub engine: one pawn up for White
+        board = chess.Board("4k3/8/8/8/8/8/4P3/4K3 w - - 0 1")
+        assert pool.analyse(board, LIMIT)["score"].white().score() == 100
+
+def test_crashedEngineIsRestarted():
+    with stubPool() as pool:
+        with pool.borrow() as engine:
+            kill(engine)
+
+        # The health check finds the dead process, and the analysis runs on a fresh one
+        assert pool.analyse(chess.Board(), LIMIT)["score"].white().score() == 0
+        assert pool.numberOfRestarts == 1
+        assert len(pool.engines) == 1 and pool.engines[0] is not engine
+
+@pytest.mark.parametrize("isHealthChecked", [True, False])
+def test_failedRestartKeepsTheSlotForAReplacement(isHealthChecked):
+    with EnginePool(enginePath=[sys.executable, STUB_ENGINE_PATH], isHealthChecked=isHealthChecked) as pool:
+        with pool.borrow() as engine:
+            kill(engine)
+
+        # The engine cannot be started again: the error is raised, the dead engine is closed, and its slot is left empty
+        enginePath = pool.enginePath
+        pool.enginePath = os.path.join(PROGRAM_DIRECTORY, "missingEngine")
+        with pytest.raises(OSError):
+            pool.analyse(chess.Board(), LIMIT)
+        assert pool.engines == []
+        assert list(pool.idleEngines.queue) == [None]
+
+        with pytest.raises(OSError):
+            with pool.borrow():
+                pass
+        assert list(pool.idleEngines.queue) == [None]
+
+        # Once the engine can be started, the next borrow starts the replacement: the pool is back to its size
+        pool.enginePath = enginePath
+        with pool.borrow() as replacement:
+            assert replacement is not engine
+            replacement.ping()
+        assert pool.engines == [replacement]
+        assert pool.analyse(chess.Board(), LIMIT)["score"].white().score() == 0
+
+def test_shutdownClosesTheEngines():
+    pool = stubPool(numberOfEngines=2)
+    pids = [engine.transport.get_pid() for engine in pool.engines]
+
+    # An engine borrowed during the shutdown is closed when it is given back
+    with pool.borrow():
+        pool.shutdown()
+
+    assert all(hasExited(pid) for pid in pids)
+    assert pool.engines == []
+    assert pool not in EnginePool.livePools
+
+    with pytest.raises(RuntimeError):
+        with pool.borrow():
+            pass